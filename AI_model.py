@@ -1,35 +1,111 @@
+import asyncio
+import hashlib
 import os
-from langchain_core.messages import SystemMessage, HumanMessage, AIMessage
-from langchain_huggingface import ChatHuggingFace, HuggingFaceEndpoint, HuggingFaceEmbeddings
-import speech_creator
+import uuid
+from langchain_core.messages import SystemMessage, HumanMessage
+import embedding_engine
+import llm_client
+import metrics
+import session_store
+import context_window
+import resume_cache
+import retrieval_cache
+import response_cache
+import ingestion
+import turn_history
 from dotenv import load_dotenv
-from langchain_community.chat_message_histories import ChatMessageHistory
-from langchain_community.document_loaders import PyPDFLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_community.vectorstores import Cassandra
-import cassio
+
+# Heavy/optional dependencies (cassio, langchain vector stores and splitters,
+# pyaudio via speech_creator) are imported where they're first used, so
+# importing this module (and starting the web server) stays fast.
 
 # Load environment variables at module level (for deployed environments)
 load_dotenv()
 
-# Global store for chat histories (session_id -> ChatMessageHistory)
-_chat_sessions = {}
+# Bounded store for chat histories (session_id -> turn_history.TurnHistory)
+# Size and idle TTL come from SESSION_MAX_ENTRIES / SESSION_IDLE_TTL_SECONDS;
+# SESSION_BACKEND=sqlite/redis shares sessions across gunicorn workers and nodes
+_chat_sessions = session_store.create_store("chat_sessions", session_store.ChatHistorySerializer())
+
+# Shared record of where each session's resume is indexed (session_id ->
+# {"backend": "astra", "table_name": ...} or {"backend": "local", "path": ...}),
+# so any worker can rebuild the retriever
+_resume_specs = session_store.create_store("resume_specs", session_store.JSONSerializer())
+
+# Per-process cache of live resume RAG retrievers (session_id -> (version, retriever))
+# Evicting a retriever releases its Cassandra vectorstore; the table itself is
+# dropped by the startup cleanup or the next upload for that session.
+_resume_retrievers = session_store.SessionStore("resume_retrievers")
+
+# Per-process retrieval results (session_id -> retrieval_cache.SessionRetrievalCache)
+_retrieval_caches = session_store.SessionStore("retrieval_caches")
+
+# Where resume chunks are indexed: "astra" (Cassandra table per session) or
+# "local" (in-process NumPy index, optionally persisted under LOCAL_INDEX_DIR)
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "astra")
+LOCAL_INDEX_DIR = os.getenv("LOCAL_INDEX_DIR", "")
+
+# Resume chunking settings (part of the resume cache key)
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 200
+
+# Per-session prompt windows (session_id -> ContextWindow with rolling summary)
+_context_windows = session_store.create_store(
+    "context_windows", session_store.ObjectStateSerializer(context_window.ContextWindow)
+)
+
+# HuggingFace tokens set through /set_api (browser client id -> token), kept in
+# the session backend so whichever worker serves the next request can use it
+_api_tokens = session_store.create_store("api_tokens", session_store.JSONSerializer())
+
+# Process-wide secrets shared by all workers through the session backend (no idle expiry)
+_app_secrets = session_store.create_store("app_secrets", session_store.JSONSerializer(), idle_ttl=0)
 
-# Global store for resume RAG retrievers (session_id -> retriever)
-_resume_retrievers = {}
+def set_api_token(client_id: str, token: str):
+    """Remember a browser's HuggingFace token."""
+    _api_tokens.set(client_id, token)
+
+def get_api_token(client_id: str = None):
+    """The browser's HuggingFace token, else HUGGINGFACEHUB_API_TOKEN (None if neither is set)."""
+    token = _api_tokens.get(client_id) if client_id else None
+    return token or os.getenv("HUGGINGFACEHUB_API_TOKEN")
+
+def shared_secret_key() -> str:
+    """
+    Cookie-signing key generated once and shared through the session backend,
+    so every worker accepts the same session cookies (per process with
+    SESSION_BACKEND=memory).
+    """
+    return _app_secrets.get_or_create("flask_secret_key", lambda: os.urandom(24).hex())
 
 def get_chat_history(session_id: str = "default"):
     """Get or create chat history for a session."""
-    if session_id not in _chat_sessions:
-        _chat_sessions[session_id] = ChatMessageHistory()
-    return _chat_sessions[session_id]
+    return _chat_sessions.get_or_create(session_id, turn_history.TurnHistory)
 
 def clear_chat_history(session_id: str = "default"):
     """Clear chat history for a session."""
-    if session_id in _chat_sessions:
-        del _chat_sessions[session_id]
+    _chat_sessions.pop(session_id)
+    _context_windows.pop(session_id)
     return True
 
+def get_session_stats():
+    """Memory report for the chat history and retriever stores."""
+    return {
+        "chat_sessions": _chat_sessions.memory_report(),
+        "resume_specs": _resume_specs.memory_report(),
+        "resume_retrievers": _resume_retrievers.memory_report(),
+        "retrieval_cache": retrieval_cache.get_stats(),
+        "response_cache": response_cache.get_stats(),
+    }
+
+def get_history_stats():
+    """Per-session chat history size vs. storing resume context inline."""
+    return {session_id: history.report() for session_id, history in _chat_sessions.items()}
+
+def get_context_stats():
+    """Per-session prompt token counts from the context windows."""
+    return {session_id: window.stats() for session_id, window in _context_windows.items()}
+
 def reset_resume_table(table_name: str):
     """
     Reset (drop) the Astra DB table for resume data.
@@ -50,170 +126,150 @@ def reset_resume_table(table_name: str):
         keyspace = check_resolve_keyspace()
         
         if not session or not keyspace:
-            print(f"[WARN] Cassio not initialized, cannot drop table '{table_name}'")
+            metrics.log(f"Cassio not initialized, cannot drop table '{table_name}'", "WARN")
             return False
         
         # Use DROP TABLE IF EXISTS for safe cleanup
         drop_query = f"DROP TABLE IF EXISTS {keyspace}.{table_name};"
-        print(f"[INFO] Dropping table '{table_name}' from keyspace '{keyspace}'...")
+        metrics.log(f"Dropping table '{table_name}' from keyspace '{keyspace}'...")
         session.execute(drop_query)
-        print(f"[INFO] Table '{table_name}' dropped successfully (or didn't exist).")
+        metrics.log(f"Table '{table_name}' dropped successfully (or didn't exist).")
         return True
         
     except Exception as e:
-        print(f"[WARN] Could not drop table '{table_name}': {e}")
+        metrics.log(f"Could not drop table '{table_name}': {e}", "WARN")
         # Not critical - table might not exist or might be in use
         return False
 
 
 def cleanup_all_resume_tables():
     """
-    Cleanup all resume-related tables on server startup.
-    Drops all tables matching pattern 'resume_*'.
-    This ensures a fresh start without stale data.
+    Drop all resume_* tables left over from previous deployments.
+    The web app no longer calls this at import time; see maintenance.py.
     
     Returns:
         int: Number of tables successfully dropped
     """
-    try:
-        # Load Astra DB credentials from environment
-        astra_token = os.getenv("ASTRA_DB_APPLICATION_TOKEN")
-        astra_db_id = os.getenv("ASTRA_DB_ID")
-        
-        if not astra_token or not astra_db_id:
-            print("[WARN] Astra DB credentials not found, skipping cleanup")
-            return 0
-        
-        # Initialize cassio connection
-        cassio.init(token=astra_token, database_id=astra_db_id)
-        print("[INFO] Connected to Astra DB for cleanup")
-        
-        # Get session using cassio's config
-        from cassio.config import check_resolve_session, check_resolve_keyspace
-        session = check_resolve_session()
-        keyspace = check_resolve_keyspace()
-        
-        if not session or not keyspace:
-            print("[WARN] Could not resolve cassio session/keyspace")
-            return 0
-        
-        # Query all tables in keyspace
-        query = f"SELECT table_name FROM system_schema.tables WHERE keyspace_name = '{keyspace}';"
-        rows = session.execute(query)
-        
-        # Filter and drop resume tables
-        dropped_count = 0
-        for row in rows:
-            table_name = row.table_name
-            if table_name.startswith('resume_'):
-                try:
-                    drop_query = f"DROP TABLE IF EXISTS {keyspace}.{table_name};"
-                    session.execute(drop_query)
-                    print(f"[INFO] Dropped table: {table_name}")
-                    dropped_count += 1
-                except Exception as e:
-                    print(f"[WARN] Could not drop {table_name}: {e}")
-        
-        if dropped_count > 0:
-            print(f"[INFO] Cleanup complete: {dropped_count} resume table(s) dropped")
-        else:
-            print("[INFO] No resume tables found to clean up")
-        
-        return dropped_count
-        
-    except Exception as e:
-        print(f"[ERROR] Cleanup failed: {e}")
-        import traceback
-        traceback.print_exc()
-        return 0
+    import maintenance
+    return maintenance.cleanup_resume_tables()
 
-def setup_resume_rag_from_bytes(pdf_bytes, filename: str, session_id: str = "default", reset_table: bool = True):
+def setup_resume_rag_from_bytes(pdf_bytes, filename: str, session_id: str = "default", reset_table: bool = True,
+                                progress=None, api_token: str = None):
     """
     Load and process resume PDF from memory (BytesIO), create Astra DB vector store and retriever.
     NO LOCAL FILE STORAGE - Everything goes directly to Astra DB.
+    With VECTOR_BACKEND=local the chunks go to an in-process index instead
+    (persisted under LOCAL_INDEX_DIR when set, so other workers can load it).
     
     Args:
         pdf_bytes: BytesIO object containing PDF data
         filename: Original filename for reference
         session_id: Session ID to associate the retriever with
-        reset_table: If True, drops the existing table before creating new one (default: True)
+        reset_table: If True, drops the session's previous table once the new one is in use (default: True)
+        progress: Optional callback(stage) called as each stage starts (used by background jobs)
+        api_token: HuggingFace token set by the uploading browser (defaults to the environment)
     """
+    report = progress or (lambda stage: None)
     try:
-        from pypdf import PdfReader
-        from langchain.schema import Document
-        
         # Load Astra DB credentials from environment variables
         astra_token = os.getenv("ASTRA_DB_APPLICATION_TOKEN")
         astra_db_id = os.getenv("ASTRA_DB_ID")
-        if not astra_token or not astra_db_id:
+        if VECTOR_BACKEND == "astra" and (not astra_token or not astra_db_id):
             raise ValueError("Astra DB credentials not found. Please set ASTRA_DB_APPLICATION_TOKEN and ASTRA_DB_ID in Hugging Face Space Secrets.")
         
         # Check for HuggingFace token (needed for embeddings)
         # HF token can come from either UI (set via /set_api) or environment
-        hf_token = os.getenv("HUGGINGFACEHUB_API_TOKEN")
+        hf_token = api_token or os.getenv("HUGGINGFACEHUB_API_TOKEN")
         if not hf_token:
             raise ValueError("⚠️ Please provide your HuggingFace API key in the sidebar first!")
-        print(f"[INFO] Loading PDF from memory: {filename}")
-        
-        # Read PDF from BytesIO object
-        pdf_reader = PdfReader(pdf_bytes)
-        documents = []
-        for i, page in enumerate(pdf_reader.pages):
-            text = page.extract_text()
-            documents.append(Document(
-                page_content=text,
-                metadata={"source": filename, "page": i}
-            ))
-        print(f"[INFO] Loaded {len(documents)} pages from PDF")
         
-        # Initialize Cassandra/Astra DB connection
-        cassio.init(token=astra_token, database_id=astra_db_id)
-        print("[INFO] Connected to Astra DB")
+        # Shared embeddings engine (runs locally, FREE! loaded once per worker)
+        report("load_model")
+        embeddings = embedding_engine.get_embeddings()
         
-        # Split into chunks
-        text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000,
-            chunk_overlap=200
-        )
-        splits = text_splitter.split_documents(documents)
-        print(f"[INFO] Split into {len(splits)} chunks")
-        # Create embeddings (runs locally, FREE!)
-        embeddings = HuggingFaceEmbeddings(
-            model_name="sentence-transformers/all-MiniLM-L6-v2",  # Faster, smaller model
-            model_kwargs={'device': 'cpu'},
-            encode_kwargs={'normalize_embeddings': True}
-        )
-        print("[INFO] Embeddings model loaded")
-        # Create Astra DB vector store
-        table_name = f"resume_{session_id.replace('-', '_')}"  # Table names can't have dashes
+        # Same PDF + splitter/model settings -> reuse cached chunks and vectors
+        pdf_data = pdf_bytes.getvalue()
+        cache_key = resume_cache.cache_key(pdf_data, CHUNK_SIZE, CHUNK_OVERLAP, embedding_engine.EMBEDDING_MODEL_NAME)
+        report("cache_lookup")
+        cached = resume_cache.get(cache_key)
         
-        # Reset table if requested (clears old resume data)
-        if reset_table:
-            print(f"[INFO] Resetting table '{table_name}' to clear old resume data...")
-            reset_resume_table(table_name)
+        # Vector stores embed through precomputed vectors (cached, or filled batch by batch below)
+        store_embeddings = resume_cache.PrecomputedEmbeddings([], [], embeddings)
+        if VECTOR_BACKEND == "local":
+            import vector_index
+            vectorstore = vector_index.LocalVectorStore(store_embeddings)
+            index_path = _local_index_path(session_id) if LOCAL_INDEX_DIR else None
+            spec = {"backend": "local", "path": index_path}
+            store_label = "local index"
+        else:
+            # Initialize Cassandra/Astra DB connection
+            import cassio
+            cassio.init(token=astra_token, database_id=astra_db_id)
+            metrics.log("Connected to Astra DB")
+            
+            # Create Astra DB vector store (a new table per upload; the name records
+            # when it was created, so startup cleanup never drops this deployment's tables)
+            import maintenance
+            table_name = maintenance.resume_table_name(session_id)
+            
+            metrics.log(f"Creating vector store in Astra DB table: {table_name}")
+            vectorstore = _astra_vectorstore(table_name, store_embeddings)
+            spec = {"backend": "astra", "table_name": table_name}
+            store_label = "Astra DB"
         
-        print(f"[INFO] Creating vector store in Astra DB table: {table_name}")
-        vectorstore = Cassandra(
-            embedding=embeddings,
-            table_name=table_name,
-            session=None,  # Uses cassio session
-            keyspace=None,  # Uses default keyspace
-        )
-        # Add documents to vector store
-        print("[INFO] Adding documents to Astra DB...")
-        vectorstore.add_documents(splits)
-        print(f"[INFO] Successfully stored {len(splits)} chunks in Astra DB")
+        if cached is not None:
+            splits, vectors = cached
+            for doc in splits:
+                doc.metadata["source"] = filename
+            metrics.log(f"Resume cache hit: bulk inserting {len(splits)} cached chunks into {store_label}")
+            report("index")
+            store_embeddings.add([doc.page_content for doc in splits], vectors)
+            with metrics.span("vector_insert"):
+                vectorstore.add_documents(splits)
+        else:
+            # Pages are extracted in parallel, chunked as they arrive, embedded in
+            # batches and written to the vector store while the next batch embeds
+            metrics.log(f"Streaming PDF from memory into {store_label}: {filename}")
+            report("ingest")
+            from langchain_text_splitters import RecursiveCharacterTextSplitter
+            text_splitter = RecursiveCharacterTextSplitter(
+                chunk_size=CHUNK_SIZE,
+                chunk_overlap=CHUNK_OVERLAP
+            )
+            splits, vectors, timings = ingestion.ingest_pdf(
+                pdf_data, filename, text_splitter, vectorstore, store_embeddings, embeddings
+            )
+            metrics.log(f"Ingested {timings['pages']} pages: extract {timings['extract_seconds']:.3f}s, "
+                        f"split {timings['split_seconds']:.3f}s, embed {timings['embed_seconds']:.3f}s, "
+                        f"write wait {timings['write_wait_seconds']:.3f}s")
+            try:
+                resume_cache.put(cache_key, splits, vectors)
+            except Exception as e:
+                # The resume is indexed; a failed cache write only costs the next re-upload
+                metrics.log(f"Could not cache resume chunks: {e}", "WARN")
+        metrics.log(f"Successfully stored {len(splits)} chunks in {store_label}")
+        if spec.get("path"):
+            vectorstore.save(spec["path"])
         # Create retriever
-        retriever = vectorstore.as_retriever(
-            search_type="similarity",
-            search_kwargs={"k": 3}
-        )
-        # Store retriever for this session
-        _resume_retrievers[session_id] = retriever
-        print("[INFO] Resume RAG setup complete!")
+        retriever = _as_retriever(vectorstore)
+        # Store retriever for this session (and where it lives, for other workers)
+        spec["version"] = uuid.uuid4().hex
+        spec["chunk_count"] = len(splits)
+        if len(splits) <= retrieval_cache.RETRIEVAL_TOP_K:
+            # Every query would return all of them: keep the chunks, skip retrieval
+            spec["chunks"] = [{"text": doc.page_content, "metadata": doc.metadata}
+                              for doc in retrieval_cache.dedupe(splits)]
+        previous = _resume_specs.get(session_id)
+        _resume_specs.set(session_id, spec)
+        _resume_retrievers.set(session_id, (spec["version"], retriever))
+        # Drop the old resume's table only after the session has switched to the new one
+        if reset_table and previous and previous.get("backend") == "astra":
+            metrics.log(f"Resetting table '{previous['table_name']}' to clear old resume data...")
+            reset_resume_table(previous["table_name"])
+        metrics.log("Resume RAG setup complete!")
         return True
     except Exception as e:
-        print(f"[ERROR] Failed to setup resume RAG with Astra DB: {e}")
+        metrics.log(f"Failed to setup resume RAG ({VECTOR_BACKEND}): {e}", "ERROR")
         import traceback
         traceback.print_exc()
         return False
@@ -221,33 +277,122 @@ def setup_resume_rag_from_bytes(pdf_bytes, filename: str, session_id: str = "def
 
 
 
-def chat_with_history(user_message: str, session_id: str = "default", use_resume: bool = False):
+def _local_index_path(session_id: str) -> str:
+    """Index file prefix under LOCAL_INDEX_DIR (session ids come from the client, so they are hashed, not joined)."""
+    digest = hashlib.sha256(session_id.encode("utf-8")).hexdigest()[:32]
+    return os.path.join(LOCAL_INDEX_DIR, f"resume_{digest}")
+
+
+def _astra_vectorstore(table_name: str, embeddings):
+    """Cassandra vector store over an Astra DB table (cassio must be initialized)."""
+    from langchain_community.vectorstores import Cassandra
+    return Cassandra(
+        embedding=embeddings,
+        table_name=table_name,
+        session=None,  # Uses cassio session
+        keyspace=None,  # Uses default keyspace
+    )
+
+
+def _as_retriever(vectorstore):
+    return vectorstore.as_retriever(
+        search_type="similarity",
+        search_kwargs={"k": retrieval_cache.RETRIEVAL_TOP_K}
+    )
+
+
+def get_resume_retriever(session_id: str):
     """
-    Send a message and get a response with conversation history.
+    Get the resume retriever for a session, rebuilding it from the shared
+    session backend if the resume was uploaded through another worker.
     
-    Args:
-        user_message: The user's message
-        session_id: Session ID to track conversation history
-        use_resume: Whether to use resume context for answers
+    Returns:
+        Retriever or None if no resume was uploaded for this session
+    """
+    spec = _resume_specs.get(session_id)
+    if spec is None:
+        return None
+    cached = _resume_retrievers.get(session_id)
+    if cached is not None and cached[0] == spec["version"]:
+        return cached[1]
+    embeddings = embedding_engine.get_embeddings()
+    if spec["backend"] == "local":
+        if not spec["path"]:
+            metrics.log(f"Resume for session '{session_id}' is indexed in another worker; "
+                        "set LOCAL_INDEX_DIR to share it", "WARN")
+            return None
+        metrics.log(f"Loading resume index for session '{session_id}' from '{spec['path']}'")
+        import vector_index
+        vectorstore = vector_index.LocalVectorStore.load(spec["path"], embeddings)
+    else:
+        metrics.log(f"Rebuilding resume retriever for session '{session_id}' from table '{spec['table_name']}'")
+        import cassio
+        cassio.init(token=os.getenv("ASTRA_DB_APPLICATION_TOKEN"), database_id=os.getenv("ASTRA_DB_ID"))
+        vectorstore = _astra_vectorstore(spec["table_name"], embeddings)
+    retriever = _as_retriever(vectorstore)
+    _resume_retrievers.set(session_id, (spec["version"], retriever))
+    return retriever
+
+
+def retrieve_resume_docs(session_id: str, query: str):
+    """
+    Resume chunks relevant to a query, served from the session's retrieval
+    cache when possible (see retrieval_cache).
     
     Returns:
-        AI response string
+        list: Documents, empty if no resume was uploaded for this session
+    """
+    spec = _resume_specs.get(session_id)
+    if spec is None:
+        return []
+    small_resume = None
+    if "chunks" in spec:
+        from langchain_core.documents import Document
+        small_resume = [Document(page_content=c["text"], metadata=c["metadata"]) for c in spec["chunks"]]
+    cache = _retrieval_caches.get(session_id)
+    if cache is None or cache.version != spec["version"]:
+        cache = _retrieval_caches.set(session_id, retrieval_cache.SessionRetrievalCache(spec["version"]))
+    
+    def search(vector):
+        # The query is being embedded while the retriever is looked up (or rebuilt)
+        retriever = get_resume_retriever(session_id)
+        if retriever is None:
+            return []
+        return retriever.vectorstore.similarity_search_by_vector(vector.result(), k=retrieval_cache.RETRIEVAL_TOP_K)
+    
+    return retrieval_cache.retrieve(cache, query, search, embedding_engine.get_embeddings, small_resume)
+
+
+def _prepare_turn(user_message: str, session_id: str, use_resume: bool):
+    """
+    Build the prompt for one chat turn without touching stored history.
+    
+    Returns:
+        tuple: (history, pending, all_messages) where pending describes the
+        turn to record once the AI reply is complete (see _commit_turn)
     """
     # Get chat history for this session
     history = get_chat_history(session_id)
     
     # Build context from resume if requested and available
     resume_context = ""
-    if use_resume and session_id in _resume_retrievers:
+    chunk_ids = []
+    if use_resume:
         try:
-            retriever = _resume_retrievers[session_id]
-            docs = retriever.get_relevant_documents(user_message)
-            resume_context = "\n\nResume Context:\n" + "\n".join([doc.page_content for doc in docs])
+            with metrics.span("retrieve"):
+                docs = retrieve_resume_docs(session_id, user_message)
+            if docs:
+                resume_context = context_window.RESUME_CONTEXT_MARKER + "\n".join([doc.page_content for doc in docs])
+                chunk_ids = [turn_history.chunk_id(doc.page_content) for doc in docs]
         except Exception as e:
-            print(f"Error retrieving resume context: {e}")
+            metrics.log(f"Error retrieving resume context: {e}", "WARN")
+    
+    # Messages for this turn are only written to history once the reply is complete
+    new_messages = []
+    system_content = None
     
     # Add system message if this is a new conversation
-    if len(history.messages) == 0:
+    if len(history) == 0:
         system_content = """You are an experienced interviewer conducting a realistic interview. 
                             Your goal is to engage in a natural, human-like conversation — not rigid question-answering. 
                             Act as a professional interviewer who asks follow-up questions, comments on responses, and adapts naturally like a real person would. 
@@ -278,38 +423,179 @@ def chat_with_history(user_message: str, session_id: str = "default", use_resume
                             """
         if use_resume:
             system_content += " Use the candidate's resume information when it's provided to ask relevant, personalized questions."
-        system_msg = SystemMessage(content=system_content)
-        history.add_message(system_msg)
-    
-    # Add user message with resume context if available
-    user_msg_content = user_message
-    if resume_context:
-        user_msg_content += resume_context
-    
-    history.add_user_message(user_msg_content)
-    
-    # Get all messages for context
-    all_messages = history.messages
-    
-    # Use HuggingFace endpoint - token already set in environment by /set_api
-    llm = HuggingFaceEndpoint(
-        repo_id="openai/gpt-oss-120b",
-        task="conversational",
-        max_new_tokens=512,
-        do_sample=False,
-        repetition_penalty=1.03,
-        provider="auto",
-    )
-    chat_model = ChatHuggingFace(llm=llm)
-    response = chat_model.invoke(all_messages)
-    ai_response = response.content
+        new_messages.append(SystemMessage(content=system_content))
     
-    # Add AI response to history
-    history.add_ai_message(ai_response)
+    # Resume context goes into this prompt only; history keeps the chunk ids
+    new_messages.append(HumanMessage(content=user_message + resume_context))
+    pending = {"user": user_message, "chunk_ids": chunk_ids, "context_chars": len(resume_context),
+               "system": system_content}
+    
+    # Fit system prompt + recent turns into the token budget (older turns are summarized)
+    with metrics.span("history"):
+        if len(history) == 0:
+            window = _context_windows.set(session_id, context_window.ContextWindow())
+        else:
+            window = _context_windows.get_or_create(session_id, context_window.ContextWindow)
+        all_messages = window.build(history.messages + new_messages)
+        _context_windows.set(session_id, window)  # write back summary state (shared backends)
+    return history, pending, all_messages
+
+
+def _commit_turn(session_id: str, history, pending, ai_response: str):
+    """Persist a completed turn as a compact record (user text, reply, resume chunk ids)."""
+    with metrics.span("history"):
+        history.add_turn(pending["user"], ai_response, pending["chunk_ids"], pending["context_chars"],
+                         pending["system"])
+        _chat_sessions.set(session_id, history)  # write back for shared session backends
+
+
+def _response_cache_key(all_messages, api_token: str = None):
+    """
+    Response cache key for a prompt and the caller's token, or None when the
+    cache is off or the prompt carries injected resume context (those replies
+    are never shared).
+    """
+    if not response_cache.RESPONSE_CACHE_ENABLED:
+        return None
+    if any(context_window.RESUME_CONTEXT_MARKER in message.content for message in all_messages):
+        response_cache.bypass()
+        return None
+    config = dict(llm_client.DEFAULT_LLM_CONFIG, endpoint_url=os.getenv("LLM_ENDPOINT_URL"),
+                  token=response_cache.token_fingerprint(api_token or os.getenv("HUGGINGFACEHUB_API_TOKEN")))
+    return response_cache.cache_key(all_messages, config)
+
+
+def chat_with_history(user_message: str, session_id: str = "default", use_resume: bool = False,
+                      api_token: str = None):
+    """
+    Send a message and get a response with conversation history.
+    
+    Args:
+        user_message: The user's message
+        session_id: Session ID to track conversation history
+        use_resume: Whether to use resume context for answers
+        api_token: HuggingFace token for the LLM call (defaults to the environment)
+    
+    Returns:
+        AI response string
+    """
+    history, pending, all_messages = _prepare_turn(user_message, session_id, use_resume)
+    
+    # Opening turns and retried identical prompts are answered from the response cache
+    cache_key = _response_cache_key(all_messages, api_token)
+    ai_response = response_cache.get(cache_key) if cache_key else None
+    if ai_response is None:
+        # Cached HuggingFace client - token already set in environment by /set_api
+        chat_model = llm_client.get_chat_model(api_token)
+        with metrics.span("llm_invoke"):
+            response = chat_model.invoke(all_messages)
+        ai_response = response.content
+        if cache_key:
+            response_cache.put(cache_key, ai_response)
+    
+    # Add turn to history
+    _commit_turn(session_id, history, pending, ai_response)
     
     return ai_response
 
 
+def stream_chat_with_history(user_message: str, session_id: str = "default", use_resume: bool = False,
+                             api_token: str = None):
+    """
+    Same as chat_with_history, but yields the AI response token by token.
+    The turn is added to history only after the stream completes, so an
+    aborted stream leaves the conversation unchanged.
+    
+    Args:
+        user_message: The user's message
+        session_id: Session ID to track conversation history
+        use_resume: Whether to use resume context for answers
+        api_token: HuggingFace token for the LLM call (defaults to the environment)
+    
+    Yields:
+        str: Pieces of the AI response as they are generated
+    """
+    history, pending, all_messages = _prepare_turn(user_message, session_id, use_resume)
+    
+    cache_key = _response_cache_key(all_messages, api_token)
+    cached = response_cache.get(cache_key) if cache_key else None
+    if cached is not None:
+        yield cached
+        _commit_turn(session_id, history, pending, cached)
+        return
+    
+    chat_model = llm_client.get_chat_model(api_token)
+    parts = []
+    with metrics.span("llm_stream"):
+        for chunk in chat_model.stream(all_messages):
+            if chunk.content:
+                parts.append(chunk.content)
+                yield chunk.content
+    
+    ai_response = "".join(parts)
+    if cache_key:
+        response_cache.put(cache_key, ai_response)
+    _commit_turn(session_id, history, pending, ai_response)
+
+
+async def achat_with_history(user_message: str, session_id: str = "default", use_resume: bool = False,
+                             api_token: str = None):
+    """
+    Async variant of chat_with_history for the ASGI app. Retrieval (embedding)
+    and session store I/O run in the default executor; the LLM call is awaited
+    on the async HTTP client, so no thread is held while waiting for it.
+    
+    Returns:
+        AI response string
+    """
+    history, pending, all_messages = await asyncio.to_thread(_prepare_turn, user_message, session_id, use_resume)
+    
+    cache_key = _response_cache_key(all_messages, api_token)
+    # Lookups may hit a sqlite/redis backend, so they run off the event loop too
+    ai_response = await asyncio.to_thread(response_cache.get, cache_key) if cache_key else None
+    if ai_response is None:
+        chat_model = llm_client.get_chat_model(api_token)
+        with metrics.span("llm_invoke"):
+            response = await chat_model.ainvoke(all_messages)
+        ai_response = response.content
+        if cache_key:
+            await asyncio.to_thread(response_cache.put, cache_key, ai_response)
+    
+    await asyncio.to_thread(_commit_turn, session_id, history, pending, ai_response)
+    return ai_response
+
+
+async def astream_chat_with_history(user_message: str, session_id: str = "default", use_resume: bool = False,
+                                    api_token: str = None):
+    """
+    Async variant of stream_chat_with_history (see achat_with_history).
+    
+    Yields:
+        str: Pieces of the AI response as they are generated
+    """
+    history, pending, all_messages = await asyncio.to_thread(_prepare_turn, user_message, session_id, use_resume)
+    
+    cache_key = _response_cache_key(all_messages, api_token)
+    cached = await asyncio.to_thread(response_cache.get, cache_key) if cache_key else None
+    if cached is not None:
+        yield cached
+        await asyncio.to_thread(_commit_turn, session_id, history, pending, cached)
+        return
+    
+    chat_model = llm_client.get_chat_model(api_token)
+    parts = []
+    with metrics.span("llm_stream"):
+        async for chunk in chat_model.astream(all_messages):
+            if chunk.content:
+                parts.append(chunk.content)
+                yield chunk.content
+    
+    ai_response = "".join(parts)
+    if cache_key:
+        await asyncio.to_thread(response_cache.put, cache_key, ai_response)
+    await asyncio.to_thread(_commit_turn, session_id, history, pending, ai_response)
+
+
 def run_interview_assistant():
     """Run the voice-based interview assistant with history."""
     # Don't load from .env - API key should be set via environment
@@ -326,18 +612,30 @@ def run_interview_assistant():
     
     print("Interview assistant started. Say 'thank you' to exit.")
     
-    while True:
-        try:
-            user_input = speech_creator.get_transcribed_text()
-            print(f"You: {user_input}")
-        except Exception as e:
-            print("Sorry, I could not understand your speech. Please try again.")
-            continue
-        
-        if user_input.strip().lower() == exit_phrase:
-            print("Interview session ended.")
-            break
-        
-        # Use history-aware chat
-        response = chat_with_history(user_input, session_id)
-        print(f"AI: {response}")
\ No newline at end of file
+    import speech_creator  # needs pyaudio, only used by the CLI
+    
+    # Capture runs continuously; each answer ends when the candidate pauses and is
+    # transcribed in the background while the microphone keeps listening
+    listener = speech_creator.UtteranceListener().start()
+    try:
+        while True:
+            try:
+                user_input, latency = listener.next_transcript()
+                print(f"You: {user_input}")
+                print(f"[INFO] Transcript ready {latency:.2f}s after you stopped speaking")
+            except speech_creator.CaptureError as e:
+                print(f"⚠️ {e}")
+                break
+            except Exception as e:
+                print("Sorry, I could not understand your speech. Please try again.")
+                continue
+            
+            if user_input.strip().lower() == exit_phrase:
+                print("Interview session ended.")
+                break
+            
+            # Use history-aware chat
+            response = chat_with_history(user_input, session_id)
+            print(f"AI: {response}")
+    finally:
+        listener.stop()
\ No newline at end of file
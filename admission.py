@@ -0,0 +1,261 @@
+"""
+Admission control
+Bounds the expensive endpoints so a burst of one kind of request can't starve
+the others:
+  - per-endpoint concurrency limits, with a bounded queue of waiters that give
+    up after a maximum wait (503 + Retry-After when the queue is full or the
+    wait times out); a /speech_stream socket holds a speech slot until it
+    closes and is closed with 1013 when rejected,
+  - per-browser token-bucket rate limits (429 + Retry-After),
+  - priority for interactive /chat over bulk uploads: new uploads are turned
+    away while chat requests are queued, and embedding work from chat turns
+    is batched ahead of ingestion (see embedding_engine).
+Limits are per worker process; queue depths and rejection counts are exposed
+on /admission_stats and /metrics.
+"""
+import math
+import os
+import threading
+import time
+from collections import deque
+
+import metrics
+import session_store
+
+
+# WebSocket close code for a connection turned away by admission control
+# ("Try Again Later"); the rejection is also sent as an error event first
+WS_CLOSE_TRY_AGAIN_LATER = 1013
+
+
+def _limit_env(endpoint: str, setting: str, default: str) -> str:
+    return os.getenv(f"ADMISSION_{endpoint.upper()}_{setting}", default)
+
+
+class Rejected(Exception):
+    """
+    Raised when a request is not admitted.
+
+    Args:
+        status: HTTP status to return (429 rate limited, 503 overloaded)
+        retry_after: Seconds the client should wait before retrying
+        reason: Short machine-readable reason (queue_full, timeout, yield, rate_limited)
+    """
+
+    def __init__(self, message: str, status: int, retry_after: int, reason: str):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = max(1, int(math.ceil(retry_after)))
+        self.reason = reason
+
+
+class ConcurrencyLimiter:
+    """
+    At most max_concurrent requests run; up to max_queue more wait (FIFO) for
+    at most max_wait seconds; anything beyond that is rejected immediately.
+
+    Args:
+        name: Endpoint name (for messages and stats)
+        max_concurrent: Requests running at once
+        max_queue: Requests allowed to wait for a slot
+        max_wait: Seconds a queued request waits before it is rejected
+        yields_to: Limiters whose queued requests take precedence; while any
+                   of them has waiters, new requests here are rejected
+    """
+
+    def __init__(self, name: str, max_concurrent: int, max_queue: int, max_wait: float, yields_to=()):
+        self.name = name
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queue = max(0, max_queue)
+        self.max_wait = max_wait
+        self.yields_to = list(yields_to)
+        self.active = 0
+        self.stats = {"admitted": 0, "queued": 0, "rejected_queue_full": 0, "rejected_timeout": 0,
+                      "rejected_yield": 0, "wait_seconds_total": 0.0}
+        self._condition = threading.Condition()
+        self._waiters = deque()  # FIFO of queued requests; the head takes the next free slot
+
+    def _retry_after(self) -> float:
+        # Rough drain time: a few seconds per queued round of requests
+        return max(1.0, self.max_wait / 2)
+
+    def _reject(self, reason: str, message: str):
+        self.stats[f"rejected_{reason}"] += 1
+        metrics.inc("admission_rejections_total", endpoint=self.name, reason=reason)
+        raise Rejected(message, 503, self._retry_after(), reason)
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def acquire(self):
+        """
+        Take a slot, waiting in the queue if needed.
+
+        Raises:
+            Rejected: Queue full, waited too long, or yielding to higher-priority work
+        """
+        with self._condition:
+            if any(other.queued for other in self.yields_to):
+                self._reject("yield", f"Server is busy with interactive requests, retry {self.name} shortly")
+            if self.active < self.max_concurrent and not self._waiters:
+                self.active += 1
+                self.stats["admitted"] += 1
+                return
+            if len(self._waiters) >= self.max_queue:
+                self._reject("queue_full", f"Too many {self.name} requests in progress, retry shortly")
+            waiter = object()
+            self._waiters.append(waiter)
+            self.stats["queued"] += 1
+            start = time.monotonic()
+            deadline = start + self.max_wait
+            try:
+                while not (self._waiters[0] is waiter and self.active < self.max_concurrent):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._reject("timeout", f"Timed out waiting for a {self.name} slot, retry shortly")
+                    self._condition.wait(remaining)
+                self.active += 1
+                self.stats["admitted"] += 1
+                self.stats["wait_seconds_total"] += time.monotonic() - start
+            finally:
+                self._waiters.remove(waiter)
+                self._condition.notify_all()  # the new head may fit in a free slot too
+
+    def release(self):
+        with self._condition:
+            self.active -= 1
+            self._condition.notify_all()
+
+    def snapshot(self) -> dict:
+        with self._condition:
+            return dict(self.stats, active=self.active, queue_depth=self.queued,
+                        max_concurrent=self.max_concurrent, max_queue=self.max_queue)
+
+
+class RateLimiter:
+    """
+    Token bucket per client key (browser id from the session cookie, or the
+    client address without one): `per_minute` sustained with bursts of `burst`.
+    """
+
+    def __init__(self, name: str, per_minute: float, burst: int):
+        self.name = name
+        self.rate = per_minute / 60.0
+        self.burst = max(1, burst)
+        self.rejected = 0
+        # Idle buckets are full again after burst / rate seconds; drop them then
+        idle_ttl = self.burst / self.rate if self.rate > 0 else 3600
+        self._buckets = session_store.SessionStore(f"rate_{name}", max_entries=10000, idle_ttl=idle_ttl)
+        self._lock = threading.Lock()
+
+    def check(self, key: str):
+        """
+        Spend one token for key.
+
+        Raises:
+            Rejected: 429 when the bucket is empty
+        """
+        if self.rate <= 0:
+            return
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key) or (float(self.burst), now)
+            tokens = min(self.burst, tokens + (now - updated) * self.rate)
+            if tokens < 1:
+                self._buckets.set(key, (tokens, now))
+                self.rejected += 1
+                wait = (1 - tokens) / self.rate
+            else:
+                self._buckets.set(key, (tokens - 1, now))
+                return
+        metrics.inc("admission_rejections_total", endpoint=self.name, reason="rate_limited")
+        raise Rejected(f"Too many {self.name} requests from this client, slow down", 429, wait, "rate_limited")
+
+
+def _limiter(endpoint: str, concurrent: str, queue: str, wait: str, yields_to=()):
+    return ConcurrencyLimiter(
+        endpoint,
+        int(_limit_env(endpoint, "CONCURRENCY", concurrent)),
+        int(_limit_env(endpoint, "QUEUE", queue)),
+        float(_limit_env(endpoint, "MAX_WAIT_SECONDS", wait)),
+        yields_to,
+    )
+
+
+def _rate(endpoint: str, per_minute: str, burst: str):
+    return RateLimiter(endpoint, float(_limit_env(endpoint, "PER_MINUTE", per_minute)),
+                       int(_limit_env(endpoint, "BURST", burst)))
+
+
+# ADMISSION_<ENDPOINT>_CONCURRENCY / _QUEUE / _MAX_WAIT_SECONDS / _PER_MINUTE / _BURST
+# override these defaults (PER_MINUTE=0 disables the rate limit)
+_chat = _limiter("chat", "16", "32", "10")
+LIMITERS = {
+    "chat": _chat,
+    "speech": _limiter("speech", "4", "8", "10"),
+    # Uploads only read the PDF and queue a job (see ingestion), but yield to queued chat
+    "upload_resume": _limiter("upload_resume", "2", "4", "5", yields_to=[_chat]),
+}
+RATE_LIMITS = {
+    "chat": _rate("chat", "30", "10"),
+    "speech": _rate("speech", "30", "10"),
+    "upload_resume": _rate("upload_resume", "6", "3"),
+}
+
+for _name, _limit in LIMITERS.items():
+    metrics.register_gauge(f"admission_{_name}_queue_depth", f"{_name} requests waiting for a slot",
+                           lambda limit=_limit: limit.queued)
+    metrics.register_gauge(f"admission_{_name}_active", f"{_name} requests running",
+                           lambda limit=_limit: limit.active)
+
+
+class Ticket:
+    """An admitted request's slot; release() (or leaving the with-block) frees it once."""
+
+    def __init__(self, limiter: ConcurrencyLimiter):
+        self._limiter = limiter
+        self._released = False
+        self._lock = threading.Lock()
+
+    def release(self):
+        with self._lock:
+            if self._released:
+                return
+            self._released = True
+        self._limiter.release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+def admit(endpoint: str, client_key: str) -> Ticket:
+    """
+    Admit one request: per-client rate limit first, then a concurrency slot.
+
+    Args:
+        endpoint: Key of LIMITERS
+        client_key: Browser id (or client address) for the rate limit
+
+    Returns:
+        Ticket: Release it when the request (including a streamed body) is done
+
+    Raises:
+        Rejected: With the HTTP status and Retry-After to send
+    """
+    RATE_LIMITS[endpoint].check(client_key)
+    limiter = LIMITERS[endpoint]
+    limiter.acquire()
+    return Ticket(limiter)
+
+
+def get_stats():
+    """Per-endpoint active/queued counts and rejections for this process."""
+    stats = {}
+    for name, limiter in LIMITERS.items():
+        stats[name] = limiter.snapshot()
+        stats[name]["rejected_rate_limited"] = RATE_LIMITS[name].rejected
+    return stats
@@ -3,60 +3,232 @@ Main Flask Application
 Handles web interface for AI Interview Assistant with resume upload
 """
 ##
-from flask import Flask, render_template, request, jsonify, session
+import time
+_startup_started = time.perf_counter()
+
+from flask import Flask, render_template, request, jsonify, session, Response, stream_with_context, g
 from flask_cors import CORS
+from werkzeug.middleware.proxy_fix import ProxyFix
 from werkzeug.utils import secure_filename
 import os
+import functools
 import io
+import json
+import threading
+import uuid
 
 # Import custom modules
+import admission
 import AI_model
+import embedding_engine
+import ingestion
+import maintenance
+import metrics
 import transcribe
-import speech_creator
+import voice_stream
+
+try:
+    from flask_sock import Sock, ConnectionClosed
+except ImportError:  # streaming voice is optional; the client falls back to /speech
+    Sock = None
 
 # Initialize Flask app
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
-app.secret_key = os.urandom(24)
+# Session cookies must verify on every worker: SECRET_KEY, else a key shared
+# through the session backend (SESSION_BACKEND=sqlite/redis), else per process
+app.secret_key = os.getenv("SECRET_KEY") or AI_model.shared_secret_key()
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max
+# Proxies in front of the app (1 on Hugging Face Spaces); remote_addr is then
+# the client from X-Forwarded-For. Set 0 when clients connect directly.
+TRUSTED_PROXY_HOPS = int(os.getenv("TRUSTED_PROXY_HOPS", "1"))
+if TRUSTED_PROXY_HOPS > 0:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=TRUSTED_PROXY_HOPS)
+sock = Sock(app) if Sock else None
 
 # No local file storage - everything goes to Astra DB!
 
-# Auto-cleanup: Drop all old resume tables on server startup
+# FAST_START=1: accept traffic immediately and load models on a background thread
+FAST_START = os.getenv("FAST_START", "0") == "1"
+STARTUP_BUDGET_SECONDS = float(os.getenv("STARTUP_BUDGET_SECONDS", "3.0"))
+
 print("\n" + "="*60)
 print("[STARTUP] InterviewIQ - Initializing...")
 print("="*60)
+
+# Old resume tables are dropped once per deployment by a background maintenance
+# process (or `python maintenance.py cleanup-tables` with STARTUP_TABLE_CLEANUP=off)
 try:
-    tables_dropped = AI_model.cleanup_all_resume_tables()
-    if tables_dropped > 0:
-        print(f"[STARTUP] ✅ Cleaned up {tables_dropped} old resume table(s)")
-    else:
-        print("[STARTUP] ✅ No old tables to clean up")
+    if maintenance.schedule_startup_cleanup():
+        print("[STARTUP] ✅ Old resume table cleanup started in the background")
 except Exception as e:
     print(f"[STARTUP] ⚠️ Cleanup skipped: {e}")
-print("[STARTUP] Server ready!")
+
+if os.getenv("SESSION_BACKEND", "memory") == "memory" and int(os.getenv("GUNICORN_WORKERS", "1")) > 1:
+    print("[STARTUP] ⚠️ SESSION_BACKEND=memory with several workers: chats and API keys stay in the worker "
+          "that received them; use sqlite or redis")
+
+# Load the shared embeddings model once per process (or once in the gunicorn
+# master when preloading, so forked workers share the weights copy-on-write)
+if os.getenv("EMBEDDINGS_WARMUP", "1") == "1":
+    if os.getenv("EMBEDDINGS_PRELOAD_ONLY") == "1":
+        # Warm-up encode happens per worker in gunicorn's post_fork hook
+        embedding_engine.get_embeddings()
+        print("[STARTUP] ✅ Embeddings model preloaded")
+    elif FAST_START:
+        # First uploads wait on the engine's load lock if they arrive before this finishes
+        threading.Thread(target=embedding_engine.warm_up, name="embeddings-warmup", daemon=True).start()
+        print("[STARTUP] ✅ Embeddings model loading in the background")
+    elif embedding_engine.warm_up():
+        print("[STARTUP] ✅ Embeddings model warmed up")
+
+# Local speech-to-text models load once per worker (after the fork when preloading)
+if transcribe.STT_BACKEND != "google" and os.getenv("EMBEDDINGS_PRELOAD_ONLY") != "1":
+    if FAST_START:
+        threading.Thread(target=transcribe.get_backend, name="stt-load", daemon=True).start()
+        print(f"[STARTUP] ✅ Speech-to-text backend '{transcribe.STT_BACKEND}' loading in the background")
+    else:
+        try:
+            transcribe.get_backend()
+            print(f"[STARTUP] ✅ Speech-to-text backend '{transcribe.STT_BACKEND}' loaded")
+        except Exception as e:
+            print(f"[STARTUP] ⚠️ Speech-to-text backend not loaded: {e}")
+startup_seconds = time.perf_counter() - _startup_started
+if startup_seconds > STARTUP_BUDGET_SECONDS:
+    print(f"[STARTUP] ⚠️ Startup took {startup_seconds:.2f}s (budget {STARTUP_BUDGET_SECONDS:.1f}s)")
+print(f"[STARTUP] Server ready in {startup_seconds:.2f}s!")
 print("="*60 + "\n")
 
 
+# Requests not logged/recorded by the trace hooks
+UNTRACED_ENDPOINTS = {'static', 'metrics_endpoint'}
+
+
+@app.before_request
+def start_request_trace():
+    """Give every request a trace id (client-supplied X-Request-ID if valid)"""
+    g.request_started = time.perf_counter()
+    metrics.start_trace(request.headers.get('X-Request-ID'))
+
+
+@app.after_request
+def finish_request_trace(response):
+    """Record request latency and log the per-stage breakdown"""
+    trace_id = metrics.current_trace_id()
+    if trace_id:
+        response.headers['X-Trace-Id'] = trace_id
+    if request.endpoint not in UNTRACED_ENDPOINTS and 'request_started' in g:
+        # Route pattern, not the raw path, keeps /upload_status/<job_id> one series
+        endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+        metrics.observe_request(request.method, endpoint, response.status_code,
+                                time.perf_counter() - g.request_started)
+    return response
+
+
+@app.teardown_request
+def end_request_trace(exc):
+    metrics.end_trace()
+
+
+def _client_key():
+    """
+    Rate-limit key: the browser's id from the signed session cookie (set when
+    the page loads), else the client address. Not the request's session_id,
+    which the page always sends as 'default'.
+    """
+    client_id = session.get('client_id')
+    return f"client:{client_id}" if client_id else f"addr:{request.remote_addr}"
+
+
+def admitted(endpoint):
+    """
+    Admission control for an expensive route (see admission.py).
+    Rejected requests get 429/503 with Retry-After; a streamed response keeps
+    its slot until the stream is closed.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            try:
+                ticket = admission.admit(endpoint, _client_key())
+            except admission.Rejected as e:
+                metrics.log(f"{request.path} rejected ({e.reason}), retry after {e.retry_after}s", "WARN")
+                response = jsonify({'status': 'error', 'error': str(e)})
+                return response, e.status, {'Retry-After': str(e.retry_after)}
+            try:
+                response = app.make_response(view(*args, **kwargs))
+            except BaseException:
+                ticket.release()
+                raise
+            if response.is_streamed:
+                response.call_on_close(ticket.release)
+            else:
+                ticket.release()
+            return response
+        return wrapper
+    return decorator
+
+
+def admitted_socket(endpoint):
+    """
+    Admission control for a WebSocket route: the connection holds its slot
+    until it closes. A rejected connection gets an error event and is closed
+    with 1013 (try again later).
+    """
+    def decorator(handler):
+        @functools.wraps(handler)
+        def wrapper(ws, *args, **kwargs):
+            try:
+                ticket = admission.admit(endpoint, _client_key())
+            except admission.Rejected as e:
+                metrics.log(f"{request.path} rejected ({e.reason}), retry after {e.retry_after}s", "WARN")
+                ws.send(json.dumps({'type': 'error', 'error': str(e), 'retry_after': e.retry_after}))
+                ws.close(reason=admission.WS_CLOSE_TRY_AGAIN_LATER, message=e.reason)
+                return
+            try:
+                handler(ws, *args, **kwargs)
+            finally:
+                ticket.release()
+        return wrapper
+    return decorator
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """Stage latency histograms and counters in Prometheus text format"""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+
 @app.route('/')
 def home():
     """Render main chat interface"""
+    _client_id()
     return render_template('chat.html')
 
 
+def _client_id():
+    """Per-browser id kept in the signed session cookie"""
+    if 'client_id' not in session:
+        session['client_id'] = uuid.uuid4().hex
+        session.permanent = False
+    return session['client_id']
+
+
+def _api_token():
+    """HuggingFace token set by this browser (on any worker), else from the environment"""
+    return AI_model.get_api_token(session.get('client_id'))
+
+
 @app.route('/set_api', methods=['POST'])
 def set_api():
-    """Store API key in session"""
+    """Store API key for this browser in the shared session backend"""
     data = request.get_json()
     api_key = data.get('api_key', '')
     
     if not api_key:
         return jsonify({'error': 'API key is required'}), 400
     
-    
-    session['api_key'] = api_key
-    session.permanent = False
-    os.environ['HUGGINGFACEHUB_API_TOKEN'] = api_key
+    AI_model.set_api_token(_client_id(), api_key)
     
     return jsonify({'status': 'success', 'message': 'API key saved successfully'})
 
@@ -75,10 +247,11 @@ def clear_chat():
 
 
 @app.route('/upload_resume', methods=['POST'])
+@admitted('upload_resume')
 def upload_resume():
     """Handle resume PDF upload and process with RAG - NO LOCAL STORAGE"""
     try:
-        print("[INFO] Upload resume request received")
+        metrics.log("Upload resume request received")
         
         if 'resume' not in request.files:
             return jsonify({'status': 'error', 'error': 'No file uploaded'}), 400
@@ -95,34 +268,77 @@ def upload_resume():
         session_id = request.form.get('session_id', 'default')
         
         # Read PDF content directly into memory (NO FILE SAVING)
-        print(f"[INFO] Reading PDF content directly from upload...")
+        metrics.log("Reading PDF content directly from upload...")
         pdf_bytes = io.BytesIO(file.read())
         
         # Store filename in session for reference
         session['resume_filename'] = filename
         
-        # Process with RAG directly from memory
-        print(f"[INFO] Processing resume with RAG (Astra DB only)...")
-        success = AI_model.setup_resume_rag_from_bytes(pdf_bytes, filename, session_id)
+        # Process with RAG in the background; chat continues without resume context until done
+        metrics.log("Queueing resume ingestion job...")
+        try:
+            job_id = ingestion.resume_jobs.submit(AI_model.setup_resume_rag_from_bytes, pdf_bytes, filename, session_id,
+                                                  api_token=_api_token())
+        except ingestion.QueueFullError as e:
+            response = jsonify({'status': 'error', 'error': f'{e}, please retry shortly'})
+            return response, 503, {'Retry-After': '5'}
         
-        if not success:
-            return jsonify({'status': 'error', 'error': 'Failed to process resume'}), 500
-        
-        print(f"[INFO] Resume processed successfully and stored in Astra DB")
+        metrics.log(f"Resume ingestion job {job_id} queued")
         return jsonify({
-            'status': 'success',
-            'message': f'Resume "{filename}" uploaded successfully',
-            'filename': filename
-        })
+            'status': 'queued',
+            'message': f'Resume "{filename}" uploaded, processing...',
+            'filename': filename,
+            'job_id': job_id
+        }), 202
         
     except Exception as e:
-        print(f"[ERROR] Upload failed: {e}")
+        metrics.log(f"Upload failed: {e}", "ERROR")
         import traceback
         traceback.print_exc()
         return jsonify({'status': 'error', 'error': str(e)}), 500
 
 
+@app.route('/embedding_stats', methods=['GET'])
+def embedding_stats():
+    """Report embeddings model load time vs. per-upload encode time"""
+    stats = embedding_engine.get_stats()
+    stats['resume_cache'] = AI_model.resume_cache.get_stats()
+    return jsonify(stats)
+
+
+@app.route('/session_stats', methods=['GET'])
+def session_stats():
+    """Report session store sizes, evictions and per-session memory"""
+    stats = AI_model.get_session_stats()
+    stats['context_windows'] = AI_model.get_context_stats()
+    stats['chat_histories'] = AI_model.get_history_stats()
+    return jsonify(stats)
+
+
+@app.route('/speech_stats', methods=['GET'])
+def speech_stats():
+    """Report audio preprocessing totals (bytes and seconds removed before recognition)"""
+    return jsonify(transcribe.get_stats())
+
+
+@app.route('/admission_stats', methods=['GET'])
+def admission_stats():
+    """Report per-endpoint concurrency, queue depth and rejections"""
+    return jsonify(admission.get_stats())
+
+
+@app.route('/upload_status/<job_id>', methods=['GET'])
+def upload_status(job_id):
+    """Report stage progress and timings of a resume ingestion job"""
+    job = ingestion.resume_jobs.status(job_id)
+    if job is None:
+        return jsonify({'status': 'error', 'error': 'Unknown job id'}), 404
+    job['queue_depth'] = ingestion.resume_jobs.depth()
+    return jsonify(job)
+
+
 @app.route('/speech', methods=['POST'])
+@admitted('speech')
 def speech():
     """Handle audio transcription only (returns text to input field)"""
     if 'audio' not in request.files:
@@ -130,19 +346,77 @@ def speech():
     
     try:
         audio_file = request.files['audio']
-        audio_buffer = io.BytesIO(audio_file.read())
+        # Raw bytes: the preprocessor reads the PCM in place instead of copying it into a BytesIO
+        audio_bytes = audio_file.read()
         
         # Transcribe audio only - no AI response
-        text = transcribe.transcribe_audio(audio_buffer)
+        text = transcribe.transcribe_audio(audio_bytes)
         
         # Return transcribed text for user to review/edit before sending
         return jsonify({'result': text})
         
+    except transcribe.EmptyAudioError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
+def speech_stream(ws):
+    """
+    Streaming transcription over a WebSocket.
+    Client sends {"type": "start", "sample_rate": N}, then binary 16-bit mono
+    PCM frames while recording, then {"type": "stop"}. The server pushes
+    {"type": "partial"} after each detected utterance and one {"type": "final"}.
+    """
+    send_lock = threading.Lock()
+
+    def send(event):
+        # Partials are sent from the transcription thread
+        with send_lock:
+            ws.send(json.dumps(event))
+
+    stream = None
+    try:
+        while True:
+            message = ws.receive()
+            if isinstance(message, (bytes, bytearray)):
+                if stream is None:
+                    send({'type': 'error', 'error': 'Send a start message first'})
+                    return
+                stream.feed(message)
+                continue
+            data = json.loads(message)
+            if data.get('type') == 'start':
+                try:
+                    sample_rate = voice_stream.parse_sample_rate(data.get('sample_rate', 16000))
+                except ValueError as e:
+                    send({'type': 'error', 'error': str(e)})
+                    return
+                stream = voice_stream.VoiceStream(send, sample_rate)
+            elif data.get('type') == 'stop' and stream is not None:
+                stream.finish()
+                metrics.log(f"Streamed transcription: {stream.stats['utterances']} utterance(s), "
+                            f"{stream.stats['audio_seconds']:.1f}s speech")
+                stream = None
+                return
+    except ConnectionClosed:
+        pass
+    except Exception as e:
+        try:
+            send({'type': 'error', 'error': str(e)})
+        except ConnectionClosed:
+            pass
+    finally:
+        if stream is not None:
+            stream.close()
+
+
+if sock:
+    sock.route('/speech_stream')(admitted_socket('speech')(speech_stream))
+
+
 @app.route('/chat', methods=['POST'])
+@admitted('chat')
 def chat():
     """Handle text chat messages"""
     data = request.get_json()
@@ -154,12 +428,13 @@ def chat():
         return jsonify({'error': 'No message provided'}), 400
     
     try:
-        # Check if HuggingFace API key is set (either from session or environment)
-        if 'api_key' not in session and not os.getenv('HUGGINGFACEHUB_API_TOKEN'):
+        # Check if HuggingFace API key is set (either for this browser or in the environment)
+        api_token = _api_token()
+        if not api_token:
             return jsonify({'error': 'Please set your HuggingFace API key first'}), 400
         
-        # Get AI response
-        ai_response = AI_model.chat_with_history(user_message, session_id, use_resume)
+        # Get AI response (latency by stage is logged by the request trace)
+        ai_response = AI_model.chat_with_history(user_message, session_id, use_resume, api_token)
         
         return jsonify({'response': ai_response})
         
@@ -167,6 +442,55 @@ def chat():
         return jsonify({'error': str(e)}), 500
 
 
+def _sse(data, event=None):
+    """Format one server-sent event"""
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+
+@app.route('/chat_stream', methods=['POST'])
+@admitted('chat')
+def chat_stream():
+    """Handle text chat messages, streaming the reply as server-sent events"""
+    data = request.get_json()
+    user_message = data.get('message', '')
+    session_id = data.get('session_id', 'default')
+    use_resume = data.get('use_resume', False)
+    
+    if not user_message:
+        return jsonify({'error': 'No message provided'}), 400
+    
+    # Check if HuggingFace API key is set (either for this browser or in the environment)
+    api_token = _api_token()
+    if not api_token:
+        return jsonify({'error': 'Please set your HuggingFace API key first'}), 400
+    
+    # Streamed after the request hooks have run, so the generator re-enters the trace
+    trace_id = metrics.current_trace_id()
+    
+    def generate():
+        with metrics.trace(trace_id) as current:
+            start = time.perf_counter()
+            first_token_ms = None
+            try:
+                for token in AI_model.stream_chat_with_history(user_message, session_id, use_resume, api_token):
+                    if first_token_ms is None:
+                        first_token_ms = (time.perf_counter() - start) * 1000
+                    yield _sse({'token': token})
+            except Exception as e:
+                yield _sse({'error': str(e)}, event='error')
+                return
+            total_ms = (time.perf_counter() - start) * 1000
+            metrics.log(f"/chat_stream first token in {first_token_ms or total_ms:.0f} ms, "
+                        f"complete in {total_ms:.0f} ms ({current.summary()})")
+        yield _sse({'ttft_ms': first_token_ms, 'total_ms': total_ms}, event='done')
+    
+    return Response(stream_with_context(generate()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',  # don't let proxies buffer the stream
+    })
+
+
 if __name__ == '__main__':
     app.run(debug=True, host='127.0.0.1', port=5000)
 
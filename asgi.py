@@ -0,0 +1,270 @@
+"""
+ASGI serving mode
+Run with `uvicorn asgi:app --workers N` instead of gunicorn's sync workers.
+The endpoints that mostly wait on remote services (/chat, /chat_stream,
+/speech, /speech_stream) are async: the LLM call is awaited on the async
+HTTP client, while CPU-bound work (retrieval embeddings, audio preprocessing,
+local STT) runs in a thread pool. Every other route is served by the Flask
+app, mounted as a WSGI fallback.
+"""
+import asyncio
+import contextlib
+import functools
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from a2wsgi import WSGIMiddleware
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Mount, Route, WebSocketRoute
+from starlette.websockets import WebSocketDisconnect
+
+import admission
+import AI_model
+import metrics
+import transcribe
+import voice_stream
+from app import app as flask_app, _sse
+
+# Threads for CPU-bound steps and blocking client libraries (per worker process)
+ASGI_EXECUTOR_THREADS = int(os.getenv("ASGI_EXECUTOR_THREADS", str(min(32, (os.cpu_count() or 1) + 4))))
+# Threads serving the mounted Flask routes
+ASGI_WSGI_THREADS = int(os.getenv("ASGI_WSGI_THREADS", "10"))
+
+
+def _client_id(request):
+    """The browser id from the Flask session cookie, if the cookie verifies."""
+    cookie = request.cookies.get(flask_app.config.get('SESSION_COOKIE_NAME', 'session'))
+    if not cookie:
+        return None
+    serializer = flask_app.session_interface.get_signing_serializer(flask_app)
+    try:
+        return serializer.loads(cookie).get('client_id')
+    except Exception:
+        return None
+
+
+def _api_token(request):
+    """Same lookup as the Flask routes: the token set by this browser, else the environment."""
+    return AI_model.get_api_token(_client_id(request))
+
+
+def _traced(endpoint):
+    """Run an async route inside a request trace, like the Flask request hooks."""
+    @functools.wraps(endpoint)
+    async def handler(request):
+        start = time.perf_counter()
+        with metrics.trace(request.headers.get('x-request-id')) as current:
+            response = await endpoint(request)
+            response.headers['X-Trace-Id'] = current.trace_id
+            metrics.observe_request(request.method, request.url.path, response.status_code,
+                                    time.perf_counter() - start)
+        return response
+    return handler
+
+
+def _client_key(request) -> str:
+    """
+    Rate-limit key, as in app.py: the browser id from the session cookie, else
+    the client address (uvicorn applies X-Forwarded-For from trusted proxies).
+    """
+    client_id = _client_id(request)
+    if client_id:
+        return f"client:{client_id}"
+    return f"addr:{request.client.host if request.client else None}"
+
+
+async def _release_after(body, ticket):
+    try:
+        async for chunk in body:
+            yield chunk
+    finally:
+        ticket.release()
+
+
+def _admitted(name, endpoint):
+    """Admission control for an async route; the wait for a slot runs in a thread."""
+    @functools.wraps(endpoint)
+    async def handler(request):
+        try:
+            ticket = await asyncio.to_thread(admission.admit, name, _client_key(request))
+        except admission.Rejected as e:
+            metrics.log(f"{request.url.path} rejected ({e.reason}), retry after {e.retry_after}s", "WARN")
+            return JSONResponse({'status': 'error', 'error': str(e)}, status_code=e.status,
+                                headers={'Retry-After': str(e.retry_after)})
+        try:
+            response = await endpoint(request)
+        except BaseException:
+            ticket.release()
+            raise
+        if isinstance(response, StreamingResponse):
+            response.body_iterator = _release_after(response.body_iterator, ticket)
+        else:
+            ticket.release()
+        return response
+    return handler
+
+
+def _admitted_socket(name, endpoint):
+    """Admission control for a WebSocket route: the slot is held until the socket closes."""
+    @functools.wraps(endpoint)
+    async def handler(websocket):
+        try:
+            ticket = await asyncio.to_thread(admission.admit, name, _client_key(websocket))
+        except admission.Rejected as e:
+            metrics.log(f"{websocket.url.path} rejected ({e.reason}), retry after {e.retry_after}s", "WARN")
+            await websocket.accept()
+            await websocket.send_text(json.dumps({'type': 'error', 'error': str(e), 'retry_after': e.retry_after}))
+            await websocket.close(code=admission.WS_CLOSE_TRY_AGAIN_LATER, reason=e.reason)
+            return
+        try:
+            await endpoint(websocket)
+        finally:
+            ticket.release()
+    return handler
+
+
+async def _chat_request(request):
+    """Parse and validate a /chat body; returns (args, error response)."""
+    try:
+        data = await request.json()
+    except ValueError:
+        data = {}
+    user_message = data.get('message', '')
+    if not user_message:
+        return None, JSONResponse({'error': 'No message provided'}, status_code=400)
+    # The token may live in a sqlite/redis session backend
+    api_token = await asyncio.to_thread(_api_token, request)
+    if not api_token:
+        return None, JSONResponse({'error': 'Please set your HuggingFace API key first'}, status_code=400)
+    return (user_message, data.get('session_id', 'default'), data.get('use_resume', False), api_token), None
+
+
+async def chat(request):
+    """Handle text chat messages"""
+    args, error = await _chat_request(request)
+    if error:
+        return error
+    try:
+        ai_response = await AI_model.achat_with_history(*args)
+        return JSONResponse({'response': ai_response})
+    except Exception as e:
+        return JSONResponse({'error': str(e)}, status_code=500)
+
+
+async def chat_stream(request):
+    """Handle text chat messages, streaming the reply as server-sent events"""
+    args, error = await _chat_request(request)
+    if error:
+        return error
+
+    # The body is streamed after this handler returns, outside its trace
+    trace_id = metrics.current_trace_id()
+
+    async def generate():
+        with metrics.trace(trace_id) as current:
+            start = time.perf_counter()
+            first_token_ms = None
+            try:
+                async for token in AI_model.astream_chat_with_history(*args):
+                    if first_token_ms is None:
+                        first_token_ms = (time.perf_counter() - start) * 1000
+                    yield _sse({'token': token})
+            except Exception as e:
+                yield _sse({'error': str(e)}, event='error')
+                return
+            total_ms = (time.perf_counter() - start) * 1000
+            metrics.log(f"/chat_stream first token in {first_token_ms or total_ms:.0f} ms, "
+                        f"complete in {total_ms:.0f} ms ({current.summary()})")
+        yield _sse({'ttft_ms': first_token_ms, 'total_ms': total_ms}, event='done')
+
+    return StreamingResponse(generate(), media_type='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',
+    })
+
+
+async def speech(request):
+    """Handle audio transcription only (returns text to input field)"""
+    form = await request.form()
+    audio_file = form.get('audio')
+    if audio_file is None or isinstance(audio_file, str):
+        return JSONResponse({'error': 'No audio file uploaded'}, status_code=400)
+    try:
+        audio_bytes = await audio_file.read()
+        # speech_recognition clients are blocking; preprocessing/local models are CPU-bound
+        text = await asyncio.to_thread(transcribe.transcribe_audio, audio_bytes)
+        return JSONResponse({'result': text})
+    except transcribe.EmptyAudioError as e:
+        return JSONResponse({'error': str(e)}, status_code=400)
+    except Exception as e:
+        return JSONResponse({'error': str(e)}, status_code=500)
+
+
+async def speech_stream(websocket):
+    """Streaming transcription over a WebSocket (same protocol as the Flask route)."""
+    await websocket.accept()
+    loop = asyncio.get_running_loop()
+
+    def send(event):
+        # Called from the transcription thread
+        asyncio.run_coroutine_threadsafe(websocket.send_text(json.dumps(event)), loop).result()
+
+    stream = None
+    try:
+        while True:
+            message = await websocket.receive()
+            if message['type'] == 'websocket.disconnect':
+                return
+            if message.get('bytes') is not None:
+                if stream is None:
+                    await websocket.send_text(json.dumps({'type': 'error', 'error': 'Send a start message first'}))
+                    return
+                stream.feed(message['bytes'])
+                continue
+            data = json.loads(message.get('text') or '{}')
+            if data.get('type') == 'start':
+                try:
+                    sample_rate = voice_stream.parse_sample_rate(data.get('sample_rate', 16000))
+                except ValueError as e:
+                    await websocket.send_text(json.dumps({'type': 'error', 'error': str(e)}))
+                    return
+                stream = voice_stream.VoiceStream(send, sample_rate)
+            elif data.get('type') == 'stop' and stream is not None:
+                await asyncio.to_thread(stream.finish)
+                metrics.log(f"Streamed transcription: {stream.stats['utterances']} utterance(s), "
+                            f"{stream.stats['audio_seconds']:.1f}s speech")
+                stream = None
+                await websocket.close()
+                return
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        with contextlib.suppress(Exception):
+            await websocket.send_text(json.dumps({'type': 'error', 'error': str(e)}))
+    finally:
+        if stream is not None:
+            stream.close()
+
+
+@contextlib.asynccontextmanager
+async def lifespan(_app):
+    # asyncio.to_thread uses the loop's default executor
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=ASGI_EXECUTOR_THREADS, thread_name_prefix="asgi")
+    )
+    yield
+
+
+app = Starlette(
+    routes=[
+        Route('/chat', _traced(_admitted('chat', chat)), methods=['POST']),
+        Route('/chat_stream', _traced(_admitted('chat', chat_stream)), methods=['POST']),
+        Route('/speech', _traced(_admitted('speech', speech)), methods=['POST']),
+        WebSocketRoute('/speech_stream', _admitted_socket('speech', speech_stream)),
+        Mount('/', app=WSGIMiddleware(flask_app, workers=ASGI_WSGI_THREADS)),
+    ],
+    lifespan=lifespan,
+)
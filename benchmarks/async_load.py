@@ -0,0 +1,139 @@
+"""
+Load test: concurrent interviews per worker, sync WSGI vs. async ASGI serving.
+
+Starts the stub LLM (fixed generation latency) and one server process per
+mode pinned to a single worker:
+    sync  - gunicorn app:app, one sync worker (the default deployment)
+    asgi  - uvicorn asgi:app, one worker
+then runs N concurrent interviews (each a series of /chat turns) for a range
+of N and reports throughput and p50/p95 turn latency. "Capacity" is the
+largest N whose p95 stays within --slo times the stub latency.
+
+Usage:
+    python benchmarks/async_load.py --latency 1.0 --turns 3 --concurrency 1,8,32,64
+"""
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from stub_llm_server import server_url, start_stub_server
+
+COMMANDS = {
+    "sync": ["gunicorn", "app:app", "--workers", "1", "--worker-class", "sync", "--bind", "127.0.0.1:{port}",
+             "--timeout", "300"],
+    "asgi": ["uvicorn", "asgi:app", "--workers", "1", "--host", "127.0.0.1", "--port", "{port}",
+             "--log-level", "warning"],
+}
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(mode, port, llm_url, max_concurrency):
+    env = dict(os.environ,
+               LLM_ENDPOINT_URL=llm_url,
+               HUGGINGFACEHUB_API_TOKEN="stub-token",
+               EMBEDDINGS_WARMUP="0",
+               RESPONSE_CACHE="0",  # interviews repeat "Answer {turn}"; time the LLM path, not cache hits
+               PYTHONUNBUFFERED="1")
+    # Measure the serving mode, not admission control: every interview comes
+    # from 127.0.0.1 without a cookie, so they would all share one rate bucket
+    env.setdefault("ADMISSION_CHAT_PER_MINUTE", "0")
+    env.setdefault("ADMISSION_CHAT_CONCURRENCY", str(max_concurrency))
+    env.setdefault("ADMISSION_CHAT_QUEUE", str(max_concurrency))
+    env.setdefault("ADMISSION_CHAT_MAX_WAIT_SECONDS", "600")
+    command = [part.format(port=port) for part in COMMANDS[mode]]
+    process = subprocess.Popen(command, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 120
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{mode} server exited with code {process.returncode}")
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/session_stats", timeout=1)
+            return process
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError(f"{mode} server did not start")
+
+
+async def interview(client, base, index, turns, latencies):
+    for turn in range(turns):
+        start = time.perf_counter()
+        response = await client.post(f"{base}/chat", json={"message": f"Answer {turn}", "session_id": f"load-{index}"})
+        response.raise_for_status()
+        latencies.append(time.perf_counter() - start)
+
+
+async def run_level(base, concurrency, turns):
+    latencies = []
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=600) as client:
+        start = time.perf_counter()
+        results = await asyncio.gather(
+            *(interview(client, base, i, turns, latencies) for i in range(concurrency)), return_exceptions=True
+        )
+        elapsed = time.perf_counter() - start
+    errors = sum(isinstance(r, Exception) for r in results)
+    return latencies, elapsed, errors
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--latency", type=float, default=1.0, help="stub LLM seconds per reply")
+    parser.add_argument("--turns", type=int, default=3, help="/chat turns per interview")
+    parser.add_argument("--concurrency", default="1,8,32,64")
+    parser.add_argument("--modes", default="sync,asgi")
+    parser.add_argument("--slo", type=float, default=1.5, help="p95 budget as a multiple of --latency")
+    args = parser.parse_args()
+
+    stub = start_stub_server(reply="Interesting. What was the hardest part of that project?", latency=args.latency)
+    levels = [int(n) for n in args.concurrency.split(",")]
+    print(f"stub LLM latency {args.latency:.2f}s, {args.turns} turns per interview, 1 worker, {os.cpu_count()} CPU(s)\n")
+    for mode in args.modes.split(","):
+        port = free_port()
+        try:
+            process = start_server(mode, port, server_url(stub), max(levels))
+        except (OSError, RuntimeError) as e:
+            print(f"{mode:5s} skipped: {e}")
+            continue
+        capacity = 0
+        try:
+            for concurrency in levels:
+                latencies, elapsed, errors = asyncio.run(run_level(f"http://127.0.0.1:{port}", concurrency, args.turns))
+                if not latencies:
+                    print(f"{mode:5s} N={concurrency:4d}  all requests failed")
+                    continue
+                p95 = percentile(latencies, 95)
+                if not errors and p95 <= args.slo * args.latency:
+                    capacity = concurrency
+                print(f"{mode:5s} N={concurrency:4d}  {len(latencies) / elapsed:7.1f} turns/s  "
+                      f"p50 {1000 * statistics.median(latencies):7.0f} ms  p95 {1000 * p95:7.0f} ms  errors {errors}")
+        finally:
+            process.terminate()
+            process.wait(timeout=30)
+        print(f"{mode:5s} capacity: {capacity} concurrent interviews per worker within p95 <= "
+              f"{args.slo * args.latency:.1f}s\n")
+    stub.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Benchmark: time-to-first-token of /chat_stream vs. the blocking /chat path.
+
+Drives AI_model.chat_with_history and AI_model.stream_chat_with_history against
+the local stub inference server, which spreads a simulated generation time
+across the reply's tokens.
+
+Usage:
+    python benchmarks/chat_ttft.py --turns 10 --latency 2.0
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from stub_llm_server import server_url, start_stub_server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--turns", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=2.0, help="simulated generation seconds per reply")
+    args = parser.parse_args()
+
+    server = start_stub_server(
+        reply="Thanks for joining today. Could you walk me through a recent project you led?",
+        latency=args.latency,
+    )
+    os.environ["LLM_ENDPOINT_URL"] = server_url(server)
+    os.environ.setdefault("HUGGINGFACEHUB_API_TOKEN", "stub-token")
+    os.environ["RESPONSE_CACHE"] = "0"  # every turn repeats the same prompt; measure the LLM, not the cache
+    import AI_model
+
+    blocking, first_token, streamed_total = [], [], []
+    for turn in range(args.turns):
+        start = time.perf_counter()
+        AI_model.chat_with_history("Hello, let's start.", session_id=f"blocking-{turn}")
+        blocking.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        ttft = None
+        for _ in AI_model.stream_chat_with_history("Hello, let's start.", session_id=f"stream-{turn}"):
+            if ttft is None:
+                ttft = time.perf_counter() - start
+        first_token.append(ttft)
+        streamed_total.append(time.perf_counter() - start)
+    server.shutdown()
+
+    def mean_ms(values):
+        return 1000 * sum(values) / len(values)
+
+    print(f"blocking /chat       : reply visible after {mean_ms(blocking):.0f} ms")
+    print(f"streaming /chat_stream: first token after {mean_ms(first_token):.0f} ms, "
+          f"complete after {mean_ms(streamed_total):.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
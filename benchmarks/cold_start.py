@@ -0,0 +1,105 @@
+"""
+Benchmark: cold-start time against a budget.
+
+Measures, in fresh interpreter processes:
+    import  - time to import app.py (module-level startup work included)
+    serve   - time from launching the server until it answers GET /
+and lists the slowest top-level imports (python -X importtime). Exits
+non-zero if the median serve time exceeds --budget, so it can gate CI.
+
+Usage:
+    python benchmarks/cold_start.py --runs 5 --budget 3.0 --server gunicorn
+"""
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SERVERS = {
+    "gunicorn": ["gunicorn", "app:app", "--workers", "1", "--bind", "127.0.0.1:{port}"],
+    "uvicorn": ["uvicorn", "asgi:app", "--host", "127.0.0.1", "--port", "{port}", "--log-level", "warning"],
+}
+
+
+def startup_env():
+    # Measure the server itself: no Astra cleanup, models load lazily/in the background
+    return dict(os.environ, STARTUP_TABLE_CLEANUP="off", FAST_START="1", PYTHONWARNINGS="ignore")
+
+
+def time_import():
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "import app"], cwd=ROOT, env=startup_env(), check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+
+def time_serve(server):
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    command = [part.format(port=port) for part in SERVERS[server]]
+    start = time.perf_counter()
+    process = subprocess.Popen(command, cwd=ROOT, env=startup_env(),
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while True:
+            if process.poll() is not None:
+                raise RuntimeError(f"{server} exited with code {process.returncode}")
+            try:
+                urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=1).read()
+                return time.perf_counter() - start
+            except OSError:
+                time.sleep(0.02)
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+
+def slowest_imports(limit=8):
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import app"], cwd=ROOT, env=startup_env(),
+                            capture_output=True, text=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit() and name.startswith("   ") and not name.startswith("    "):
+            rows.append((int(cumulative), name.strip()))  # direct imports of app
+    return sorted(rows, reverse=True)[:limit]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget", type=float, default=float(os.getenv("STARTUP_BUDGET_SECONDS", "3.0")))
+    parser.add_argument("--server", choices=sorted(SERVERS), default="gunicorn")
+    args = parser.parse_args()
+
+    imports = [time_import() for _ in range(args.runs)]
+    print(f"import app : median {statistics.median(imports):.2f}s  max {max(imports):.2f}s")
+    try:
+        serves = [time_serve(args.server) for _ in range(args.runs)]
+    except (OSError, RuntimeError) as e:
+        print(f"serve      : skipped ({e})")
+        serves = imports
+    else:
+        print(f"first GET / : median {statistics.median(serves):.2f}s  max {max(serves):.2f}s ({args.server})")
+
+    print("\nslowest imports of app.py (cumulative):")
+    for micros, name in slowest_imports():
+        print(f"  {micros / 1e6:6.3f}s  {name}")
+
+    median = statistics.median(serves)
+    verdict = "within" if median <= args.budget else "OVER"
+    print(f"\ncold start {median:.2f}s is {verdict} the {args.budget:.1f}s budget")
+    sys.exit(0 if median <= args.budget else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Benchmark: concurrent embedding requests, direct vs. micro-batched.
+
+N threads each embed one query (a resume-backed chat turn) or one chunk batch
+(an upload) at the same time. "direct" calls the model per request, as before;
+"batched" goes through embedding_engine's micro-batcher, which coalesces them
+into shared forward passes. Uses the real sentence-transformers model when
+installed, otherwise a stand-in with a fixed per-pass overhead plus a per-text
+cost (--pass-ms / --text-ms), which is the shape that batching amortizes.
+
+Usage:
+    python benchmarks/embed_batching.py --concurrency 1,8,32 --wait-ms 5 --max-batch 64
+"""
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import embedding_engine
+
+
+class StandInModel:
+    """
+    Takes pass_ms per forward pass plus text_ms per text. Passes run one at a
+    time, like a CPU forward pass that already uses every core.
+    """
+
+    def __init__(self, pass_ms, text_ms, dim=384):
+        self.pass_s, self.text_s, self.dim = pass_ms / 1000, text_ms / 1000, dim
+        self._cpu = threading.Lock()
+
+    def embed_documents(self, texts):
+        with self._cpu:
+            time.sleep(self.pass_s + self.text_s * len(texts))
+        return [[0.0] * self.dim for _ in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+def load_model(args):
+    try:
+        return embedding_engine._load_model(), "sentence-transformers"
+    except ImportError:
+        return StandInModel(args.pass_ms, args.text_ms), f"stand-in ({args.pass_ms} ms/pass + {args.text_ms} ms/text)"
+
+
+def run(embed, concurrency, texts_per_request):
+    latencies = []
+    lock = threading.Lock()
+    barrier = threading.Barrier(concurrency)
+
+    def worker(i):
+        texts = [f"Tell me about project {i} and the hardest bug you fixed there, part {j}"
+                 for j in range(texts_per_request)]
+        barrier.wait()
+        start = time.perf_counter()
+        embed(texts)
+        with lock:
+            latencies.append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return time.perf_counter() - start, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--concurrency", default="1,8,32")
+    parser.add_argument("--texts", default="1,32", help="texts per request (1 = chat query, 32 = upload batch)")
+    parser.add_argument("--max-batch", type=int, default=embedding_engine.EMBED_BATCH_MAX)
+    parser.add_argument("--wait-ms", type=float, default=embedding_engine.EMBED_BATCH_WAIT_MS)
+    parser.add_argument("--torch-threads", type=int, default=embedding_engine.EMBED_TORCH_THREADS)
+    parser.add_argument("--pass-ms", type=float, default=15.0)
+    parser.add_argument("--text-ms", type=float, default=1.0)
+    args = parser.parse_args()
+
+    model, label = load_model(args)
+    batcher = embedding_engine.EmbeddingBatcher(model.embed_documents, args.max_batch, args.wait_ms / 1000,
+                                                args.torch_threads)
+    modes = {
+        "direct": model.embed_documents,
+        "batched": lambda texts: batcher.submit(texts).result(),
+    }
+    print(f"model: {label}, max batch {args.max_batch}, wait {args.wait_ms} ms, {os.cpu_count()} CPU(s)\n")
+    for texts_per_request in (int(n) for n in args.texts.split(",")):
+        for concurrency in (int(n) for n in args.concurrency.split(",")):
+            for mode, embed in modes.items():
+                before = embedding_engine.get_stats()["batches"]
+                elapsed, latencies = run(embed, concurrency, texts_per_request)
+                passes = embedding_engine.get_stats()["batches"] - before if mode == "batched" else concurrency
+                print(f"{texts_per_request:3d} text(s) x N={concurrency:3d}  {mode:7s}  "
+                      f"{concurrency * texts_per_request / elapsed:8.1f} texts/s  "
+                      f"p50 {1000 * statistics.median(latencies):7.1f} ms  max {1000 * max(latencies):7.1f} ms  "
+                      f"forward passes {passes}")
+        print()
+
+
+if __name__ == "__main__":
+    main()
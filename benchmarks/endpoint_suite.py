@@ -0,0 +1,343 @@
+"""
+Benchmark suite: /upload_resume, /chat and /speech through the Flask app, offline.
+
+Remote services are replaced by local stand-ins:
+    LLM    - stub_llm_server (OpenAI-compatible, fixed generation latency)
+    STT    - a registered recognizer backend that sleeps --stt-rtf x audio length
+    Astra  - the local vector index with a simulated round-trip per insert
+             batch and per query (--astra-rtt-ms)
+    embeds - HashEmbeddings (deterministic, no torch) unless --real-embeddings
+The app is served by werkzeug's threaded server in this process and driven
+over HTTP at each --concurrency level. Per endpoint and level it reports
+throughput, p50/p95/p99 latency and peak RSS (sampled while the level runs),
+and writes everything as JSON so runs can be compared across commits:
+
+    python benchmarks/endpoint_suite.py --concurrency 1,4,16 --output before.json
+    git checkout other-branch
+    python benchmarks/endpoint_suite.py --concurrency 1,4,16 --compare before.json
+
+/upload_resume latency is measured until the background ingestion job has
+finished (polling /upload_status), not just until the 202 response. Each
+level uploads first, then chats with use_resume on the same sessions, so
+/chat includes retrieval.
+
+Each client is one browser with its own session cookie. Admission rate limits
+are off and the queues hold every client unless --admission-limits; requests
+turned away with 429/503 are counted as rejected, not as errors.
+"""
+import argparse
+import io
+import json
+import logging
+import math
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import wave
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from fake_embeddings import HashEmbeddings
+from stub_llm_server import server_url, start_stub_server
+from synthetic_pdf import make_pdf, resume_pages
+
+ENDPOINTS = ("upload_resume", "chat", "speech")
+ASTRA_INSERT_BATCH = 16  # Cassandra vector store default batch size
+
+
+def configure_environment(args, llm_url):
+    """Point the app at the stand-ins; must run before app is imported."""
+    os.environ.update(
+        LLM_ENDPOINT_URL=llm_url,
+        HUGGINGFACEHUB_API_TOKEN="stub-token",
+        VECTOR_BACKEND="local",
+        STT_BACKEND="google",
+        STARTUP_TABLE_CLEANUP="off",
+        EMBEDDINGS_WARMUP="1" if args.real_embeddings else "0",
+        RESPONSE_CACHE="1" if args.response_cache else "0",
+    )
+    if not args.admission_limits:
+        # Measure capacity, not the limits: no rate limit, and requests past the
+        # concurrency limit wait in the queue instead of being turned away
+        for endpoint in ENDPOINTS:
+            os.environ.setdefault(f"ADMISSION_{endpoint.upper()}_PER_MINUTE", "0")
+            os.environ.setdefault(f"ADMISSION_{endpoint.upper()}_QUEUE", str(max(args.levels)))
+            os.environ.setdefault(f"ADMISSION_{endpoint.upper()}_MAX_WAIT_SECONDS", "300")
+    import embedding_engine
+    import transcribe
+    import vector_index
+
+    if not args.real_embeddings:
+        embedding_engine.get_embeddings = HashEmbeddings
+
+    class StubSTT(transcribe.STTBackend):
+        """Recognizer that takes --stt-rtf seconds per second of audio."""
+
+        def transcribe(self, audio):
+            time.sleep(args.stt_rtf * len(audio.frame_data) / (audio.sample_rate * audio.sample_width))
+            return "I built a data pipeline in Python"
+
+    transcribe.register_backend("google", StubSTT())
+
+    rtt = args.astra_rtt_ms / 1000
+
+    class AstraLikeStore(vector_index.LocalVectorStore):
+        """Local index paying an Astra-like round-trip per 16-row insert batch and per query."""
+
+        def add_texts(self, texts, metadatas=None, ids=None, **kwargs):
+            texts = list(texts)
+            time.sleep(rtt * math.ceil(len(texts) / ASTRA_INSERT_BATCH))
+            return super().add_texts(texts, metadatas, ids)
+
+        def similarity_search_with_score_by_vector(self, embedding, k: int = 4):
+            time.sleep(rtt)
+            return super().similarity_search_with_score_by_vector(embedding, k)
+
+    vector_index.LocalVectorStore = AstraLikeStore
+
+
+class RSSSampler:
+    """Peak resident set size of this process while a block runs (sampled every 10 ms)."""
+
+    def __enter__(self):
+        self.peak = self._current()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, self._current())
+
+    def _run(self):
+        while not self._stop.wait(0.01):
+            self.peak = max(self.peak, self._current())
+
+    @staticmethod
+    def _current():
+        try:
+            with open("/proc/self/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        return int(line.split()[1]) * 1024
+        except OSError:
+            pass
+        # No procfs (macOS): lifetime peak instead (ru_maxrss is bytes there, KiB on Linux)
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def wav_clip(seconds: float, rate: int = 44100) -> bytes:
+    """Browser-like mono 44.1 kHz clip: a tone with 0.3 s of silence at each end."""
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        frames = bytearray()
+        for i in range(int(seconds * rate)):
+            t = i / rate
+            voiced = 0.3 <= t <= seconds - 0.3
+            frames += int(voiced * 8000 * math.sin(2 * math.pi * 220 * t)).to_bytes(2, "little", signed=True)
+        w.writeframes(bytes(frames))
+    return buffer.getvalue()
+
+
+def resume_pdf(pages: int, tag: str) -> bytes:
+    # A unique first line per upload, so the content-hash resume cache doesn't skip the pipeline
+    texts = resume_pages(pages)
+    texts[0] = f"Candidate {tag}\n" + texts[0]
+    return make_pdf(texts)
+
+
+def upload_resume(client, base, index, args):
+    session_id = f"bench-{index}"
+    files = {"resume": (f"resume_{index}.pdf", resume_pdf(args.pages, f"{session_id}-{time.time_ns()}"),
+                        "application/pdf")}
+    response = client.post(f"{base}/upload_resume", files=files, data={"session_id": session_id})
+    response.raise_for_status()
+    job_id = response.json()["job_id"]
+    while True:
+        status = client.get(f"{base}/upload_status/{job_id}").json()
+        if status["status"] == "succeeded":
+            return
+        if status["status"] == "failed":
+            raise RuntimeError(status.get("error"))
+        time.sleep(0.01)
+
+
+def chat(client, base, index, args):
+    response = client.post(f"{base}/chat", json={
+        "message": f"I worked on project {index} at {time.time_ns()}",
+        "session_id": f"bench-{index}",
+        "use_resume": True,
+    })
+    response.raise_for_status()
+
+
+def speech(client, base, index, args):
+    response = client.post(f"{base}/speech", files={"audio": ("clip.wav", args.clip, "audio/wav")})
+    response.raise_for_status()
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def run_level(base, endpoint, concurrency, args):
+    """Run --requests calls per worker for one endpoint; returns a result row."""
+    func = {"upload_resume": upload_resume, "chat": chat, "speech": speech}[endpoint]
+    latencies, errors, rejected = [], [], []
+    lock = threading.Lock()
+
+    def worker(index):
+        with httpx.Client(timeout=300) as client:
+            client.get(f"{base}/")  # one browser per client: picks up its session cookie
+            for _ in range(args.requests):
+                start = time.perf_counter()
+                try:
+                    func(client, base, index, args)
+                except httpx.HTTPStatusError as e:
+                    # 429/503 are admission control turning the request away, not failures
+                    target = rejected if e.response.status_code in (429, 503) else errors
+                    with lock:
+                        target.append(str(e))
+                    continue
+                except Exception as e:
+                    with lock:
+                        errors.append(str(e))
+                    continue
+                with lock:
+                    latencies.append(time.perf_counter() - start)
+
+    with RSSSampler() as rss, ThreadPoolExecutor(max_workers=concurrency) as pool:
+        start = time.perf_counter()
+        list(pool.map(worker, range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    row = {
+        "endpoint": endpoint,
+        "concurrency": concurrency,
+        "requests": len(latencies) + len(errors) + len(rejected),
+        "errors": len(errors),
+        "rejected": len(rejected),
+        "throughput_rps": round(len(latencies) / elapsed, 3),
+        "peak_rss_mb": round(rss.peak / 2 ** 20, 1),
+    }
+    if latencies:
+        row.update({
+            "mean_ms": round(1000 * statistics.mean(latencies), 2),
+            "p50_ms": round(1000 * percentile(latencies, 50), 2),
+            "p95_ms": round(1000 * percentile(latencies, 95), 2),
+            "p99_ms": round(1000 * percentile(latencies, 99), 2),
+        })
+    if errors:
+        row["first_error"] = errors[0]
+    return row
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_row(row, baseline=None, file=None):
+    line = (f"{row['endpoint']:14s} N={row['concurrency']:3d}  {row['throughput_rps']:8.2f} req/s  "
+            f"p50 {row.get('p50_ms', float('nan')):8.1f}  p95 {row.get('p95_ms', float('nan')):8.1f}  "
+            f"p99 {row.get('p99_ms', float('nan')):8.1f} ms  rss {row['peak_rss_mb']:7.1f} MB  "
+            f"errors {row['errors']}  rejected {row.get('rejected', 0)}")
+    if baseline and baseline.get("p95_ms") and row.get("p95_ms"):
+        line += (f"  | p95 {100 * (row['p95_ms'] / baseline['p95_ms'] - 1):+6.1f}%  "
+                 f"req/s {100 * (row['throughput_rps'] / baseline['throughput_rps'] - 1):+6.1f}%")
+    print(line, file=file)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--endpoints", default=",".join(ENDPOINTS))
+    parser.add_argument("--concurrency", default="1,4,16", help="comma-separated client counts")
+    parser.add_argument("--requests", type=int, default=5, help="requests per client at each level")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="stub LLM seconds per reply")
+    parser.add_argument("--stt-rtf", type=float, default=0.1, help="stub STT seconds per audio second")
+    parser.add_argument("--astra-rtt-ms", type=float, default=20.0, help="simulated Astra round-trip")
+    parser.add_argument("--pages", type=int, default=3, help="pages per uploaded resume")
+    parser.add_argument("--clip-seconds", type=float, default=4.0, help="length of the /speech clip")
+    parser.add_argument("--real-embeddings", action="store_true", help="use the sentence-transformers model")
+    parser.add_argument("--response-cache", action="store_true", help="leave the LLM response cache on")
+    parser.add_argument("--admission-limits", action="store_true",
+                        help="keep the app's rate limits and queue sizes (429/503 are reported as rejected)")
+    parser.add_argument("--output", default=None, help="JSON results path (default bench-<commit>.json)")
+    parser.add_argument("--compare", default=None, help="earlier JSON results to diff against")
+    parser.add_argument("--verbose", action="store_true", help="show the app's log output")
+    args = parser.parse_args()
+    args.levels = [int(n) for n in args.concurrency.split(",")]
+
+    out = sys.stdout
+    if not args.verbose:
+        # The app logs every request to stdout; keep the report readable
+        sys.stdout = open(os.devnull, "w")
+        logging.getLogger("werkzeug").setLevel(logging.ERROR)
+
+    stub = start_stub_server(reply="Interesting. What was the hardest part of that project?",
+                             latency=args.llm_latency)
+    configure_environment(args, server_url(stub))
+    args.clip = wav_clip(args.clip_seconds)
+
+    from werkzeug.serving import make_server
+    import app as flask_app
+
+    server = make_server("127.0.0.1", 0, flask_app.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = {(r["endpoint"], r["concurrency"]): r for r in json.load(f)["results"]}
+
+    endpoints = [e for e in ENDPOINTS if e in args.endpoints.split(",")]
+    commit = git_commit()
+    print(f"\ncommit {commit}, {os.cpu_count()} CPU(s), LLM {args.llm_latency:.2f}s, "
+          f"STT RTF {args.stt_rtf}, Astra RTT {args.astra_rtt_ms:.0f} ms\n", file=out)
+    results = []
+    for concurrency in args.levels:
+        for endpoint in endpoints:
+            row = run_level(base, endpoint, concurrency, args)
+            results.append(row)
+            print_row(row, baseline.get((endpoint, concurrency)), file=out)
+
+    server.shutdown()
+    stub.shutdown()
+
+    report = {
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "config": {k: v for k, v in vars(args).items() if k not in ("clip", "levels", "output", "compare")},
+        "results": results,
+    }
+    output = args.output or f"bench-{commit or 'local'}.json"
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nresults written to {output}", file=out)
+
+
+if __name__ == "__main__":
+    main()
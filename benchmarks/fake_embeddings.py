@@ -0,0 +1,25 @@
+"""
+Deterministic stand-in for the sentence-transformers model, so vector store
+benchmarks run offline without torch. Each text maps to a fixed pseudo-random
+unit vector derived from its SHA-256.
+"""
+import hashlib
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+
+class HashEmbeddings(Embeddings):
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+
+    def _vector(self, text: str):
+        seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+        vector = np.random.default_rng(seed).standard_normal(self.dim).astype(np.float32)
+        return (vector / np.linalg.norm(vector)).tolist()
+
+    def embed_documents(self, texts):
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text):
+        return self._vector(text)
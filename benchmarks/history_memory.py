@@ -0,0 +1,97 @@
+"""
+Benchmark: chat history size for long resume-backed interviews.
+
+Replays an interview where every turn retrieves --chunks resume chunks of
+--chunk-chars characters. "inline" stores each user message with its resume
+context appended to a LangChain message history, as before; "compact" stores
+turn_history records with chunk ids. Reports in-memory size, the serialized
+size for the sqlite/redis session backends, and prompt build time per turn.
+
+Usage:
+    python benchmarks/history_memory.py --turns 10,40,100 --chunks 3 --chunk-chars 1000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import zlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_core.chat_history import InMemoryChatMessageHistory
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+import context_window
+import session_store
+import turn_history
+
+SYSTEM = "You are an experienced interviewer conducting a realistic interview. " * 20
+WORDS = "python distributed systems team lead latency kafka migration mentoring postgres design".split()
+
+
+def text(rng, chars):
+    words = []
+    while sum(len(w) + 1 for w in words) < chars:
+        words.append(rng.choice(WORDS))
+    return " ".join(words)[:chars]
+
+
+def replay(turns, chunks, chunk_chars, seed=0):
+    rng = random.Random(seed)
+    resume = [text(rng, chunk_chars) for _ in range(8)]
+    inline = InMemoryChatMessageHistory()
+    compact = turn_history.TurnHistory()
+    inline_window, compact_window = context_window.ContextWindow(), context_window.ContextWindow()
+    build_seconds = {"inline": 0.0, "compact": 0.0}
+    for i in range(turns):
+        user = f"Turn {i}: " + text(rng, 200)
+        reply = text(rng, 250)
+        docs = rng.sample(resume, chunks)
+        context = context_window.RESUME_CONTEXT_MARKER + "\n".join(docs)
+        system = [SystemMessage(content=SYSTEM)] if i == 0 else []
+
+        start = time.perf_counter()
+        inline_window.build(inline.messages + system + [HumanMessage(content=user + context)])
+        build_seconds["inline"] += time.perf_counter() - start
+        inline.add_messages(system + [HumanMessage(content=user + context), AIMessage(content=reply)])
+
+        start = time.perf_counter()
+        compact_window.build(compact.messages + system + [HumanMessage(content=user + context)])
+        build_seconds["compact"] += time.perf_counter() - start
+        compact.add_turn(user, reply, [turn_history.chunk_id(d) for d in docs], len(context),
+                         SYSTEM if i == 0 else None)
+    return inline, compact, build_seconds
+
+
+def legacy_serialized_size(history):
+    # The previous ChatHistorySerializer format: [[role, content], ...]
+    roles = {SystemMessage: "s", HumanMessage: "h", AIMessage: "a"}
+    records = [[roles[type(m)], m.content] for m in history.messages]
+    return len(zlib.compress(json.dumps(records, separators=(",", ":")).encode("utf-8")))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--turns", default="10,40,100")
+    parser.add_argument("--chunks", type=int, default=3)
+    parser.add_argument("--chunk-chars", type=int, default=1000)
+    args = parser.parse_args()
+
+    serializer = session_store.ChatHistorySerializer()
+    print(f"{args.chunks} resume chunk(s) x {args.chunk_chars} chars per turn\n")
+    print(f"{'turns':>5}  {'inline mem':>11}  {'compact mem':>11}  {'inline ser':>10}  {'compact ser':>11}  "
+          f"{'build/turn inline':>17}  {'compact':>8}")
+    for turns in (int(n) for n in args.turns.split(",")):
+        inline, compact, build = replay(turns, args.chunks, args.chunk_chars)
+        print(f"{turns:5d}  {session_store.estimate_size(inline) / 1024:9.1f}KB  "
+              f"{session_store.estimate_size(compact) / 1024:9.1f}KB  "
+              f"{legacy_serialized_size(inline) / 1024:8.1f}KB  {len(serializer.dumps(compact)) / 1024:9.1f}KB  "
+              f"{1000 * build['inline'] / turns:14.2f} ms  {1000 * build['compact'] / turns:5.2f} ms")
+        report = compact.report()
+    print(f"\nlast session report: {report}")
+
+
+if __name__ == "__main__":
+    main()
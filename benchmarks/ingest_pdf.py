@@ -0,0 +1,104 @@
+"""
+Benchmark: serial resume ingestion vs. the streaming pipeline.
+
+Serial = extract every page, split everything, embed everything, one bulk
+write (the original setup_resume_rag_from_bytes flow). Streaming = parallel
+page extraction, per-page chunking, batched embedding, concurrent batch writes
+(ingestion.ingest_pdf). Runs offline over synthetic 1-200 page PDFs with hash
+embeddings; --write-rtt-ms adds a simulated round-trip per vector store write.
+
+Usage:
+    python benchmarks/ingest_pdf.py --pages 1 10 50 200 --workers 4 --batch 32
+"""
+import argparse
+import io
+import math
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from pypdf import PdfReader
+
+import ingestion
+from fake_embeddings import HashEmbeddings
+from resume_cache import PrecomputedEmbeddings
+from synthetic_pdf import make_pdf, resume_pages
+from vector_index import LocalVectorStore
+
+
+ASTRA_INSERT_BATCH = 16  # Cassandra vector store default batch size
+
+
+class SlowWriteStore(LocalVectorStore):
+    """Local index that sleeps one simulated round-trip per 16-row insert batch (like Cassandra)."""
+
+    def __init__(self, embedding, rtt):
+        super().__init__(embedding)
+        self.rtt = rtt
+
+    def add_texts(self, texts, metadatas=None, ids=None, **kwargs):
+        texts = list(texts)
+        time.sleep(self.rtt * math.ceil(len(texts) / ASTRA_INSERT_BATCH))
+        return super().add_texts(texts, metadatas, ids)
+
+
+def splitter():
+    return RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
+
+
+def serial(pdf_data, embeddings, rtt):
+    reader = PdfReader(io.BytesIO(pdf_data))
+    documents = [Document(page_content=page.extract_text(), metadata={"source": "bench.pdf", "page": i})
+                 for i, page in enumerate(reader.pages)]
+    splits = splitter().split_documents(documents)
+    SlowWriteStore(embeddings, rtt).add_documents(splits)
+    return len(splits)
+
+
+def streaming(pdf_data, embeddings, rtt, workers, batch, writes):
+    store_embeddings = PrecomputedEmbeddings([], [], embeddings)
+    store = SlowWriteStore(store_embeddings, rtt)
+    splits, _, _ = ingestion.ingest_pdf(pdf_data, "bench.pdf", splitter(), store, store_embeddings, embeddings,
+                                        batch_size=batch, write_concurrency=writes, page_workers=workers)
+    return len(splits)
+
+
+def measure(func, *args):
+    # Time without tracing, then a second run for the peak Python heap of this process
+    start = time.perf_counter()
+    chunks = func(*args)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    func(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return chunks, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 10, 50, 200])
+    parser.add_argument("--workers", type=int, default=ingestion.INGEST_PAGE_WORKERS)
+    parser.add_argument("--batch", type=int, default=ingestion.INGEST_EMBED_BATCH)
+    parser.add_argument("--writes", type=int, default=ingestion.INGEST_WRITE_CONCURRENCY)
+    parser.add_argument("--write-rtt-ms", type=float, default=20.0)
+    args = parser.parse_args()
+    embeddings = HashEmbeddings()
+    rtt = args.write_rtt_ms / 1000
+
+    print(f"{'pages':>6}{'chunks':>8}{'serial s':>10}{'stream s':>10}{'serial peak MB':>16}{'stream peak MB':>16}")
+    for pages in args.pages:
+        pdf_data = make_pdf(resume_pages(pages))
+        chunks, serial_s, serial_peak = measure(serial, pdf_data, embeddings, rtt)
+        _, stream_s, stream_peak = measure(streaming, pdf_data, embeddings, rtt, args.workers, args.batch, args.writes)
+        print(f"{pages:>6}{chunks:>8}{serial_s:>10.3f}{stream_s:>10.3f}"
+              f"{serial_peak / 2**20:>16.1f}{stream_peak / 2**20:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Benchmark: cached LLM client vs. building a new client every /chat turn.
+
+Runs entirely offline against the local stub inference server and reports
+per-turn overhead and how many TCP connections each strategy opened.
+
+Usage:
+    python benchmarks/llm_client_reuse.py --turns 50
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_core.messages import HumanMessage, SystemMessage
+
+import llm_client
+from stub_llm_server import server_url, start_stub_server
+
+MESSAGES = [
+    SystemMessage(content="You are an experienced interviewer."),
+    HumanMessage(content="Hi, let's start."),
+]
+
+
+def run(turns, get_model):
+    server = start_stub_server()
+    url = server_url(server)
+    timings = []
+    for _ in range(turns):
+        start = time.perf_counter()
+        get_model(url).invoke(MESSAGES)
+        timings.append(time.perf_counter() - start)
+    server.shutdown()
+    timings.sort()
+    return {
+        "connections": server.stats["connections"],
+        "requests": server.stats["requests"],
+        "mean_ms": 1000 * sum(timings) / len(timings),
+        "p50_ms": 1000 * timings[len(timings) // 2],
+        "first_ms": 1000 * timings[0],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--turns", type=int, default=50)
+    args = parser.parse_args()
+
+    fresh = run(args.turns, lambda url: llm_client._build_chat_model(
+        "stub-token", {**llm_client.DEFAULT_LLM_CONFIG, "endpoint_url": url}))
+    cached = run(args.turns, lambda url: llm_client.get_chat_model(
+        "stub-token", endpoint_url=url))
+
+    for name, result in (("new client per turn", fresh), ("cached client", cached)):
+        print(f"{name:>20}: {result['mean_ms']:.2f} ms/turn mean, {result['p50_ms']:.2f} ms p50, "
+              f"{result['connections']} connection(s) for {result['requests']} request(s)")
+    print(f"client cache: {llm_client.get_stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""
+Check: session backends behave the same, and a chat survives switching workers.
+
+1. Runs the store contract (set/get, LRU eviction, first-writer-wins
+   get_or_create, pop, memory report, chat history round-trip) against the
+   memory, sqlite and redis backends, and times set+get round-trips.
+2. Starts two separate worker processes on a shared backend: worker A takes
+   /set_api and the first /chat turn, worker B gets the second turn with A's
+   session cookie and must see the API key and the first turn.
+
+Redis is a fakeredis TCP server (not timed) unless --redis-url points at a
+real one; the LLM is the local stub server. No SECRET_KEY or
+HUGGINGFACEHUB_API_TOKEN is set, so the cookie key and the token must come
+from the shared backend.
+
+Usage:
+    python benchmarks/session_backends.py --backends memory,sqlite,redis
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+BACKENDS = ("memory", "sqlite", "redis")
+
+
+def backend_env(backend, db_path, redis_url):
+    env = {"SESSION_BACKEND": backend, "SESSION_DB_PATH": db_path}
+    if redis_url:
+        env["REDIS_URL"] = redis_url
+    return env
+
+
+def check_store(backend, db_path, client, ops):
+    """Store contract for one backend; returns (failures, microseconds per set+get)."""
+    import session_store
+    from turn_history import TurnHistory
+
+    failures = []
+
+    def expect(condition, what):
+        if not condition:
+            failures.append(what)
+
+    name = f"check_{backend}_{os.getpid()}"
+    kwargs = {"path": db_path} if backend == "sqlite" else {}
+    store = session_store.create_store(name, session_store.JSONSerializer(), backend=backend, client=client,
+                                       max_entries=3, **kwargs)
+    for key in "abcd":
+        store.set(key, {"value": key})
+    expect(store.get("a") is None and len(store) == 3, "LRU eviction at max_entries")
+    expect(store.get("d") == {"value": "d"}, "set/get")
+    expect(store.get_or_create("b", lambda: {"value": "new"}) == {"value": "b"}, "get_or_create keeps existing")
+    expect(store.pop("c") == {"value": "c"} and "c" not in store, "pop")
+    expect(store.memory_report()["entries"] == len(store), "memory report")
+
+    histories = session_store.create_store(f"{name}_chat", session_store.ChatHistorySerializer(), backend=backend,
+                                           client=client, **kwargs)
+    history = TurnHistory()
+    history.add_turn("I led the migration", "How did you plan it?", ["a1b2"], 120, system="You interview.")
+    histories.set("s1", history)
+    loaded = histories.get("s1")
+    expect(loaded is not None and loaded.to_records() == history.to_records(), "chat history round-trip")
+
+    if ops <= 0:
+        return failures, None
+    timing = session_store.create_store(f"{name}_timing", session_store.JSONSerializer(), backend=backend,
+                                        client=client, **kwargs)
+    start = time.perf_counter()
+    for i in range(ops):
+        timing.set(f"s{i % 50}", {"turn": i})
+        timing.get(f"s{i % 50}")
+    return failures, 1e6 * (time.perf_counter() - start) / ops
+
+
+def _worker(env, step, cookie, results):
+    """Runs in a fresh process: one /set_api + /chat (step "a") or one /chat with a cookie (step "b")."""
+    os.environ.update(env)
+    os.environ.pop("HUGGINGFACEHUB_API_TOKEN", None)
+    os.environ.pop("SECRET_KEY", None)
+    sys.stdout = open(os.devnull, "w")
+    import AI_model
+    import app as flask_app
+
+    client = flask_app.app.test_client()
+    if step == "a":
+        client.post("/set_api", json={"api_key": "hf_stand_in_token"})
+        response = client.post("/chat", json={"message": "Hi, I'm a backend engineer", "session_id": "sb"})
+        results.put({"status": response.status_code, "cookie": client.get_cookie("session").value})
+    else:
+        client.set_cookie("session", cookie)
+        response = client.post("/chat", json={"message": "I led a database migration", "session_id": "sb"})
+        anonymous = flask_app.app.test_client().post("/chat", json={"message": "hello", "session_id": "other"})
+        results.put({"status": response.status_code, "turns": len(AI_model.get_chat_history("sb")),
+                     "anonymous_status": anonymous.status_code})
+
+
+def run_worker(env, step, cookie=None):
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    process = context.Process(target=_worker, args=(env, step, cookie, results))
+    process.start()
+    result = results.get(timeout=120)
+    process.join()
+    return result
+
+
+def check_workers(env):
+    """Two worker processes on one shared backend; returns failures."""
+    first = run_worker(env, "a")
+    if first["status"] != 200:
+        return [f"worker A /chat returned {first['status']}"]
+    second = run_worker(env, "b", first["cookie"])
+    failures = []
+    if second["status"] != 200:
+        failures.append(f"worker B /chat returned {second['status']} (API key or cookie not shared)")
+    if second["turns"] != 2:
+        failures.append(f"worker B sees {second['turns']} turn(s), expected 2")
+    if second["anonymous_status"] != 400:
+        failures.append("a browser without a key was served with another browser's token")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--backends", default=",".join(BACKENDS))
+    parser.add_argument("--redis-url", default=None, help="real Redis to use instead of a fakeredis server")
+    parser.add_argument("--ops", type=int, default=2000, help="set+get round-trips timed per backend")
+    args = parser.parse_args()
+
+    from stub_llm_server import server_url, start_stub_server
+    stub = start_stub_server(reply="Nice to meet you. What are you working on?")
+    redis_url, fake_server = args.redis_url, None
+    backends = [b for b in BACKENDS if b in args.backends.split(",")]
+    if "redis" in backends and not redis_url:
+        from fakeredis import TcpFakeServer
+        fake_server = TcpFakeServer(("127.0.0.1", 0))
+        threading.Thread(target=fake_server.serve_forever, daemon=True).start()
+        redis_url = "redis://%s:%d/0" % fake_server.server_address
+
+    failed = False
+    with tempfile.TemporaryDirectory() as tmp:
+        for backend in backends:
+            db_path = os.path.join(tmp, f"{backend}.db")
+            client = None
+            if backend == "redis":
+                import redis
+                client = redis.Redis.from_url(redis_url)
+            # The fakeredis TCP server is far slower than Redis; only time a real one
+            ops = 0 if backend == "redis" and not args.redis_url else args.ops
+            failures, op_us = check_store(backend, db_path, client, ops)
+            if backend != "memory":
+                env = dict(backend_env(backend, db_path, redis_url), LLM_ENDPOINT_URL=server_url(stub),
+                           STARTUP_TABLE_CLEANUP="off", EMBEDDINGS_WARMUP="0", RESPONSE_CACHE="0")
+                failures += check_workers(env)
+            failed = failed or bool(failures)
+            workers = "n/a (per process)" if backend == "memory" else "shared"
+            timing = f"{op_us:8.1f} us" if op_us is not None else "     n/a   "
+            print(f"{backend:7s} {'PASS' if not failures else 'FAIL':4s}  set+get {timing}  workers: {workers}")
+            for failure in failures:
+                print(f"        - {failure}")
+
+    stub.shutdown()
+    if fake_server is not None:
+        fake_server.shutdown()
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
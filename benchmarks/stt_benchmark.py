@@ -0,0 +1,135 @@
+"""
+Benchmark: speech-to-text backends over a set of WAV fixtures.
+
+For every backend reports model load time, per-clip latency (mean/p50/p95)
+and real-time factor (processing seconds / audio seconds; < 1 is faster than
+real time). If a clip has a sibling `<name>.txt` reference transcript, word
+error rate is reported too. Without a fixture directory, synthetic tone
+clips are generated so latency/RTF can still be compared (no WER).
+Each backend runs with and without the 16 kHz resample/silence-trim
+preprocessing, so the time it saves shows up directly.
+
+Usage:
+    python benchmarks/stt_benchmark.py --fixtures path/to/wavs --backends google,whisper,vosk
+"""
+import argparse
+import glob
+import io
+import math
+import os
+import statistics
+import struct
+import sys
+import tempfile
+import time
+import wave
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import transcribe
+
+
+def synthetic_fixtures(directory, durations=(2, 5, 10), rate=44100):
+    """Write tone clips with leading/trailing silence (browser-like 44.1 kHz)."""
+    paths = []
+    for seconds in durations:
+        path = os.path.join(directory, f"tone_{seconds}s.wav")
+        frames = bytearray()
+        for i in range(int(seconds * rate)):
+            t = i / rate
+            voiced = 0.5 <= t <= seconds - 0.5
+            frames += struct.pack("<h", int(8000 * math.sin(2 * math.pi * 220 * t)) if voiced else 0)
+        with wave.open(path, "wb") as wf:
+            wf.setnchannels(1)
+            wf.setsampwidth(2)
+            wf.setframerate(rate)
+            wf.writeframes(bytes(frames))
+        paths.append(path)
+    return paths
+
+
+def word_error_rate(reference: str, hypothesis: str) -> float:
+    ref, hyp = reference.lower().split(), hypothesis.lower().split()
+    row = list(range(len(hyp) + 1))
+    for i, r in enumerate(ref, 1):
+        prev, row[0] = row[0], i
+        for j, h in enumerate(hyp, 1):
+            prev, row[j] = row[j], min(row[j] + 1, row[j - 1] + 1, prev + (r != h))
+    return row[-1] / max(1, len(ref))
+
+
+def clip_seconds(data: bytes) -> float:
+    with wave.open(io.BytesIO(data)) as wf:
+        return wf.getnframes() / wf.getframerate()
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def bench_backend(name, clips, repeat, preprocess):
+    label = f"{name}{'' if preprocess else ' (raw)'}"
+    start = time.perf_counter()
+    try:
+        transcribe.get_backend(name)
+    except Exception as e:
+        print(f"{label:14s} skipped: {e}")
+        return
+    load = time.perf_counter() - start
+
+    latencies, audio_total, busy_total, errors, wers = [], 0.0, 0.0, 0, []
+    for path, data, reference in clips:
+        seconds = clip_seconds(data)
+        for _ in range(repeat):
+            start = time.perf_counter()
+            try:
+                text = transcribe.transcribe_audio(data, backend=name, preprocess=preprocess)
+            except Exception:
+                text, errors = None, errors + 1
+            elapsed = time.perf_counter() - start
+            latencies.append(elapsed)
+            audio_total += seconds
+            busy_total += elapsed
+            if reference is not None and text is not None:
+                wers.append(word_error_rate(reference, text))
+
+    wer = f"{100 * statistics.mean(wers):5.1f}%" if wers else "   n/a"
+    print(f"{label:14s} load {load:6.2f}s  mean {1000 * statistics.mean(latencies):7.0f} ms  "
+          f"p50 {1000 * percentile(latencies, 50):7.0f} ms  p95 {1000 * percentile(latencies, 95):7.0f} ms  "
+          f"RTF {busy_total / audio_total:5.3f}  WER {wer}  errors {errors}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--fixtures", help="directory of .wav clips (optional .txt references)")
+    parser.add_argument("--backends", default="whisper,vosk,google")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = sorted(glob.glob(os.path.join(args.fixtures, "*.wav"))) if args.fixtures else synthetic_fixtures(tmp)
+        if not paths:
+            parser.error(f"no .wav files in {args.fixtures}")
+        clips = []
+        for path in paths:
+            with open(path, "rb") as f:
+                data = f.read()
+            reference_path = os.path.splitext(path)[0] + ".txt"
+            reference = open(reference_path, encoding="utf-8").read() if os.path.exists(reference_path) else None
+            clips.append((path, data, reference))
+        total = sum(clip_seconds(data) for _, data, _ in clips)
+        print(f"{len(clips)} clips, {total:.1f}s of audio, {args.repeat} runs each\n")
+        for name in args.backends.split(","):
+            for preprocess in (False, True):
+                bench_backend(name.strip(), clips, args.repeat, preprocess)
+        stats = transcribe.get_stats()
+        if stats["bytes_in"]:
+            print(f"\npreprocessing: {stats['bytes_in']} -> {stats['bytes_out']} bytes "
+                  f"({100 * stats['bytes_saved'] / stats['bytes_in']:.0f}% smaller), "
+                  f"{stats['audio_seconds_saved']:.1f}s of audio removed, "
+                  f"{1000 * stats['preprocess_seconds'] / stats['requests']:.1f} ms per clip")
+
+
+if __name__ == "__main__":
+    main()
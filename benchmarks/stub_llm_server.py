@@ -0,0 +1,109 @@
+"""
+Local stub inference server
+Speaks the OpenAI-compatible /v1/chat/completions route used by
+huggingface_hub's InferenceClient, so LLM benchmarks run offline.
+Counts TCP connections to show whether clients reuse keep-alive sessions.
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubLLMHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        with self.server.stats_lock:
+            self.server.stats["connections"] += 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+        with self.server.stats_lock:
+            self.server.stats["requests"] += 1
+        if body.get("stream"):
+            self._stream_reply(body)
+            return
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        reply = self.server.reply
+        payload = json.dumps({
+            "id": "stub",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "stub"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": reply},
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": 0, "completion_tokens": len(reply.split()), "total_tokens": 0},
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+    def _stream_reply(self, body):
+        """Send the canned reply word by word as chunked server-sent events."""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        words = self.server.reply.split(" ")
+        per_token = self.server.latency / max(len(words), 1)
+        for i, word in enumerate(words):
+            time.sleep(per_token)
+            chunk = {
+                "id": "stub",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": body.get("model", "stub"),
+                "choices": [{
+                    "index": 0,
+                    "delta": {"role": "assistant", "content": word if i == 0 else " " + word},
+                    "finish_reason": None,
+                }],
+            }
+            self._write_chunk(f"data: {json.dumps(chunk)}\n\n".encode())
+        self._write_chunk(b"data: [DONE]\n\n")
+        self._write_chunk(b"")
+
+    def _write_chunk(self, data):
+        self.wfile.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+
+def start_stub_server(reply: str = "Tell me about a project you are proud of.", latency: float = 0.0, port: int = 0):
+    """
+    Start the stub server on a background thread.
+
+    Args:
+        reply: Canned assistant reply
+        latency: Simulated generation time in seconds (spread across tokens when streaming)
+        port: Port to bind (0 picks a free one)
+
+    Returns:
+        ThreadingHTTPServer: Running server; its `stats` dict holds connection/request counts
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", port), StubLLMHandler)
+    server.daemon_threads = True
+    server.reply = reply
+    server.latency = latency
+    server.stats = {"connections": 0, "requests": 0}
+    server.stats_lock = threading.Lock()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def server_url(server):
+    host, port = server.server_address
+    return f"http://{host}:{port}"
@@ -0,0 +1,55 @@
+"""
+Minimal synthetic PDF writer for benchmarks (no extra dependencies).
+Produces text-only pages in Helvetica that pypdf can extract.
+"""
+
+
+def _escape(line: str) -> str:
+    return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def make_pdf(pages) -> bytes:
+    """
+    Build a PDF with one page per entry in `pages` (newline-separated lines).
+
+    Returns:
+        bytes: PDF file contents
+    """
+    font_id = 3 + 2 * len(pages)
+    kids = " ".join(f"{3 + 2 * i} 0 R" for i in range(len(pages)))
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        f"<< /Type /Pages /Kids [{kids}] /Count {len(pages)} >>".encode(),
+    ]
+    for i, text in enumerate(pages):
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 {font_id} 0 R >> >> /Contents {4 + 2 * i} 0 R >>".encode()
+        )
+        lines = [f"BT /F1 10 Tf 40 {750 - 12 * j} Td ({_escape(line)}) Tj ET" for j, line in enumerate(text.split("\n"))]
+        stream = "\n".join(lines).encode("latin-1", "replace")
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    out = b"%PDF-1.4\n"
+    offsets = []
+    for i, obj in enumerate(objects):
+        offsets.append(len(out))
+        out += f"{i + 1} 0 obj\n".encode() + obj + b"\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += b"".join(f"{offset:010d} 00000 n \n".encode() for offset in offsets)
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return out
+
+
+def resume_pages(count: int, lines_per_page: int = 55):
+    """Resume-like filler text: `count` pages of project/experience bullet lines."""
+    return [
+        "\n".join(
+            f"Page {p + 1} - Led project {p * lines_per_page + l}: built data pipelines in Python, "
+            f"reduced latency by {l % 40 + 10}% and mentored {l % 5 + 1} engineers."
+            for l in range(lines_per_page)
+        )
+        for p in range(count)
+    ]
@@ -0,0 +1,91 @@
+"""
+Benchmark: local in-process vector index vs. the per-session Astra DB path.
+
+The Astra path is replayed against a local stand-in that charges one network
+round-trip per remote operation (drop table, create table + index, each insert
+batch, each query) on top of the same in-process search, so results isolate
+the cost of going over the network. Set --rtt-ms to your measured Astra latency.
+
+Usage:
+    python benchmarks/vector_backends.py --chunks 8 --queries 20 --rtt-ms 40
+"""
+import argparse
+import math
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_embeddings import HashEmbeddings
+from vector_index import LocalVectorStore
+
+ASTRA_INSERT_BATCH = 16  # Cassandra vector store default batch size
+
+
+class RemoteVectorStoreStandIn(LocalVectorStore):
+    """LocalVectorStore that sleeps one RTT per operation the Astra path performs remotely."""
+
+    def __init__(self, embedding, rtt: float):
+        super().__init__(embedding)
+        self.rtt = rtt
+        time.sleep(rtt)      # DROP TABLE IF EXISTS
+        time.sleep(2 * rtt)  # CREATE TABLE + vector index
+
+    def add_texts(self, texts, metadatas=None, ids=None, **kwargs):
+        texts = list(texts)
+        time.sleep(self.rtt * math.ceil(len(texts) / ASTRA_INSERT_BATCH))
+        return super().add_texts(texts, metadatas, ids)
+
+    def similarity_search_with_score_by_vector(self, embedding, k: int = 4):
+        time.sleep(self.rtt)
+        return super().similarity_search_with_score_by_vector(embedding, k)
+
+
+def run(make_store, chunks, queries):
+    texts = [f"Resume chunk {i}: built data pipelines and led a team of {i} engineers." for i in range(chunks)]
+    start = time.perf_counter()
+    store = make_store()
+    store.add_texts(texts)
+    upload = time.perf_counter() - start
+
+    retriever = store.as_retriever(search_type="similarity", search_kwargs={"k": 3})
+    timings = []
+    for i in range(queries):
+        start = time.perf_counter()
+        retriever.invoke(f"Tell me about project {i}")
+        timings.append(time.perf_counter() - start)
+    return store, upload, statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--chunks", type=int, default=8)
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--rtt-ms", type=float, default=40.0)
+    args = parser.parse_args()
+    embedding = HashEmbeddings()
+
+    _, remote_upload, remote_query = run(
+        lambda: RemoteVectorStoreStandIn(embedding, args.rtt_ms / 1000), args.chunks, args.queries)
+    local, local_upload, local_query = run(lambda: LocalVectorStore(embedding), args.chunks, args.queries)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "resume_bench")
+        start = time.perf_counter()
+        local.save(path)
+        save_ms = 1000 * (time.perf_counter() - start)
+        start = time.perf_counter()
+        LocalVectorStore.load(path, embedding, mmap=True)
+        load_ms = 1000 * (time.perf_counter() - start)
+
+    print(f"{'backend':<22}{'upload ms':>12}{'retrieve p50 ms':>18}")
+    print(f"{'astra (stand-in)':<22}{1000 * remote_upload:>12.2f}{1000 * remote_query:>18.3f}")
+    print(f"{'local numpy index':<22}{1000 * local_upload:>12.2f}{1000 * local_query:>18.3f}")
+    print(f"local persistence: save {save_ms:.2f} ms, mmap load {load_ms:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
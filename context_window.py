@@ -0,0 +1,167 @@
+"""
+Token-budgeted context window
+Keeps the system prompt plus the most recent turns within a token budget,
+strips previously injected "Resume Context" blocks from older turns, and folds
+turns that fall out of the window into a rolling summary.
+"""
+import os
+import re
+from collections import deque
+
+from langchain_core.messages import HumanMessage, SystemMessage
+
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "3000"))
+CONTEXT_MAX_TURNS = int(os.getenv("CONTEXT_MAX_TURNS", "8"))
+SUMMARY_MAX_TOKENS = int(os.getenv("CONTEXT_SUMMARY_MAX_TOKENS", "400"))
+
+RESUME_CONTEXT_MARKER = "\n\nResume Context:\n"
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s")
+
+
+def count_tokens(text: str) -> int:
+    """Approximate token count (~4 characters per token for English text)."""
+    return len(text) // 4 + 1
+
+
+def strip_resume_context(text: str) -> str:
+    """Remove a "Resume Context" block appended to a user message."""
+    return text.split(RESUME_CONTEXT_MARKER, 1)[0]
+
+
+def _brief(text: str, max_words: int = 25) -> str:
+    """First sentence of a message, capped at max_words (used for summary lines)."""
+    text = " ".join(strip_resume_context(text).split())
+    sentence = _SENTENCE_END.split(text, 1)[0]
+    words = sentence.split()
+    if len(words) > max_words:
+        return " ".join(words[:max_words]) + "..."
+    return sentence
+
+
+def _split_turns(messages):
+    """Split messages into (leading system messages, turns); a turn starts at a user message."""
+    system, turns = [], []
+    for message in messages:
+        if isinstance(message, SystemMessage) and not turns:
+            system.append(message)
+        elif isinstance(message, HumanMessage) or not turns:
+            turns.append([message])
+        else:
+            turns[-1].append(message)
+    return system, turns
+
+
+def _turn_tokens(turn, strip: bool) -> int:
+    total = 0
+    for message in turn:
+        content = message.content
+        if strip and isinstance(message, HumanMessage):
+            content = strip_resume_context(content)
+        total += count_tokens(content)
+    return total
+
+
+class ContextWindow:
+    """
+    Per-session prompt builder with an incrementally updated summary.
+
+    Args:
+        token_budget: Maximum approximate prompt tokens sent to the LLM
+        max_turns: Maximum recent turns kept verbatim
+        summary_max_tokens: Cap on the rolling summary (oldest lines dropped first)
+    """
+
+    def __init__(self, token_budget: int = CONTEXT_TOKEN_BUDGET, max_turns: int = CONTEXT_MAX_TURNS,
+                 summary_max_tokens: int = SUMMARY_MAX_TOKENS):
+        self.token_budget = token_budget
+        self.max_turns = max_turns
+        self.summary_max_tokens = summary_max_tokens
+        self.summary_lines = []
+        self.summarized_turns = 0  # turns [0, summarized_turns) live only in the summary
+        self.prompt_tokens = deque(maxlen=100)  # approximate prompt tokens per turn
+        self.full_history_tokens = 0  # what the same turn would cost without windowing
+
+    def _fold(self, turns, upto: int):
+        # Summarize turns that just left the window; earlier ones are already folded
+        for turn in turns[self.summarized_turns:upto]:
+            parts = []
+            for message in turn:
+                speaker = "Candidate" if isinstance(message, HumanMessage) else "Interviewer"
+                parts.append(f"{speaker}: {_brief(message.content)}")
+            self.summary_lines.append("- " + " | ".join(parts))
+        self.summarized_turns = max(self.summarized_turns, upto)
+        while len(self.summary_lines) > 1 and count_tokens("\n".join(self.summary_lines)) > self.summary_max_tokens:
+            self.summary_lines.pop(0)
+
+    def _summary_message(self):
+        if not self.summary_lines:
+            return []
+        return [SystemMessage(content="Summary of the earlier interview:\n" + "\n".join(self.summary_lines))]
+
+    def build(self, messages):
+        """
+        Build the prompt for the current turn.
+
+        Args:
+            messages: Full stored history plus the new messages for this turn
+                      (the last user message is the current one)
+
+        Returns:
+            list: Messages to send to the LLM
+        """
+        system, turns = _split_turns(messages)
+        system_tokens = sum(count_tokens(m.content) for m in system)
+        self.full_history_tokens = sum(count_tokens(m.content) for m in messages)
+
+        current = len(turns) - 1
+        start = max(self.summarized_turns, len(turns) - self.max_turns, 0)
+        while True:
+            self._fold(turns, start)
+            summary = self._summary_message()
+            tokens = system_tokens + sum(count_tokens(m.content) for m in summary)
+            tokens += sum(_turn_tokens(turn, strip=i != current) for i, turn in enumerate(turns[start:], start))
+            if tokens <= self.token_budget or start >= current:
+                break
+            start += 1
+        self.prompt_tokens.append(tokens)
+
+        prompt = list(system) + summary
+        for i, turn in enumerate(turns[start:], start):
+            for message in turn:
+                if i != current and isinstance(message, HumanMessage) and RESUME_CONTEXT_MARKER in message.content:
+                    message = HumanMessage(content=strip_resume_context(message.content))
+                prompt.append(message)
+        return prompt
+
+    def to_dict(self) -> dict:
+        """Serializable state (used by shared session backends)."""
+        return {
+            "token_budget": self.token_budget,
+            "max_turns": self.max_turns,
+            "summary_max_tokens": self.summary_max_tokens,
+            "summary_lines": self.summary_lines,
+            "summarized_turns": self.summarized_turns,
+            "prompt_tokens": list(self.prompt_tokens),
+            "full_history_tokens": self.full_history_tokens,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        window = cls(data["token_budget"], data["max_turns"], data["summary_max_tokens"])
+        window.summary_lines = data["summary_lines"]
+        window.summarized_turns = data["summarized_turns"]
+        window.prompt_tokens.extend(data["prompt_tokens"])
+        window.full_history_tokens = data["full_history_tokens"]
+        return window
+
+    def stats(self) -> dict:
+        """Per-turn prompt token counts for monitoring."""
+        return {
+            "last_prompt_tokens": self.prompt_tokens[-1] if self.prompt_tokens else 0,
+            "full_history_tokens": self.full_history_tokens,
+            "prompt_tokens_per_turn": list(self.prompt_tokens),
+            "summarized_turns": self.summarized_turns,
+            "summary_tokens": count_tokens("\n".join(self.summary_lines)) if self.summary_lines else 0,
+            "token_budget": self.token_budget,
+        }
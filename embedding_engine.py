@@ -0,0 +1,274 @@
+"""
+Shared embedding engine
+Loads the sentence-transformers model once per process and reuses it for every
+resume upload and retrieval instead of re-creating HuggingFaceEmbeddings per request.
+
+Encodes go through a micro-batcher: concurrent requests (upload batches,
+retrieval queries from several sessions) are coalesced into one forward pass
+of up to EMBED_BATCH_MAX texts, waiting at most EMBED_BATCH_WAIT_MS for
+company, on a dedicated worker thread (EMBED_TORCH_THREADS torch threads).
+Queries from interactive chat turns are served ahead of queued upload batches.
+"""
+import itertools
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from langchain_core.embeddings import Embeddings
+
+EMBEDDING_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"  # Faster, smaller model
+
+EMBED_BATCH_MAX = int(os.getenv("EMBED_BATCH_MAX", "64"))  # texts per forward pass
+EMBED_BATCH_WAIT_MS = float(os.getenv("EMBED_BATCH_WAIT_MS", "5"))  # max wait for more requests
+EMBED_TORCH_THREADS = int(os.getenv("EMBED_TORCH_THREADS", "0"))  # 0 = torch default
+
+# Batcher priorities (lower is served first)
+PRIORITY_INTERACTIVE = 0  # retrieval queries for a chat turn
+PRIORITY_BULK = 1  # resume ingestion batches
+
+# Process-wide engine (created lazily on first use, or eagerly via warm_up())
+_engine = None
+_engine_lock = threading.Lock()
+
+# Load time vs. encode time, so we can see what the singleton actually saves
+_stats_lock = threading.Lock()
+_stats = {
+    "load_seconds": 0.0,
+    "loaded_pid": None,
+    "warmup_seconds": 0.0,
+    "encode_calls": 0,
+    "encode_texts": 0,
+    "encode_seconds_total": 0.0,
+    "last_encode_seconds": 0.0,
+    "batches": 0,
+    "batched_requests": 0,
+    "max_batch_texts": 0,
+    "queue_wait_seconds_total": 0.0,
+}
+
+
+def _record(count: int, elapsed: float):
+    with _stats_lock:
+        _stats["encode_calls"] += 1
+        _stats["encode_texts"] += count
+        _stats["encode_seconds_total"] += elapsed
+        _stats["last_encode_seconds"] = elapsed
+
+
+class EmbeddingBatcher:
+    """
+    Coalesces concurrent encode requests into micro-batches on one worker thread.
+
+    Args:
+        encode: Callable(list of texts) -> list of vectors (one forward pass)
+        max_batch: Texts per batch; a larger single request runs as its own batch
+        max_wait: Seconds to wait for more requests once one is queued
+        torch_threads: torch intra-op threads for the worker (0 leaves the default)
+    """
+
+    def __init__(self, encode, max_batch: int = EMBED_BATCH_MAX, max_wait: float = EMBED_BATCH_WAIT_MS / 1000,
+                 torch_threads: int = EMBED_TORCH_THREADS):
+        self.encode = encode
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max_wait
+        self.torch_threads = torch_threads
+        self._queue = queue.PriorityQueue()
+        self._sequence = itertools.count()  # FIFO within a priority
+        self._worker = None
+        self._worker_pid = None
+        self._lock = threading.Lock()
+
+    def submit(self, texts, priority: int = PRIORITY_BULK) -> Future:
+        """
+        Queue texts for encoding.
+
+        Args:
+            texts: Texts to encode
+            priority: PRIORITY_INTERACTIVE requests are batched before PRIORITY_BULK ones
+
+        Returns:
+            Future: Resolves to the list of vectors, in the order of texts
+        """
+        future = Future()
+        texts = list(texts)
+        if not texts:
+            future.set_result([])
+            return future
+        with self._lock:
+            # Started lazily per process: threads don't survive a gunicorn fork
+            if self._worker is None or self._worker_pid != os.getpid():
+                self._queue = queue.PriorityQueue()
+                self._worker = threading.Thread(target=self._run, name="embed-batcher", daemon=True)
+                self._worker_pid = os.getpid()
+                self._worker.start()
+            self._queue.put((priority, next(self._sequence), texts, future, time.perf_counter()))
+        return future
+
+    def _collect(self, first):
+        batch, size = [first], len(first[2])
+        deadline = time.perf_counter() + self.max_wait
+        while size < self.max_batch:
+            timeout = deadline - time.perf_counter()
+            try:
+                item = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if size + len(item[2]) > self.max_batch:
+                # Doesn't fit: back in the queue (keeping its place) for the next batch
+                self._queue.put(item)
+                break
+            batch.append(item)
+            size += len(item[2])
+        return batch
+
+    def _run(self):
+        if self.torch_threads > 0:
+            try:
+                import torch
+                torch.set_num_threads(self.torch_threads)
+            except ImportError:
+                pass
+        while True:
+            batch = self._collect(self._queue.get())
+            texts = [text for _, _, item_texts, _, _ in batch for text in item_texts]
+            started = time.perf_counter()
+            try:
+                vectors = self.encode(texts)
+            except Exception as e:
+                for _, _, _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+            elapsed = time.perf_counter() - started
+            with _stats_lock:
+                _stats["batches"] += 1
+                _stats["batched_requests"] += len(batch)
+                _stats["max_batch_texts"] = max(_stats["max_batch_texts"], len(texts))
+                _stats["queue_wait_seconds_total"] += sum(started - queued for _, _, _, _, queued in batch)
+            _record(len(texts), elapsed)
+            offset = 0
+            for _, _, item_texts, future, _ in batch:
+                future.set_result(vectors[offset:offset + len(item_texts)])
+                offset += len(item_texts)
+
+
+class TimedEmbeddings(Embeddings):
+    """
+    Thin wrapper around the loaded HuggingFaceEmbeddings model.
+    Encodes run through the micro-batcher, which records how long each batch
+    takes so per-upload cost can be compared against the one-time model load.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        # Queries and documents share one batch: this model encodes both the same way
+        self.batcher = EmbeddingBatcher(model.embed_documents)
+
+    def embed_documents_async(self, texts) -> Future:
+        """Queue documents on the micro-batcher; the Future resolves to their vectors."""
+        return self.batcher.submit(texts)
+
+    def embed_query_async(self, text) -> Future:
+        """Queue a query on the micro-batcher; the Future resolves to its vector."""
+        future = Future()
+
+        def unwrap(batch):
+            if batch.exception() is not None:
+                future.set_exception(batch.exception())
+            else:
+                future.set_result(batch.result()[0])
+
+        self.batcher.submit([text], PRIORITY_INTERACTIVE).add_done_callback(unwrap)
+        return future
+
+    def embed_documents(self, texts):
+        return self.embed_documents_async(texts).result()
+
+    def embed_query(self, text):
+        return self.embed_query_async(text).result()
+
+
+def embed_documents_async(embeddings, texts) -> Future:
+    """
+    Start encoding texts with any Embeddings object: through the micro-batcher
+    when it has one, otherwise synchronously into an already resolved Future.
+    """
+    if hasattr(embeddings, "embed_documents_async"):
+        return embeddings.embed_documents_async(texts)
+    future = Future()
+    try:
+        future.set_result(embeddings.embed_documents(texts))
+    except Exception as e:
+        future.set_exception(e)
+    return future
+
+
+def _load_model():
+    """Load the sentence-transformers model on CPU (slow - call once per process)."""
+    from langchain_huggingface import HuggingFaceEmbeddings
+
+    return HuggingFaceEmbeddings(
+        model_name=EMBEDDING_MODEL_NAME,
+        model_kwargs={'device': 'cpu'},
+        encode_kwargs={'normalize_embeddings': True}
+    )
+
+
+def get_embeddings():
+    """
+    Get the shared embedding engine, loading the model on first use.
+    Thread-safe: concurrent first calls wait for a single load.
+
+    Returns:
+        TimedEmbeddings: Embeddings object usable by any LangChain vector store
+    """
+    global _engine
+    if _engine is not None:
+        return _engine
+    with _engine_lock:
+        if _engine is None:
+            start = time.perf_counter()
+            model = _load_model()
+            elapsed = time.perf_counter() - start
+            with _stats_lock:
+                _stats["load_seconds"] = elapsed
+                _stats["loaded_pid"] = os.getpid()
+            print(f"[INFO] Embeddings model loaded in {elapsed:.2f}s (pid {os.getpid()})")
+            _engine = TimedEmbeddings(model)
+    return _engine
+
+
+def warm_up():
+    """
+    Load the model and run one throwaway encode so the first real upload
+    does not pay torch initialization cost.
+
+    Returns:
+        bool: True if the engine is ready, False if loading failed
+    """
+    try:
+        engine = get_embeddings()
+        start = time.perf_counter()
+        engine.model.embed_query("warm-up")
+        elapsed = time.perf_counter() - start
+        with _stats_lock:
+            _stats["warmup_seconds"] = elapsed
+        print(f"[INFO] Embeddings warm-up encode took {elapsed:.3f}s")
+        return True
+    except Exception as e:
+        print(f"[WARN] Embeddings warm-up failed: {e}")
+        return False
+
+
+def get_stats():
+    """Return a snapshot of load/encode timings for this process."""
+    with _stats_lock:
+        stats = dict(_stats)
+    calls = stats["encode_calls"]
+    stats["avg_encode_seconds"] = stats["encode_seconds_total"] / calls if calls else 0.0
+    batches = stats["batches"]
+    stats["avg_batch_texts"] = stats["encode_texts"] / calls if calls else 0.0
+    stats["avg_requests_per_batch"] = stats["batched_requests"] / batches if batches else 0.0
+    stats["loaded"] = _engine is not None
+    return stats
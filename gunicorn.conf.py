@@ -0,0 +1,32 @@
+"""
+Gunicorn configuration
+Picked up automatically by `gunicorn app:app` from the working directory.
+"""
+import os
+
+workers = int(os.getenv("GUNICORN_WORKERS", "1"))
+
+# Threaded workers: an open /speech_stream WebSocket holds its request thread for
+# the whole recording, so a sync worker would stop serving everything else and be
+# killed at the 30s timeout. gthread keeps serving on the other threads, and the
+# timeout only fires if the worker process itself stops heartbeating.
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gthread")
+threads = int(os.getenv("GUNICORN_THREADS", "8"))
+
+# GUNICORN_PRELOAD=1 imports the app (and loads the embeddings model) once in the
+# master before forking, so every worker shares the model weights copy-on-write.
+preload_app = os.getenv("GUNICORN_PRELOAD", "0") == "1"
+if preload_app:
+    # Only load in the master; torch thread pools are not fork-safe, so the
+    # warm-up encode runs in each worker after the fork instead.
+    os.environ.setdefault("EMBEDDINGS_PRELOAD_ONLY", "1")
+
+
+def post_fork(server, worker):
+    """Run the embeddings warm-up encode and load local STT models inside each freshly forked worker."""
+    if preload_app and os.getenv("EMBEDDINGS_WARMUP", "1") == "1":
+        import embedding_engine
+        embedding_engine.warm_up()
+    if preload_app and os.getenv("STT_BACKEND", "google") != "google":
+        import transcribe
+        transcribe.get_backend()
@@ -0,0 +1,291 @@
+"""
+Background resume ingestion
+Runs resume processing on a bounded thread pool so /upload_resume returns a
+job id immediately instead of holding a gunicorn worker for the whole
+parse/embed/index pipeline. Job records (status, current stage, per-stage
+timings) live in a session store, so with a shared SESSION_BACKEND any worker
+can answer status requests.
+"""
+import io
+import multiprocessing
+import os
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+
+import embedding_engine
+import metrics
+import session_store
+
+INGEST_MAX_WORKERS = int(os.getenv("INGEST_MAX_WORKERS", "2"))
+INGEST_MAX_QUEUE = int(os.getenv("INGEST_MAX_QUEUE", "16"))  # queued + running jobs per process
+INGEST_JOB_TTL = float(os.getenv("INGEST_JOB_TTL_SECONDS", "3600"))
+
+
+class QueueFullError(Exception):
+    """Raised when the ingestion queue is at its depth limit."""
+
+
+class IngestionQueue:
+    """
+    Bounded background job runner with stage progress tracking.
+
+    Args:
+        max_workers: Jobs processed concurrently
+        max_queue: Maximum queued + running jobs before submit() is rejected
+    """
+
+    def __init__(self, max_workers: int = INGEST_MAX_WORKERS, max_queue: int = INGEST_MAX_QUEUE):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = None
+        self._executor_pid = None
+        self._pending = 0
+        self._lock = threading.Lock()
+        self.jobs = session_store.create_store(
+            "ingestion_jobs", session_store.JSONSerializer(), max_entries=1000, idle_ttl=INGEST_JOB_TTL
+        )
+
+    def _get_executor(self):
+        # Created lazily per process: pool threads don't survive a gunicorn fork
+        if self._executor is None or self._executor_pid != os.getpid():
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="ingest")
+            self._executor_pid = os.getpid()
+            self._pending = 0
+        return self._executor
+
+    def depth(self) -> int:
+        """Queued + running jobs in this process."""
+        with self._lock:
+            return self._pending
+
+    def submit(self, func, *args, **kwargs) -> str:
+        """
+        Queue func(*args, progress=callback, **kwargs) as a background job.
+
+        Returns:
+            str: Job id for status()
+
+        Raises:
+            QueueFullError: If max_queue jobs are already queued or running
+        """
+        with self._lock:
+            executor = self._get_executor()
+            if self._pending >= self.max_queue:
+                raise QueueFullError(f"Ingestion queue is full ({self.max_queue} jobs)")
+            self._pending += 1
+        job_id = uuid.uuid4().hex
+        trace_id = metrics.current_trace_id() or job_id[:16]
+        self.jobs.set(job_id, {
+            "job_id": job_id,
+            "trace_id": trace_id,
+            "status": "queued",
+            "stage": None,
+            "stages": {},
+            "created_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "error": None,
+        })
+        executor.submit(self._run, job_id, func, args, kwargs)
+        return job_id
+
+    def _run(self, job_id, func, args, kwargs):
+        job = self.jobs.get(job_id)
+        # Same trace id as the request that queued the job, with its own stage breakdown
+        job_trace = metrics.start_trace(job["trace_id"])
+        job["status"] = "running"
+        job["started_at"] = time.time()
+        stage_started = [time.perf_counter()]
+
+        def progress(stage: str):
+            # Close the current stage's timing and move on to the next one
+            now = time.perf_counter()
+            if job["stage"] is not None:
+                job["stages"][job["stage"]] = round(now - stage_started[0], 4)
+            job["stage"] = stage
+            stage_started[0] = now
+            self.jobs.set(job_id, job)
+
+        self.jobs.set(job_id, job)
+        try:
+            ok = func(*args, progress=progress, **kwargs)
+            progress(None)
+            job["status"] = "succeeded" if ok else "failed"
+            if not ok:
+                job["error"] = "Failed to process resume"
+        except Exception as e:
+            traceback.print_exc()
+            job["status"] = "failed"
+            job["error"] = str(e)
+        finally:
+            job["finished_at"] = time.time()
+            self.jobs.set(job_id, job)
+            elapsed = job["finished_at"] - job["started_at"]
+            metrics.log(f"Ingestion job {job_id} {job['status']} in {elapsed * 1000:.0f} ms ({job_trace.summary()})")
+            metrics.observe("ingest_job", elapsed, status=job["status"])
+            metrics.end_trace()
+            with self._lock:
+                self._pending -= 1
+
+    def status(self, job_id: str):
+        """Job record with total elapsed time, or None for unknown/expired ids."""
+        job = self.jobs.get(job_id)
+        if job is None:
+            return None
+        end = job["finished_at"] or time.time()
+        job["elapsed_seconds"] = round(end - job["created_at"], 4)
+        if job["started_at"]:
+            job["queued_seconds"] = round(job["started_at"] - job["created_at"], 4)
+        return job
+
+
+# Process-wide queue used by /upload_resume
+resume_jobs = IngestionQueue()
+metrics.register_gauge("ingest_queue_depth", "Resume ingestion jobs queued or running", resume_jobs.depth)
+
+
+# ---------------------------------------------------------------------------
+# Streaming PDF ingestion: parallel page extraction -> chunking -> batched
+# embedding -> concurrent bulk writes
+# ---------------------------------------------------------------------------
+
+INGEST_PAGE_WORKERS = int(os.getenv("INGEST_PAGE_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Smaller PDFs extract serially: starting the forkserver pool costs ~1.5s.
+# Measured with 2 page workers: 20 pages took 0.51s serially vs 2.09s pooled,
+# 200 pages 4.90s vs 2.83s. 200 is the smallest size measured to gain; the
+# crossover between the two was not measured
+INGEST_PARALLEL_MIN_PAGES = int(os.getenv("INGEST_PARALLEL_MIN_PAGES", "200"))
+INGEST_EMBED_BATCH = int(os.getenv("INGEST_EMBED_BATCH", "32"))
+INGEST_WRITE_CONCURRENCY = int(os.getenv("INGEST_WRITE_CONCURRENCY", "4"))
+INGEST_EMBED_AHEAD = int(os.getenv("INGEST_EMBED_AHEAD", "2"))  # batches queued on the embedding service
+
+_page_reader = None  # PdfReader opened once per extraction process
+
+
+def _init_page_reader(pdf_data: bytes):
+    global _page_reader
+    from pypdf import PdfReader
+    _page_reader = PdfReader(io.BytesIO(pdf_data))
+
+
+def _extract_page(index: int) -> str:
+    return _page_reader.pages[index].extract_text()
+
+
+def iter_page_texts(pdf_data: bytes, workers: int = INGEST_PAGE_WORKERS):
+    """
+    Yield (page_index, text) in page order. Large PDFs are extracted in a
+    process pool (each process parses the PDF once, then pulls page indices).
+    """
+    from pypdf import PdfReader
+
+    reader = PdfReader(io.BytesIO(pdf_data))
+    page_count = len(reader.pages)
+    if workers <= 1 or page_count < INGEST_PARALLEL_MIN_PAGES:
+        for i, page in enumerate(reader.pages):
+            yield i, page.extract_text()
+        return
+    # forkserver/spawn: forking a threaded gunicorn worker directly is unsafe
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+    with ProcessPoolExecutor(max_workers=min(workers, page_count), mp_context=context,
+                             initializer=_init_page_reader, initargs=(pdf_data,)) as pool:
+        chunksize = max(1, page_count // (workers * 4))
+        yield from enumerate(pool.map(_extract_page, range(page_count), chunksize=chunksize))
+
+
+def ingest_pdf(pdf_data: bytes, filename: str, text_splitter, vectorstore, store_embeddings, embeddings,
+               batch_size: int = INGEST_EMBED_BATCH, write_concurrency: int = INGEST_WRITE_CONCURRENCY,
+               page_workers: int = INGEST_PAGE_WORKERS):
+    """
+    Stream a PDF into a vector store: pages are chunked as they arrive, chunks
+    are queued on the embedding service in fixed-size batches (up to
+    INGEST_EMBED_AHEAD in flight while later pages are extracted) and each
+    batch is written while the next ones are being embedded. Only the batches
+    in flight are held in memory besides the final chunk list.
+
+    Args:
+        pdf_data: Raw PDF bytes
+        filename: Source name stored in chunk metadata
+        text_splitter: LangChain text splitter used per page
+        vectorstore: Target vector store (built on store_embeddings)
+        store_embeddings: resume_cache.PrecomputedEmbeddings the store embeds through
+        embeddings: Real embeddings engine
+        batch_size: Chunks per embedding batch
+        write_concurrency: Concurrent bulk writes to the vector store
+        page_workers: Processes used for page extraction
+
+    Returns:
+        tuple: (chunk Documents, float32 vector matrix, timings dict)
+    """
+    from langchain_core.documents import Document
+
+    splits, vectors = [], []
+    timings = {"extract_split_seconds": 0.0, "extract_seconds": 0.0, "split_seconds": 0.0,
+               "embed_seconds": 0.0, "embed_wait_seconds": 0.0, "write_wait_seconds": 0.0, "pages": 0}
+    batch = []
+    pending = []  # [docs, future, submitted, finished] per batch on the embedding service
+    writes = []
+
+    def insert(docs):
+        with metrics.span("vector_insert"):
+            vectorstore.add_documents(docs)
+
+    def complete(writer):
+        # Oldest batch first, so chunks and vectors stay in document order
+        docs, future, submitted, _ = item = pending.pop(0)
+        start = time.perf_counter()
+        batch_vectors = np.asarray(future.result(), dtype=np.float32)
+        timings["embed_wait_seconds"] += time.perf_counter() - start
+        embed_seconds = (item[3] or time.perf_counter()) - submitted
+        timings["embed_seconds"] += embed_seconds
+        metrics.observe("embed", embed_seconds)
+        store_embeddings.add([doc.page_content for doc in docs], batch_vectors)
+        writes.append(writer.submit(metrics.bind(insert), docs))
+        splits.extend(docs)
+        vectors.append(batch_vectors)
+
+    def flush(writer):
+        if not batch:
+            return
+        item = [list(batch), None, time.perf_counter(), None]
+        item[1] = embedding_engine.embed_documents_async(embeddings, [doc.page_content for doc in batch])
+        item[1].add_done_callback(lambda _: item.__setitem__(3, time.perf_counter()))
+        pending.append(item)
+        batch.clear()
+        while len(pending) > max(0, INGEST_EMBED_AHEAD):
+            complete(writer)
+
+    with ThreadPoolExecutor(max_workers=max(1, write_concurrency), thread_name_prefix="ingest-write") as writer:
+        start = time.perf_counter()
+        for index, text in iter_page_texts(pdf_data, page_workers):
+            extracted = time.perf_counter()
+            page = Document(page_content=text, metadata={"source": filename, "page": index})
+            batch.extend(text_splitter.split_documents([page]))
+            timings["pages"] += 1
+            timings["extract_seconds"] += extracted - start
+            timings["split_seconds"] += time.perf_counter() - extracted
+            timings["extract_split_seconds"] += time.perf_counter() - start
+            while len(batch) >= batch_size:
+                overflow = batch[batch_size:]
+                del batch[batch_size:]
+                flush(writer)
+                batch.extend(overflow)
+            start = time.perf_counter()
+        flush(writer)
+        while pending:
+            complete(writer)
+        start = time.perf_counter()
+        for future in writes:
+            future.result()  # surface write errors
+        timings["write_wait_seconds"] = time.perf_counter() - start
+    # Extraction and splitting interleave page by page; recorded once per document
+    metrics.observe("pdf_extract", timings["extract_seconds"])
+    metrics.observe("split", timings["split_seconds"])
+    vectors = np.vstack(vectors) if vectors else np.zeros((0, 0), dtype=np.float32)
+    return splits, vectors, timings
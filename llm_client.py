@@ -0,0 +1,160 @@
+"""
+LLM client cache
+Reuses ChatHuggingFace/HuggingFaceEndpoint objects across /chat turns and routes
+them through one pooled keep-alive HTTP session, so consecutive turns skip
+client construction and new TLS handshakes.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# Model settings used by the interviewer (one cached client per token + config)
+DEFAULT_LLM_CONFIG = {
+    "repo_id": "openai/gpt-oss-120b",
+    "task": "conversational",
+    "max_new_tokens": 512,
+    "do_sample": False,
+    "repetition_penalty": 1.03,
+    "provider": "auto",
+}
+
+# Maximum number of (token, config) clients kept alive per process
+CLIENT_CACHE_SIZE = int(os.getenv("LLM_CLIENT_CACHE_SIZE", "8"))
+
+# Connection pool sizing for the shared HTTP session
+POOL_MAX_CONNECTIONS = int(os.getenv("LLM_POOL_MAX_CONNECTIONS", "20"))
+POOL_KEEPALIVE_SECONDS = float(os.getenv("LLM_POOL_KEEPALIVE_SECONDS", "60"))
+
+_clients = OrderedDict()  # (token, config items) -> ChatHuggingFace
+_clients_lock = threading.Lock()
+_http_configured = False
+
+_stats = {
+    "hits": 0,
+    "misses": 0,
+    "evictions": 0,
+    "build_seconds_total": 0.0,
+}
+
+
+def _pooled_httpx_client():
+    """httpx client for huggingface_hub >= 1.0 with keep-alive connection pooling."""
+    import httpx
+    try:
+        from huggingface_hub.utils._http import hf_request_event_hook
+        event_hooks = {"request": [hf_request_event_hook]}
+    except ImportError:
+        event_hooks = {}
+    return httpx.Client(
+        event_hooks=event_hooks,
+        follow_redirects=True,
+        timeout=None,
+        limits=httpx.Limits(
+            max_connections=POOL_MAX_CONNECTIONS,
+            max_keepalive_connections=POOL_MAX_CONNECTIONS,
+            keepalive_expiry=POOL_KEEPALIVE_SECONDS,
+        ),
+    )
+
+
+def _pooled_requests_session():
+    """requests session for huggingface_hub < 1.0 with a sized connection pool."""
+    import requests
+    from requests.adapters import HTTPAdapter
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=POOL_MAX_CONNECTIONS, pool_maxsize=POOL_MAX_CONNECTIONS)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def configure_http_pool():
+    """
+    Install the pooled keep-alive session as huggingface_hub's HTTP backend.
+    Safe to call repeatedly; only the first call does anything.
+    """
+    global _http_configured
+    if _http_configured:
+        return
+    import huggingface_hub
+    if hasattr(huggingface_hub, "set_client_factory"):
+        huggingface_hub.set_client_factory(_pooled_httpx_client)
+    elif hasattr(huggingface_hub, "configure_http_backend"):
+        huggingface_hub.configure_http_backend(backend_factory=_pooled_requests_session)
+    _http_configured = True
+
+
+def _build_chat_model(token, config):
+    from langchain_huggingface import ChatHuggingFace, HuggingFaceEndpoint
+
+    endpoint_kwargs = dict(config)
+    endpoint_url = endpoint_kwargs.pop("endpoint_url", None)
+    if endpoint_url:
+        # Local/self-hosted endpoint (e.g. a stub server): no repo_id/provider routing
+        endpoint_kwargs.pop("repo_id", None)
+        endpoint_kwargs.pop("provider", None)
+        endpoint_kwargs["endpoint_url"] = endpoint_url
+    llm = HuggingFaceEndpoint(huggingfacehub_api_token=token, **endpoint_kwargs)
+    return ChatHuggingFace(llm=llm)
+
+
+def get_chat_model(token: str = None, **overrides):
+    """
+    Get a cached ChatHuggingFace client for this API token and model config.
+
+    Args:
+        token: HuggingFace API token (defaults to HUGGINGFACEHUB_API_TOKEN)
+        **overrides: Model settings overriding DEFAULT_LLM_CONFIG
+
+    Returns:
+        ChatHuggingFace: Client reused across calls with the same token and config
+    """
+    if token is None:
+        token = os.getenv("HUGGINGFACEHUB_API_TOKEN")
+    config = dict(DEFAULT_LLM_CONFIG)
+    endpoint_url = os.getenv("LLM_ENDPOINT_URL")
+    if endpoint_url:
+        config["endpoint_url"] = endpoint_url
+    config.update(overrides)
+    key = (token, tuple(sorted(config.items())))
+
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is not None:
+            _clients.move_to_end(key)
+            _stats["hits"] += 1
+            return client
+        _stats["misses"] += 1
+
+    # Build outside the lock so a slow construction doesn't stall other sessions
+    configure_http_pool()
+    start = time.perf_counter()
+    client = _build_chat_model(token, config)
+    elapsed = time.perf_counter() - start
+
+    with _clients_lock:
+        _stats["build_seconds_total"] += elapsed
+        existing = _clients.get(key)
+        if existing is not None:
+            _clients.move_to_end(key)
+            return existing
+        _clients[key] = client
+        while len(_clients) > CLIENT_CACHE_SIZE:
+            _clients.popitem(last=False)
+            _stats["evictions"] += 1
+    return client
+
+
+def clear_clients():
+    """Drop all cached clients (e.g. after an API key change)."""
+    with _clients_lock:
+        _clients.clear()
+
+
+def get_stats():
+    """Return cache hit/miss counters for this process."""
+    with _clients_lock:
+        stats = dict(_stats)
+        stats["cached_clients"] = len(_clients)
+    return stats
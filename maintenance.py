@@ -0,0 +1,177 @@
+"""
+Maintenance tasks
+Dropping the resume_* Astra DB tables left over from earlier deployments used
+to run at import time in every worker. It now runs once per deployment,
+either as a background subprocess started by the first worker to claim it,
+or from the command line as a deploy step:
+
+    python maintenance.py cleanup-tables
+
+STARTUP_TABLE_CLEANUP=background (default) schedules the background run on
+startup; set it to "off" when the deploy step runs the command instead.
+
+Resume table names end in their creation time (resume_<session>_<epoch>), and
+a cleanup only drops tables created before it was scheduled, so uploads that
+arrive while it runs keep their tables whatever the session backend. The
+claim is held for the whole deployment (DEPLOYMENT_ID): restarted workers do
+not run it again.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+STARTUP_TABLE_CLEANUP = os.getenv("STARTUP_TABLE_CLEANUP", "background")
+DROP_CONCURRENCY = int(os.getenv("MAINTENANCE_DROP_CONCURRENCY", "8"))
+MAINTENANCE_DIR = os.getenv("MAINTENANCE_DIR", os.path.join(tempfile.gettempdir(), "interviewiq_maintenance"))
+# Workers of one server share a parent process (gunicorn/uvicorn master)
+DEPLOYMENT_ID = os.getenv("DEPLOYMENT_ID", str(os.getppid()))
+
+
+def resume_table_name(session_id: str, created: float = None) -> str:
+    """
+    Astra table for one resume upload.
+
+    Args:
+        session_id: Session the resume belongs to
+        created: Creation time (defaults to now)
+
+    Returns:
+        str: resume_<session>_<epoch seconds> (table names can't have dashes)
+    """
+    return f"resume_{session_id.replace('-', '_')}_{int(created or time.time())}"
+
+
+def _table_created(table_name: str) -> int:
+    """Creation time recorded in a resume table name; 0 for tables named before it was."""
+    stamp = table_name.rsplit("_", 1)[-1]
+    return int(stamp) if stamp.isdigit() else 0
+
+
+def _active_tables():
+    """Resume tables referenced by live sessions in the shared session backend."""
+    import session_store
+    specs = session_store.create_store("resume_specs", session_store.JSONSerializer())
+    return {spec.get("table_name") for _, spec in specs.items() if spec.get("backend") == "astra"}
+
+
+def cleanup_resume_tables(concurrency: int = DROP_CONCURRENCY, created_before: float = None) -> int:
+    """
+    Drop the resume_* tables created before created_before, issuing the DROPs
+    concurrently. Tables still referenced by a session in a shared
+    SESSION_BACKEND are kept.
+
+    Args:
+        concurrency: Maximum DROP TABLE statements in flight
+        created_before: Epoch seconds; newer tables are kept (defaults to now)
+
+    Returns:
+        int: Number of tables successfully dropped
+    """
+    created_before = int(created_before or time.time())
+    try:
+        # Load Astra DB credentials from environment
+        astra_token = os.getenv("ASTRA_DB_APPLICATION_TOKEN")
+        astra_db_id = os.getenv("ASTRA_DB_ID")
+
+        if not astra_token or not astra_db_id:
+            print("[WARN] Astra DB credentials not found, skipping cleanup")
+            return 0
+
+        import cassio
+        from cassio.config import check_resolve_session, check_resolve_keyspace
+
+        start = time.perf_counter()
+        cassio.init(token=astra_token, database_id=astra_db_id)
+        print("[INFO] Connected to Astra DB for cleanup")
+        session = check_resolve_session()
+        keyspace = check_resolve_keyspace()
+        if not session or not keyspace:
+            print("[WARN] Could not resolve cassio session/keyspace")
+            return 0
+
+        query = f"SELECT table_name FROM system_schema.tables WHERE keyspace_name = '{keyspace}';"
+        keep = _active_tables()
+        tables = [row.table_name for row in session.execute(query)
+                  if row.table_name.startswith('resume_') and row.table_name not in keep
+                  and _table_created(row.table_name) < created_before]
+        if not tables:
+            print("[INFO] No resume tables found to clean up")
+            return 0
+
+        def drop(table_name):
+            try:
+                session.execute(f"DROP TABLE IF EXISTS {keyspace}.{table_name};")
+                print(f"[INFO] Dropped table: {table_name}")
+                return True
+            except Exception as e:
+                print(f"[WARN] Could not drop {table_name}: {e}")
+                return False
+
+        with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="drop-table") as pool:
+            dropped_count = sum(pool.map(drop, tables))
+        print(f"[INFO] Cleanup complete: {dropped_count}/{len(tables)} resume table(s) dropped "
+              f"in {time.perf_counter() - start:.2f}s")
+        return dropped_count
+
+    except Exception as e:
+        print(f"[ERROR] Cleanup failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return 0
+
+
+def _claim(task: str) -> bool:
+    """
+    Claim a once-per-deployment task; only the first caller of a DEPLOYMENT_ID
+    gets True, however long ago the claim was made.
+    """
+    os.makedirs(MAINTENANCE_DIR, exist_ok=True)
+    path = os.path.join(MAINTENANCE_DIR, f"{task}-{DEPLOYMENT_ID}")
+    try:
+        os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+        return True
+    except FileExistsError:
+        return False
+
+
+def schedule_startup_cleanup():
+    """
+    Start the table cleanup in a separate process unless another worker of
+    this deployment already did, or STARTUP_TABLE_CLEANUP is "off". Only
+    tables created before this call are dropped. Never blocks server startup.
+
+    Returns:
+        bool: True if this call started the cleanup
+    """
+    if STARTUP_TABLE_CLEANUP != "background":
+        return False
+    if not os.getenv("ASTRA_DB_APPLICATION_TOKEN") or not os.getenv("ASTRA_DB_ID"):
+        return False
+    if not _claim("cleanup-tables"):
+        return False
+    # A subprocess keeps cassio and its driver threads out of (pre-fork) server processes
+    subprocess.Popen([sys.executable, os.path.abspath(__file__), "cleanup-tables",
+                      "--created-before", str(int(time.time()))],
+                     cwd=os.path.dirname(os.path.abspath(__file__)), start_new_session=True)
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="InterviewIQ maintenance tasks")
+    parser.add_argument("task", choices=["cleanup-tables"])
+    parser.add_argument("--concurrency", type=int, default=DROP_CONCURRENCY)
+    parser.add_argument("--created-before", type=float, default=None,
+                        help="keep tables created at or after this epoch time (default: now)")
+    args = parser.parse_args()
+    if args.task == "cleanup-tables":
+        from dotenv import load_dotenv
+        load_dotenv()
+        cleanup_resume_tables(args.concurrency, args.created_before)
+
+
+if __name__ == "__main__":
+    main()
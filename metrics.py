@@ -0,0 +1,214 @@
+"""
+Latency metrics and request tracing
+Timing spans around each pipeline stage (PDF extract, split, embed, vector
+insert, retrieve, LLM, STT, ...) feed per-stage latency histograms that are
+exposed in Prometheus text format on /metrics. Every request runs inside a
+trace with its own id: log lines written through log() carry it, and the
+request's summary line breaks its latency down by stage, e.g.
+
+    [INFO] [trace=3f2a9c1e] POST /chat 200 in 812 ms (retrieve 41 ms, llm_invoke 760 ms, history 3 ms)
+
+Metrics are per process; scrape each worker (or run one worker) for totals.
+"""
+import contextlib
+import contextvars
+import os
+import re
+import threading
+import time
+import uuid
+
+METRICS_PREFIX = "interviewiq"
+METRICS_BUCKETS = tuple(float(b) for b in os.getenv(
+    "METRICS_BUCKETS", "0.005,0.01,0.025,0.05,0.1,0.25,0.5,1,2.5,5,10,30,60").split(","))
+
+_TRACE_ID = re.compile(r"^[A-Za-z0-9._-]{1,64}$")  # accepted from X-Request-ID headers
+
+_current_trace = contextvars.ContextVar("trace", default=None)
+_lock = threading.Lock()
+_histograms = {}  # (metric name, label items) -> [bucket counts, sum, count]
+_counters = {}  # (metric name, label items) -> value
+_gauges = {}  # metric name -> (help, callback)
+
+_HELP = {
+    "stage_duration_seconds": "Time spent in each pipeline stage",
+    "request_duration_seconds": "HTTP request latency by endpoint and status",
+    "stage_errors_total": "Pipeline stages that raised an exception",
+    "admission_rejections_total": "Requests turned away by admission control",
+}
+
+
+class Trace:
+    """Per-request trace: id plus seconds spent in each stage."""
+
+    __slots__ = ("trace_id", "stages")
+
+    def __init__(self, trace_id: str = None):
+        self.trace_id = trace_id if trace_id and _TRACE_ID.match(trace_id) else uuid.uuid4().hex[:16]
+        self.stages = {}
+
+    def summary(self) -> str:
+        """Stage breakdown for log lines, e.g. "retrieve 41 ms, llm_invoke 760 ms"."""
+        return ", ".join(f"{stage} {seconds * 1000:.0f} ms" for stage, seconds in self.stages.items())
+
+
+@contextlib.contextmanager
+def trace(trace_id: str = None):
+    """
+    Run the enclosed code inside a trace (reusing trace_id, e.g. from an
+    X-Request-ID header or a request that spawned background work).
+
+    Yields:
+        Trace: The active trace
+    """
+    current = Trace(trace_id)
+    token = _current_trace.set(current)
+    try:
+        yield current
+    finally:
+        _current_trace.reset(token)
+
+
+def start_trace(trace_id: str = None) -> Trace:
+    """Make a new trace current without a with-block (Flask's before_request; see end_trace)."""
+    current = Trace(trace_id)
+    _current_trace.set(current)
+    return current
+
+
+def end_trace():
+    """Clear the trace set by start_trace so it doesn't leak into the thread's next task."""
+    _current_trace.set(None)
+
+
+def current_trace():
+    """The active Trace, or None outside a request."""
+    return _current_trace.get()
+
+
+def current_trace_id():
+    """Id of the active trace, or None outside a request."""
+    current = _current_trace.get()
+    return current.trace_id if current else None
+
+
+def bind(func):
+    """Wrap func to run in a copy of the current context (keeps the trace in pool threads)."""
+    context = contextvars.copy_context()
+    return lambda *args, **kwargs: context.run(func, *args, **kwargs)
+
+
+def log(message: str, level: str = "INFO"):
+    """Print a log line tagged with the current trace id."""
+    trace_id = current_trace_id()
+    tag = f" [trace={trace_id}]" if trace_id else ""
+    print(f"[{level}]{tag} {message}")
+
+
+def _observe(name: str, labels: dict, seconds: float):
+    key = (name, tuple(sorted(labels.items())))
+    with _lock:
+        entry = _histograms.get(key)
+        if entry is None:
+            entry = _histograms[key] = [[0] * len(METRICS_BUCKETS), 0.0, 0]
+        for i, bound in enumerate(METRICS_BUCKETS):
+            if seconds <= bound:
+                entry[0][i] += 1
+                break
+        entry[1] += seconds
+        entry[2] += 1
+
+
+def inc(name: str, value: float = 1, **labels):
+    """Increment a counter (name without the interviewiq_ prefix)."""
+    key = (name, tuple(sorted(labels.items())))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def observe(stage: str, seconds: float, **labels):
+    """Record a stage duration in the histogram and the current trace."""
+    _observe("stage_duration_seconds", dict(labels, stage=stage), seconds)
+    current = _current_trace.get()
+    if current is not None:
+        current.stages[stage] = current.stages.get(stage, 0.0) + seconds
+
+
+@contextlib.contextmanager
+def span(stage: str, **labels):
+    """
+    Time the enclosed block as one occurrence of a stage.
+    Exceptions are counted in stage_errors_total and re-raised.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        inc("stage_errors_total", stage=stage)
+        raise
+    finally:
+        observe(stage, time.perf_counter() - start, **labels)
+
+
+def observe_request(method: str, endpoint: str, status: int, seconds: float):
+    """Record one HTTP request and log its summary line with the stage breakdown."""
+    _observe("request_duration_seconds", {"method": method, "endpoint": endpoint, "status": str(status)}, seconds)
+    current = _current_trace.get()
+    breakdown = f" ({current.summary()})" if current is not None and current.stages else ""
+    log(f"{method} {endpoint} {status} in {seconds * 1000:.0f} ms{breakdown}")
+
+
+def register_gauge(name: str, help_text: str, callback):
+    """Expose callback() (a number) as a gauge, read at scrape time."""
+    _gauges[name] = (help_text, callback)
+
+
+def _labels(items) -> str:
+    if not items:
+        return ""
+    escaped = ((key, str(value).replace("\\", "\\\\").replace('"', '\\"')) for key, value in items)
+    return "{" + ",".join(f'{key}="{value}"' for key, value in escaped) + "}"
+
+
+def _number(value) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render() -> str:
+    """All metrics in the Prometheus text exposition format (version 0.0.4)."""
+    with _lock:
+        histograms = {key: (list(buckets), total, count) for key, (buckets, total, count) in _histograms.items()}
+        counters = dict(_counters)
+    lines = []
+
+    def header(name, kind):
+        lines.append(f"# HELP {METRICS_PREFIX}_{name} {_HELP.get(name, name)}")
+        lines.append(f"# TYPE {METRICS_PREFIX}_{name} {kind}")
+
+    for name in sorted({name for name, _ in histograms}):
+        header(name, "histogram")
+        for (metric, items), (buckets, total, count) in sorted(histograms.items()):
+            if metric != name:
+                continue
+            cumulative = 0
+            for bound, bucket in zip(METRICS_BUCKETS, buckets):
+                cumulative += bucket
+                lines.append(f"{METRICS_PREFIX}_{name}_bucket{_labels(items + (('le', _number(bound)),))} {cumulative}")
+            lines.append(f"{METRICS_PREFIX}_{name}_bucket{_labels(items + (('le', '+Inf'),))} {count}")
+            lines.append(f"{METRICS_PREFIX}_{name}_sum{_labels(items)} {_number(total)}")
+            lines.append(f"{METRICS_PREFIX}_{name}_count{_labels(items)} {count}")
+    for name in sorted({name for name, _ in counters}):
+        header(name, "counter")
+        for (metric, items), value in sorted(counters.items()):
+            if metric == name:
+                lines.append(f"{METRICS_PREFIX}_{name}{_labels(items)} {_number(value)}")
+    for name, (help_text, callback) in sorted(_gauges.items()):
+        try:
+            value = callback()
+        except Exception as e:
+            print(f"[WARN] Gauge {name} failed: {e}")
+            continue
+        lines.append(f"# HELP {METRICS_PREFIX}_{name} {help_text}")
+        lines.append(f"# TYPE {METRICS_PREFIX}_{name} gauge")
+        lines.append(f"{METRICS_PREFIX}_{name} {_number(value)}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,107 @@
+"""
+LLM response cache
+Every new interview opens with the same system prompt and a near-identical
+greeting, and the interviewer model decodes greedily (do_sample=False), so
+the reply to an identical prompt can be reused. Replies are keyed on the
+normalized prompt, the model settings and a fingerprint of the caller's
+HuggingFace token, so a completion paid for by one token is only ever served
+back to that token. They are kept in a bounded session store (shared across
+workers with SESSION_BACKEND=sqlite/redis) with a TTL. Turns carrying
+injected resume context are never cached.
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+
+import session_store
+
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE", "1") == "1"
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "256"))
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "3600"))
+
+_APOSTROPHES = re.compile(r"['\u2019]")
+_PUNCTUATION = re.compile(r"[^\w\s]")
+
+_entries = session_store.create_store(
+    "llm_responses", session_store.JSONSerializer(),
+    max_entries=RESPONSE_CACHE_MAX_ENTRIES, idle_ttl=RESPONSE_CACHE_TTL,
+)
+_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "stores": 0, "expired": 0, "bypassed": 0}
+
+
+def normalize(text: str) -> str:
+    """Case-, punctuation- and whitespace-insensitive form of a user message."""
+    text = _APOSTROPHES.sub("", text.lower())
+    return " ".join(_PUNCTUATION.sub(" ", text).split())
+
+
+def token_fingerprint(token: str) -> str:
+    """Short hash identifying an API token in cache keys (the token itself is never stored)."""
+    return hashlib.sha256((token or "").encode("utf-8")).hexdigest()[:16]
+
+
+def cache_key(messages, model_config: dict) -> str:
+    """
+    SHA-256 over the prompt messages and model settings (including the
+    token fingerprint, see token_fingerprint). User messages are
+    normalized ("Hello, let's start!" and "hello lets start" share a
+    key); system and AI messages are hashed verbatim.
+    """
+    digest = hashlib.sha256(json.dumps(model_config, sort_keys=True, default=str).encode("utf-8"))
+    for message in messages:
+        content = normalize(message.content) if message.type == "human" else message.content
+        digest.update(f"\x00{message.type}\x00{content}".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _count(name: str):
+    with _lock:
+        _stats[name] += 1
+
+
+def bypass():
+    """Record a turn that skipped the cache (e.g. resume context injected)."""
+    _count("bypassed")
+
+
+def get(key: str):
+    """
+    Cached reply for a prompt key.
+
+    Returns:
+        str or None: The reply, or None on a miss/expired entry
+    """
+    if not RESPONSE_CACHE_ENABLED:
+        return None
+    entry = _entries.get(key)
+    if entry is not None and time.time() - entry["stored_at"] > RESPONSE_CACHE_TTL:
+        # TTL counts from when the reply was stored, not from its last hit
+        _entries.pop(key)
+        _count("expired")
+        entry = None
+    _count("hits" if entry is not None else "misses")
+    return entry["response"] if entry is not None else None
+
+
+def put(key: str, response: str):
+    """Store a complete reply (empty replies are not cached)."""
+    if not RESPONSE_CACHE_ENABLED or not response:
+        return
+    _entries.set(key, {"response": response, "stored_at": time.time()})
+    _count("stores")
+
+
+def get_stats():
+    """Hit/miss counters for this process plus the store's size report."""
+    with _lock:
+        stats = dict(_stats)
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = round(stats["hits"] / lookups, 3) if lookups else 0.0
+    stats["enabled"] = RESPONSE_CACHE_ENABLED
+    stats["ttl_seconds"] = RESPONSE_CACHE_TTL
+    stats["store"] = _entries.memory_report()
+    return stats
@@ -0,0 +1,157 @@
+"""
+Resume content cache
+Caches extracted chunks and their embedding vectors keyed by the SHA-256 of the
+PDF bytes plus the splitter/model parameters, so re-uploading the same resume
+skips PDF parsing, splitting and embedding.
+Entries are `<key>.json` (chunks) + `<key>.npy` (float32 vectors) on disk,
+evicted least-recently-used once the directory exceeds its size budget.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+RESUME_CACHE_DIR = os.getenv("RESUME_CACHE_DIR", "/tmp/interviewiq_resume_cache")
+RESUME_CACHE_MAX_BYTES = int(os.getenv("RESUME_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+
+def cache_key(pdf_data: bytes, chunk_size: int, chunk_overlap: int, model_name: str) -> str:
+    """SHA-256 over the PDF bytes and everything that changes the chunks or vectors."""
+    digest = hashlib.sha256(pdf_data)
+    digest.update(f"|{chunk_size}|{chunk_overlap}|{model_name}".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _paths(key: str):
+    base = os.path.join(RESUME_CACHE_DIR, key)
+    return base + ".json", base + ".npy"
+
+
+def get(key: str):
+    """
+    Look up cached chunks and vectors.
+
+    Returns:
+        tuple: (list of Document chunks, float32 array of shape (n, dim)) or None on a miss
+    """
+    json_path, npy_path = _paths(key)
+    try:
+        with open(json_path, encoding="utf-8") as f:
+            chunks = json.load(f)
+        vectors = np.load(npy_path)
+    except (OSError, ValueError):
+        with _lock:
+            _stats["misses"] += 1
+        return None
+    # Refresh mtime so LRU eviction keeps recently used resumes
+    for path in (json_path, npy_path):
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+    with _lock:
+        _stats["hits"] += 1
+    documents = [Document(page_content=c["text"], metadata=c["metadata"]) for c in chunks]
+    return documents, vectors
+
+
+def _write_atomic(path: str, write):
+    """Write through a uniquely named temp file and rename it into place."""
+    fd, tmp_path = tempfile.mkstemp(dir=RESUME_CACHE_DIR, prefix=os.path.basename(path) + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def put(key: str, documents, vectors):
+    """
+    Store chunks and their vectors, then evict old entries beyond the size budget.
+    Concurrent puts of the same key each write their own temp files, so readers
+    never see a partial entry.
+    """
+    os.makedirs(RESUME_CACHE_DIR, exist_ok=True)
+    json_path, npy_path = _paths(key)
+    chunks = [{"text": d.page_content, "metadata": d.metadata} for d in documents]
+    _write_atomic(npy_path, lambda f: np.save(f, np.asarray(vectors, dtype=np.float32)))
+    _write_atomic(json_path, lambda f: f.write(json.dumps(chunks).encode("utf-8")))
+    _evict()
+
+
+def _evict():
+    entries = {}
+    for name in os.listdir(RESUME_CACHE_DIR):
+        key, ext = os.path.splitext(name)
+        if ext not in (".json", ".npy"):
+            continue
+        try:
+            st = os.stat(os.path.join(RESUME_CACHE_DIR, name))
+        except OSError:
+            continue
+        size, mtime = entries.get(key, (0, 0.0))
+        entries[key] = (size + st.st_size, max(mtime, st.st_mtime))
+    total = sum(size for size, _ in entries.values())
+    for key, (size, _) in sorted(entries.items(), key=lambda item: item[1][1]):
+        if total <= RESUME_CACHE_MAX_BYTES:
+            break
+        for path in _paths(key):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        total -= size
+        with _lock:
+            _stats["evictions"] += 1
+
+
+def get_stats():
+    """Hit/miss/eviction counters for this process."""
+    with _lock:
+        return dict(_stats)
+
+
+class PrecomputedEmbeddings(Embeddings):
+    """
+    Serves known chunk vectors from memory and delegates anything else
+    (queries, unseen texts) to the real embeddings engine. Lets vector stores
+    bulk insert cached vectors through their normal add_documents() path.
+    Vectors are released once a vector store has consumed them. Safe to call
+    from the ingestion writer threads and request threads at once.
+    """
+
+    def __init__(self, texts, vectors, fallback):
+        self.fallback = fallback
+        self._vectors = {}
+        self._lock = threading.Lock()
+        self.add(texts, vectors)
+
+    def add(self, texts, vectors):
+        """Register more precomputed vectors (e.g. each batch of a streaming upload)."""
+        if len(texts):
+            with self._lock:
+                self._vectors.update(zip(texts, np.asarray(vectors, dtype=np.float32)))
+
+    def embed_documents(self, texts):
+        # Take the known vectors under the lock; unseen texts are embedded outside it
+        with self._lock:
+            known = {text: self._vectors.pop(text) for text in dict.fromkeys(texts) if text in self._vectors}
+        missing = [text for text in dict.fromkeys(texts) if text not in known]
+        computed = dict(zip(missing, self.fallback.embed_documents(missing))) if missing else {}
+        return [known[text].tolist() if text in known else computed[text] for text in texts]
+
+    def embed_query(self, text):
+        return self.fallback.embed_query(text)
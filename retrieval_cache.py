@@ -0,0 +1,176 @@
+"""
+Resume retrieval cache
+With use_resume on, every chat turn used to embed the user message and query
+the vector store (an Astra DB round-trip), although resumes have only a few
+chunks and consecutive turns mostly retrieve the same ones. Retrieval now:
+  - skips the embedding and the vector query entirely when the resume has no
+    more than k chunks (they are all returned, kept in the resume spec),
+  - reuses per-session results for repeated (normalized) questions,
+  - memoizes query embeddings in a process-wide LRU shared by all sessions,
+  - drops duplicate chunks (same text, or contained in another retrieved chunk)
+    before they are appended to the prompt.
+Counters report the embeddings and vector store round-trips saved.
+"""
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+RETRIEVAL_TOP_K = int(os.getenv("RETRIEVAL_TOP_K", "3"))
+RETRIEVAL_CACHE_QUERIES = int(os.getenv("RETRIEVAL_CACHE_QUERIES", "32"))  # cached results per session
+QUERY_EMBEDDING_CACHE_SIZE = int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", "1024"))
+
+_lock = threading.Lock()
+_query_vectors = OrderedDict()  # query text -> embedding
+_stats = {
+    "lookups": 0,
+    "short_circuits": 0,  # resume has <= k chunks: no embedding, no vector query
+    "result_hits": 0,  # repeated question in the same session
+    "embedding_hits": 0,
+    "embeddings_computed": 0,
+    "vector_queries": 0,
+    "duplicates_dropped": 0,
+}
+
+
+def normalize_query(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+def _count(name: str, value: int = 1):
+    with _lock:
+        _stats[name] += value
+
+
+class SessionRetrievalCache:
+    """
+    Retrieval results for one session's resume.
+
+    Args:
+        version: Resume spec version the results belong to (a re-upload starts a new cache)
+        max_queries: Results kept, least recently used dropped first
+    """
+
+    def __init__(self, version: str, max_queries: int = RETRIEVAL_CACHE_QUERIES):
+        self.version = version
+        self.max_queries = max_queries
+        self._results = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, query: str):
+        key = normalize_query(query)
+        with self._lock:
+            docs = self._results.get(key)
+            if docs is not None:
+                self._results.move_to_end(key)
+            return docs
+
+    def put(self, query: str, docs):
+        key = normalize_query(query)
+        with self._lock:
+            self._results[key] = docs
+            self._results.move_to_end(key)
+            while len(self._results) > self.max_queries:
+                self._results.popitem(last=False)
+
+    def __len__(self):
+        return len(self._results)
+
+
+def _remember(text: str, future: Future):
+    if future.exception() is not None:
+        return
+    vector = future.result()
+    with _lock:
+        _stats["embeddings_computed"] += 1
+        _query_vectors[text] = vector
+        while len(_query_vectors) > QUERY_EMBEDDING_CACHE_SIZE:
+            _query_vectors.popitem(last=False)
+
+
+def embed_query_async(embeddings, text: str) -> Future:
+    """
+    Start embedding a query, memoized across sessions. Uses the embedding
+    service's micro-batcher when available, so the caller can do other work
+    (e.g. rebuild the retriever) while the query is encoded.
+
+    Returns:
+        Future: Resolves to the query vector
+    """
+    with _lock:
+        vector = _query_vectors.get(text)
+        if vector is not None:
+            _query_vectors.move_to_end(text)
+            _stats["embedding_hits"] += 1
+    if vector is not None:
+        future = Future()
+        future.set_result(vector)
+        return future
+    if hasattr(embeddings, "embed_query_async"):
+        future = embeddings.embed_query_async(text)
+    else:
+        future = Future()
+        try:
+            future.set_result(embeddings.embed_query(text))
+        except Exception as e:
+            future.set_exception(e)
+    future.add_done_callback(lambda done: _remember(text, done))
+    return future
+
+
+def dedupe(docs):
+    """
+    Drop chunks whose text repeats, or is contained in, a chunk kept earlier
+    (e.g. the same resume indexed twice, or overlap windows of a short page).
+    """
+    kept, texts = [], []
+    for doc in docs:
+        text = " ".join(doc.page_content.split())
+        if any(text in other for other in texts):
+            continue
+        kept.append(doc)
+        texts.append(text)
+    if len(kept) < len(docs):
+        _count("duplicates_dropped", len(docs) - len(kept))
+    return kept
+
+
+def retrieve(cache: SessionRetrievalCache, query: str, search, get_embeddings, small_resume=None):
+    """
+    Top-k resume chunks for a query, avoiding round-trips where possible.
+
+    Args:
+        cache: The session's SessionRetrievalCache
+        query: User message
+        search: Callable(vector Future) -> Documents (the vector store query)
+        get_embeddings: Callable returning the Embeddings for the query vector
+        small_resume: All chunks of a resume with <= k chunks, or None
+
+    Returns:
+        list: Deduplicated Documents
+    """
+    _count("lookups")
+    if small_resume is not None:
+        _count("short_circuits")
+        return small_resume
+    docs = cache.get(query)
+    if docs is not None:
+        _count("result_hits")
+        return docs
+    vector = embed_query_async(get_embeddings(), query)
+    _count("vector_queries")
+    docs = dedupe(search(vector))
+    if docs:  # an empty result may mean the index isn't reachable from this worker yet
+        cache.put(query, docs)
+    return docs
+
+
+def get_stats():
+    """Counters for this process, including the round-trips saved."""
+    with _lock:
+        stats = dict(_stats)
+        stats["query_embeddings_cached"] = len(_query_vectors)
+    served_without_query = stats["short_circuits"] + stats["result_hits"]
+    stats["vector_round_trips_saved"] = served_without_query
+    stats["embeddings_saved"] = served_without_query + stats["embedding_hits"]
+    return stats
@@ -0,0 +1,590 @@
+"""
+Bounded session store
+Keeps per-session objects (chat histories, resume retrievers) with a maximum
+entry count, idle TTL and LRU eviction, so abandoned interviews don't grow
+worker memory forever. SESSION_BACKEND selects where sessions live: in this
+process (memory), in a SQLite file shared by all workers on a host (sqlite),
+or in Redis shared across nodes (redis).
+"""
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+DEFAULT_MAX_ENTRIES = int(os.getenv("SESSION_MAX_ENTRIES", "500"))
+DEFAULT_IDLE_TTL = float(os.getenv("SESSION_IDLE_TTL_SECONDS", "3600"))
+DEFAULT_SWEEP_INTERVAL = float(os.getenv("SESSION_SWEEP_INTERVAL_SECONDS", "60"))
+
+
+def estimate_size(obj) -> int:
+    """
+    Rough memory footprint of a session object in bytes.
+    Objects with an nbytes() method (turn histories) measure themselves; chat
+    histories are measured by their message contents; anything else falls
+    back to the shallow object size.
+    """
+    nbytes = getattr(obj, "nbytes", None)
+    if callable(nbytes):
+        return nbytes()
+    messages = getattr(obj, "messages", None)
+    if isinstance(messages, list):
+        size = sys.getsizeof(obj) + sys.getsizeof(messages)
+        for message in messages:
+            size += sys.getsizeof(message) + sys.getsizeof(message.content)
+        return size
+    return sys.getsizeof(obj)
+
+
+class _SweeperMixin:
+    """Background expiry and eviction logging shared by all store backends."""
+
+    def _ensure_sweeper(self):
+        # Started lazily (and restarted after a gunicorn fork, since threads don't survive fork)
+        if self.sweep_interval <= 0 or self.idle_ttl <= 0 or self._sweeper_pid == os.getpid():
+            return
+        with self._lock:
+            # Concurrent first requests all get here; only one starts the sweeper
+            if self._sweeper_pid == os.getpid():
+                return
+            self._sweeper_pid = os.getpid()
+        thread = threading.Thread(target=self._sweep_loop, name=f"{self.name}-sweeper", daemon=True)
+        thread.start()
+
+    def _sweep_loop(self):
+        while True:
+            time.sleep(self.sweep_interval)
+            try:
+                self.sweep()
+            except Exception as e:
+                print(f"[WARN] Session sweep failed for '{self.name}': {e}")
+
+    def _evicted(self, removed, reason: str):
+        for session_id, value in removed:
+            print(f"[INFO] Session '{session_id}' {reason} from {self.name}")
+            if self.on_evict:
+                try:
+                    self.on_evict(session_id, value)
+                except Exception as e:
+                    print(f"[WARN] Eviction callback failed for '{session_id}': {e}")
+
+
+class SessionStore(_SweeperMixin):
+    """
+    Thread-safe LRU mapping of session_id -> object with idle expiry.
+
+    Args:
+        name: Label used in logs and reports
+        max_entries: Maximum sessions kept; least recently used are evicted first
+        idle_ttl: Seconds without access before a session expires (0 disables)
+        sweep_interval: Seconds between background sweeps of expired sessions
+        on_evict: Optional callback(session_id, value) run after eviction/expiry
+        sizeof: Function used for memory accounting (defaults to estimate_size)
+    """
+
+    def __init__(self, name: str, max_entries: int = DEFAULT_MAX_ENTRIES, idle_ttl: float = DEFAULT_IDLE_TTL,
+                 sweep_interval: float = DEFAULT_SWEEP_INTERVAL, on_evict=None, sizeof=estimate_size):
+        self.name = name
+        self.max_entries = max_entries
+        self.idle_ttl = idle_ttl
+        self.sweep_interval = sweep_interval
+        self.on_evict = on_evict
+        self.sizeof = sizeof
+        self._entries = OrderedDict()  # session_id -> (value, last_access)
+        self._lock = threading.Lock()
+        self._sweeper_pid = None
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, session_id: str, default=None):
+        """Return the session's value (refreshing its LRU position) or default."""
+        self._ensure_sweeper()
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is None:
+                return default
+            self._entries[session_id] = (entry[0], time.monotonic())
+            self._entries.move_to_end(session_id)
+            return entry[0]
+
+    def _insert_locked(self, session_id: str, value) -> list:
+        # Caller holds self._lock; returns evicted (session_id, value) pairs
+        self._entries[session_id] = (value, time.monotonic())
+        self._entries.move_to_end(session_id)
+        removed = []
+        while len(self._entries) > self.max_entries:
+            evicted_id, (evicted_value, _) = self._entries.popitem(last=False)
+            removed.append((evicted_id, evicted_value))
+            self.evictions += 1
+        return removed
+
+    def set(self, session_id: str, value):
+        """Store a value, evicting least recently used sessions if over capacity."""
+        self._ensure_sweeper()
+        with self._lock:
+            removed = self._insert_locked(session_id, value)
+        self._evicted(removed, "evicted (LRU)")
+        return value
+
+    def get_or_create(self, session_id: str, factory):
+        """Return the session's value, creating it with factory() if missing."""
+        self._ensure_sweeper()
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is not None:
+                self._entries[session_id] = (entry[0], time.monotonic())
+                self._entries.move_to_end(session_id)
+                return entry[0]
+            value = factory()
+            removed = self._insert_locked(session_id, value)
+        self._evicted(removed, "evicted (LRU)")
+        return value
+
+    def pop(self, session_id: str, default=None):
+        """Remove a session and return its value (no eviction callback)."""
+        with self._lock:
+            entry = self._entries.pop(session_id, None)
+        return default if entry is None else entry[0]
+
+    def items(self) -> list:
+        """Snapshot of (session_id, value) pairs without refreshing LRU order."""
+        with self._lock:
+            return [(session_id, entry[0]) for session_id, entry in self._entries.items()]
+
+    def __contains__(self, session_id):
+        with self._lock:
+            return session_id in self._entries
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def sweep(self) -> int:
+        """
+        Expire sessions idle for longer than idle_ttl.
+
+        Returns:
+            int: Number of sessions expired
+        """
+        if self.idle_ttl <= 0:
+            return 0
+        cutoff = time.monotonic() - self.idle_ttl
+        removed = []
+        with self._lock:
+            # Entries are kept in access order, so expired ones are at the front
+            while self._entries:
+                session_id, (value, last_access) = next(iter(self._entries.items()))
+                if last_access > cutoff:
+                    break
+                del self._entries[session_id]
+                removed.append((session_id, value))
+            self.expirations += len(removed)
+        self._evicted(removed, "expired (idle)")
+        return len(removed)
+
+    def memory_report(self) -> dict:
+        """Per-session memory estimate plus store-wide totals."""
+        now = time.monotonic()
+        with self._lock:
+            items = list(self._entries.items())
+        sessions = {
+            session_id: {"bytes": self.sizeof(value), "idle_seconds": round(now - last_access, 1)}
+            for session_id, (value, last_access) in items
+        }
+        return {
+            "store": self.name,
+            "backend": "memory",
+            "entries": len(sessions),
+            "max_entries": self.max_entries,
+            "idle_ttl_seconds": self.idle_ttl,
+            "total_bytes": sum(s["bytes"] for s in sessions.values()),
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "sessions": sessions,
+        }
+
+
+# ---------------------------------------------------------------------------
+# Shared backends (sessions visible to every gunicorn worker / node)
+# ---------------------------------------------------------------------------
+
+SESSION_BACKEND = os.getenv("SESSION_BACKEND", "memory")  # memory | sqlite | redis
+SESSION_DB_PATH = os.getenv("SESSION_DB_PATH", "/tmp/interviewiq_sessions.db")
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")  # fakeredis:// for an in-process stand-in
+
+_redis_client = None  # client shared by redis stores created without one (see set_redis_client)
+
+
+class JSONSerializer:
+    """Compact serialization for plain JSON-compatible values (zlib-compressed JSON)."""
+
+    def dumps(self, value) -> bytes:
+        return zlib.compress(json.dumps(value, separators=(",", ":")).encode("utf-8"))
+
+    def loads(self, data: bytes):
+        return json.loads(zlib.decompress(data).decode("utf-8"))
+
+
+class ChatHistorySerializer(JSONSerializer):
+    """
+    Stores a turn_history.TurnHistory as its compact records (system prompt
+    once, [user, reply, chunk ids] per turn). Sessions saved in the older
+    [[role, content], ...] message format still load.
+    """
+
+    def dumps(self, history) -> bytes:
+        return super().dumps(history.to_records())
+
+    def loads(self, data: bytes):
+        from turn_history import TurnHistory
+        return TurnHistory.from_records(super().loads(data))
+
+
+class ObjectStateSerializer(JSONSerializer):
+    """Serializes objects exposing to_dict() / from_dict(data) (e.g. ContextWindow)."""
+
+    def __init__(self, cls):
+        self.cls = cls
+
+    def dumps(self, value) -> bytes:
+        return super().dumps(value.to_dict())
+
+    def loads(self, data: bytes):
+        return self.cls.from_dict(super().loads(data))
+
+
+class SQLiteSessionStore(_SweeperMixin):
+    """
+    SessionStore backed by a SQLite file, shared by all workers on one host.
+    Values are serialized on set() and deserialized on get(), so callers must
+    set() again after mutating a value.
+
+    Args:
+        name: Table name for this store
+        serializer: Object with dumps(value) -> bytes and loads(bytes) -> value
+        path: SQLite database file
+        max_entries, idle_ttl, sweep_interval, on_evict: Same as SessionStore
+            (on_evict receives None as the value, since nothing is deserialized)
+    """
+
+    def __init__(self, name: str, serializer, path: str = SESSION_DB_PATH, max_entries: int = DEFAULT_MAX_ENTRIES,
+                 idle_ttl: float = DEFAULT_IDLE_TTL, sweep_interval: float = DEFAULT_SWEEP_INTERVAL, on_evict=None):
+        self.name = name
+        self.serializer = serializer
+        self.path = path
+        self.max_entries = max_entries
+        self.idle_ttl = idle_ttl
+        self.sweep_interval = sweep_interval
+        self.on_evict = on_evict
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._sweeper_pid = None
+        self.evictions = 0
+        self.expirations = 0
+        with self._conn() as conn:
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {name} "
+                "(session_id TEXT PRIMARY KEY, data BLOB NOT NULL, last_access REAL NOT NULL)"
+            )
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {name}_last_access ON {name} (last_access)")
+
+    def _conn(self):
+        # One connection per thread (and per process - connections must not cross a fork)
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, session_id: str, default=None):
+        self._ensure_sweeper()
+        conn = self._conn()
+        row = conn.execute(f"SELECT data FROM {self.name} WHERE session_id = ?", (session_id,)).fetchone()
+        if row is None:
+            return default
+        conn.execute(f"UPDATE {self.name} SET last_access = ? WHERE session_id = ?", (time.time(), session_id))
+        return self.serializer.loads(row[0])
+
+    def set(self, session_id: str, value):
+        self._ensure_sweeper()
+        conn = self._conn()
+        conn.execute(
+            f"INSERT OR REPLACE INTO {self.name} (session_id, data, last_access) VALUES (?, ?, ?)",
+            (session_id, self.serializer.dumps(value), time.time()),
+        )
+        self._trim(conn)
+        return value
+
+    def _trim(self, conn):
+        overflow = conn.execute(f"SELECT COUNT(*) FROM {self.name}").fetchone()[0] - self.max_entries
+        if overflow <= 0:
+            return
+        rows = conn.execute(
+            f"SELECT session_id, data FROM {self.name} ORDER BY last_access LIMIT ?", (overflow,)
+        ).fetchall()
+        conn.executemany(f"DELETE FROM {self.name} WHERE session_id = ?", [(row[0],) for row in rows])
+        self.evictions += len(rows)
+        self._evicted([(row[0], None) for row in rows], "evicted (LRU)")
+
+    def get_or_create(self, session_id: str, factory):
+        value = self.get(session_id)
+        if value is not None:
+            return value
+        value = factory()
+        conn = self._conn()
+        # Another worker may have created it concurrently; first writer wins
+        cursor = conn.execute(
+            f"INSERT OR IGNORE INTO {self.name} (session_id, data, last_access) VALUES (?, ?, ?)",
+            (session_id, self.serializer.dumps(value), time.time()),
+        )
+        if cursor.rowcount == 0:
+            return self.get(session_id, value)
+        self._trim(conn)
+        return value
+
+    def pop(self, session_id: str, default=None):
+        conn = self._conn()
+        row = conn.execute(f"SELECT data FROM {self.name} WHERE session_id = ?", (session_id,)).fetchone()
+        conn.execute(f"DELETE FROM {self.name} WHERE session_id = ?", (session_id,))
+        return default if row is None else self.serializer.loads(row[0])
+
+    def items(self) -> list:
+        rows = self._conn().execute(f"SELECT session_id, data FROM {self.name}").fetchall()
+        return [(row[0], self.serializer.loads(row[1])) for row in rows]
+
+    def __contains__(self, session_id):
+        row = self._conn().execute(f"SELECT 1 FROM {self.name} WHERE session_id = ?", (session_id,)).fetchone()
+        return row is not None
+
+    def __len__(self):
+        return self._conn().execute(f"SELECT COUNT(*) FROM {self.name}").fetchone()[0]
+
+    def sweep(self) -> int:
+        if self.idle_ttl <= 0:
+            return 0
+        conn = self._conn()
+        cutoff = time.time() - self.idle_ttl
+        rows = conn.execute(f"SELECT session_id FROM {self.name} WHERE last_access <= ?", (cutoff,)).fetchall()
+        conn.execute(f"DELETE FROM {self.name} WHERE last_access <= ?", (cutoff,))
+        self.expirations += len(rows)
+        self._evicted([(row[0], None) for row in rows], "expired (idle)")
+        return len(rows)
+
+    def memory_report(self) -> dict:
+        now = time.time()
+        rows = self._conn().execute(
+            f"SELECT session_id, length(data), last_access FROM {self.name}"
+        ).fetchall()
+        sessions = {row[0]: {"bytes": row[1], "idle_seconds": round(now - row[2], 1)} for row in rows}
+        return {
+            "store": self.name,
+            "backend": "sqlite",
+            "entries": len(sessions),
+            "max_entries": self.max_entries,
+            "idle_ttl_seconds": self.idle_ttl,
+            "total_bytes": sum(s["bytes"] for s in sessions.values()),
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "sessions": sessions,
+        }
+
+
+class RedisSessionStore(_SweeperMixin):
+    """
+    SessionStore backed by Redis (or any Redis-compatible server), shared
+    across workers and nodes. Idle expiry uses native key TTLs; LRU order is
+    tracked in a sorted set of last-access times.
+
+    Args:
+        name: Key prefix for this store
+        serializer: Object with dumps(value) -> bytes and loads(bytes) -> value
+        client: Redis client (defaults to redis_client());
+                a stand-in such as fakeredis.FakeRedis() works for local runs
+        max_entries, idle_ttl, on_evict: Same as SessionStore
+            (on_evict receives None as the value, since nothing is deserialized)
+    """
+
+    def __init__(self, name: str, serializer, client=None, max_entries: int = DEFAULT_MAX_ENTRIES,
+                 idle_ttl: float = DEFAULT_IDLE_TTL, on_evict=None, **_):
+        if client is None:
+            client = redis_client()
+        self.name = name
+        self.serializer = serializer
+        self.client = client
+        self.max_entries = max_entries
+        self.idle_ttl = idle_ttl
+        self.on_evict = on_evict
+        self.evictions = 0
+        self.expirations = 0
+        self._lru_key = f"interviewiq:{name}:lru"
+
+    def _key(self, session_id: str) -> str:
+        return f"interviewiq:{self.name}:{session_id}"
+
+    def _touch(self, pipe, session_id: str):
+        pipe.zadd(self._lru_key, {session_id: time.time()})
+        if self.idle_ttl > 0:
+            pipe.expire(self._key(session_id), int(self.idle_ttl))
+
+    def get(self, session_id: str, default=None):
+        data = self.client.get(self._key(session_id))
+        if data is None:
+            self.client.zrem(self._lru_key, session_id)
+            return default
+        pipe = self.client.pipeline()
+        self._touch(pipe, session_id)
+        pipe.execute()
+        return self.serializer.loads(data)
+
+    def set(self, session_id: str, value):
+        pipe = self.client.pipeline()
+        pipe.set(self._key(session_id), self.serializer.dumps(value))
+        self._touch(pipe, session_id)
+        pipe.execute()
+        self._trim()
+        return value
+
+    def _trim(self):
+        overflow = self.client.zcard(self._lru_key) - self.max_entries
+        if overflow <= 0:
+            return
+        oldest = [sid.decode() if isinstance(sid, bytes) else sid
+                  for sid in self.client.zrange(self._lru_key, 0, overflow - 1)]
+        pipe = self.client.pipeline()
+        for session_id in oldest:
+            pipe.delete(self._key(session_id))
+            pipe.zrem(self._lru_key, session_id)
+        pipe.execute()
+        self.evictions += len(oldest)
+        self._evicted([(sid, None) for sid in oldest], "evicted (LRU)")
+
+    def get_or_create(self, session_id: str, factory):
+        value = self.get(session_id)
+        if value is not None:
+            return value
+        value = factory()
+        # SET NX: another worker may have created it concurrently; first writer wins
+        if not self.client.set(self._key(session_id), self.serializer.dumps(value), nx=True):
+            return self.get(session_id, value)
+        pipe = self.client.pipeline()
+        self._touch(pipe, session_id)
+        pipe.execute()
+        self._trim()
+        return value
+
+    def pop(self, session_id: str, default=None):
+        pipe = self.client.pipeline()
+        pipe.get(self._key(session_id))
+        pipe.delete(self._key(session_id))
+        pipe.zrem(self._lru_key, session_id)
+        data = pipe.execute()[0]
+        return default if data is None else self.serializer.loads(data)
+
+    def _session_ids(self) -> list:
+        return [sid.decode() if isinstance(sid, bytes) else sid for sid in self.client.zrange(self._lru_key, 0, -1)]
+
+    def items(self) -> list:
+        result = []
+        for session_id in self._session_ids():
+            data = self.client.get(self._key(session_id))
+            if data is not None:
+                result.append((session_id, self.serializer.loads(data)))
+        return result
+
+    def __contains__(self, session_id):
+        return bool(self.client.exists(self._key(session_id)))
+
+    def __len__(self):
+        return self.client.zcard(self._lru_key)
+
+    def sweep(self) -> int:
+        # Keys expire natively; only drop LRU entries whose keys are gone
+        stale = [sid for sid in self._session_ids() if not self.client.exists(self._key(sid))]
+        if stale:
+            self.client.zrem(self._lru_key, *stale)
+        self.expirations += len(stale)
+        return len(stale)
+
+    def memory_report(self) -> dict:
+        now = time.time()
+        sessions = {}
+        for session_id, last_access in self.client.zrange(self._lru_key, 0, -1, withscores=True):
+            if isinstance(session_id, bytes):
+                session_id = session_id.decode()
+            size = self.client.strlen(self._key(session_id))
+            if size:
+                sessions[session_id] = {"bytes": size, "idle_seconds": round(now - last_access, 1)}
+        return {
+            "store": self.name,
+            "backend": "redis",
+            "entries": len(sessions),
+            "max_entries": self.max_entries,
+            "idle_ttl_seconds": self.idle_ttl,
+            "total_bytes": sum(s["bytes"] for s in sessions.values()),
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "sessions": sessions,
+        }
+
+
+def set_redis_client(client):
+    """
+    Use client for redis stores created from now on (e.g. fakeredis.FakeRedis()
+    in local checks); call before importing the modules that create stores.
+    """
+    global _redis_client
+    _redis_client = client
+
+
+def redis_client():
+    """
+    The shared Redis client: the one passed to set_redis_client(), else one
+    for REDIS_URL. REDIS_URL=fakeredis:// uses an in-process fakeredis server
+    (a local stand-in; it is not shared between worker processes).
+    """
+    global _redis_client
+    if _redis_client is not None:
+        return _redis_client
+    if REDIS_URL.startswith("fakeredis://"):
+        try:
+            import fakeredis
+        except ImportError:
+            raise ImportError("REDIS_URL=fakeredis:// requires the 'fakeredis' package (pip install fakeredis)")
+        _redis_client = fakeredis.FakeRedis()
+        return _redis_client
+    try:
+        import redis
+    except ImportError:
+        raise ImportError("SESSION_BACKEND=redis requires the 'redis' package (pip install redis)")
+    _redis_client = redis.Redis.from_url(REDIS_URL)
+    return _redis_client
+
+
+def create_store(name: str, serializer=None, backend: str = None, client=None, **kwargs):
+    """
+    Create a session store for the configured SESSION_BACKEND.
+
+    Args:
+        name: Store name (table / key prefix for shared backends)
+        serializer: Needed by shared backends; memory stores keep live objects
+        backend: Override SESSION_BACKEND ("memory", "sqlite" or "redis")
+        client: Redis client for the redis backend (ignored by the others)
+        **kwargs: Passed to the store (max_entries, idle_ttl, on_evict, ...)
+
+    Returns:
+        SessionStore, SQLiteSessionStore or RedisSessionStore
+    """
+    backend = backend or SESSION_BACKEND
+    if backend == "memory" or serializer is None:
+        return SessionStore(name, **kwargs)
+    if backend == "sqlite":
+        return SQLiteSessionStore(name, serializer, **kwargs)
+    if backend == "redis":
+        return RedisSessionStore(name, serializer, client=client, **kwargs)
+    raise ValueError(f"Unknown SESSION_BACKEND '{backend}' (expected memory, sqlite or redis)")
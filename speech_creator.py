@@ -1,45 +1,172 @@
-import pyaudio
-import wave
+"""
+Microphone capture for the CLI voice interview
+Records until the candidate stops talking (energy-based endpointing) instead
+of a fixed window. UtteranceListener keeps capturing the next utterance while
+the previous one is transcribed on a background thread.
+"""
 import io
+import os
+import queue
+import threading
+import time
+import wave
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pyaudio
+
 import transcribe
+from voice_stream import EnergyVAD, VAD_FRAME_MS
 
-def get_transcribed_text():
-    FORMAT = pyaudio.paInt16
-    CHANNELS = 1
-    RATE = 44100
-    CHUNK = 1024
-    RECORD_SECONDS = 5
+FORMAT = pyaudio.paInt16
+CHANNELS = 1
+RATE = int(os.getenv("MIC_SAMPLE_RATE", "44100"))
+TRAILING_SILENCE_MS = int(os.getenv("MIC_TRAILING_SILENCE_MS", "800"))  # pause that ends an answer
+MAX_RECORD_SECONDS = float(os.getenv("MIC_MAX_RECORD_SECONDS", "30"))
+START_TIMEOUT_SECONDS = float(os.getenv("MIC_START_TIMEOUT_SECONDS", "10"))  # give up if nobody speaks
+PREROLL_MS = 300  # audio kept from just before speech starts
 
-    audio = pyaudio.PyAudio()
-    print("Recording...")
-    stream = audio.open(format=FORMAT, channels=CHANNELS,
-                        rate=RATE, input=True,
-                        frames_per_buffer=CHUNK)
-    frames = []
-    for i in range(0, int(RATE / CHUNK * RECORD_SECONDS)):
-        data = stream.read(CHUNK)
+
+class CaptureError(Exception):
+    """Raised when the microphone stream fails; the listener has stopped."""
+
+
+def open_stream(audio, rate: int = RATE):
+    """Open a mono 16-bit input stream that delivers one VAD frame per read."""
+    return audio.open(format=FORMAT, channels=CHANNELS, rate=rate, input=True,
+                      frames_per_buffer=rate * VAD_FRAME_MS // 1000)
+
+
+def record_utterance(stream, rate: int = RATE):
+    """
+    Read from `stream` until trailing silence or the duration cap.
+
+    Args:
+        stream: PyAudio input stream (anything with read(frames, exception_on_overflow))
+        rate: Sample rate of the stream
+
+    Returns:
+        bytes: 16-bit mono PCM of the utterance, or None if no speech started
+               within START_TIMEOUT_SECONDS
+    """
+    vad = EnergyVAD(rate)
+    frame = vad.frame_samples
+    preroll_frames = max(1, PREROLL_MS // VAD_FRAME_MS)
+    silence_frames = max(1, TRAILING_SILENCE_MS // VAD_FRAME_MS)
+    max_frames = int(MAX_RECORD_SECONDS * 1000 / VAD_FRAME_MS)
+    timeout_frames = int(START_TIMEOUT_SECONDS * 1000 / VAD_FRAME_MS)
+
+    frames, silent_run, waited = [], 0, 0
+    started = False
+    while True:
+        data = stream.read(frame, exception_on_overflow=False)
+        speech = vad.is_speech(vad.levels(np.frombuffer(data, dtype="<i2"))[0])
         frames.append(data)
-    print("Recording finished.")
-    stream.stop_stream()
-    stream.close()
-    audio.terminate()
+        if not started:
+            if speech:
+                started = True
+            else:
+                del frames[:-preroll_frames]
+                waited += 1
+                if waited >= timeout_frames:
+                    return None
+            continue
+        silent_run = 0 if speech else silent_run + 1
+        if silent_run >= silence_frames or len(frames) >= max_frames:
+            return b"".join(frames)
+
 
-    # Save to in-memory buffer
+def to_wav(pcm: bytes, rate: int = RATE) -> io.BytesIO:
+    """Wrap PCM in an in-memory WAV file."""
     buffer = io.BytesIO()
-    wf = wave.open(buffer, 'wb')
-    wf.setnchannels(CHANNELS)
-    wf.setsampwidth(audio.get_sample_size(FORMAT))
-    wf.setframerate(RATE)
-    wf.writeframes(b''.join(frames))
-    wf.close()
+    with wave.open(buffer, 'wb') as wf:
+        wf.setnchannels(CHANNELS)
+        wf.setsampwidth(2)
+        wf.setframerate(rate)
+        wf.writeframes(pcm)
     buffer.seek(0)
+    return buffer
 
-    # Pass buffer to transcribe
-    text = transcribe.transcribe_audio(buffer)
-    return text
 
-if __name__ == "__main__":
-    print(get_transcribed_text())
+def get_transcribed_text():
+    """Record one utterance (ends on trailing silence) and transcribe it."""
+    audio = pyaudio.PyAudio()
+    print("Recording... (stops when you pause)")
+    stream = open_stream(audio)
+    try:
+        pcm = record_utterance(stream)
+    finally:
+        stream.stop_stream()
+        stream.close()
+        audio.terminate()
+    print("Recording finished.")
+    if pcm is None:
+        raise transcribe.EmptyAudioError("No speech detected")
+    return transcribe.transcribe_audio(to_wav(pcm))
+
+
+class UtteranceListener:
+    """
+    Continuous capture for the interview loop. A capture thread records
+    utterances back to back; each finished one is transcribed on a worker
+    thread while the next is already being recorded.
+
+    Args:
+        rate: Microphone sample rate
+    """
+
+    def __init__(self, rate: int = RATE):
+        self.rate = rate
+        self._results = queue.Queue()
+        self._stop = threading.Event()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="stt")
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._capture_loop, name="mic-capture", daemon=True)
+        self._thread.start()
+        return self
+
+    def _capture_loop(self):
+        audio = pyaudio.PyAudio()
+        stream = None
+        try:
+            stream = open_stream(audio, self.rate)
+            while not self._stop.is_set():
+                pcm = record_utterance(stream, self.rate)
+                if pcm is None or self._stop.is_set():
+                    continue
+                ended = time.perf_counter()
+                self._results.put((self._executor.submit(transcribe.transcribe_audio, to_wav(pcm, self.rate)), ended))
+        except Exception as e:
+            self._results.put((CaptureError(f"Microphone capture failed: {e}"), None))
+        finally:
+            if stream is not None:
+                stream.stop_stream()
+                stream.close()
+            audio.terminate()
+
+    def next_transcript(self):
+        """
+        Block until the next utterance is transcribed.
+
+        Returns:
+            tuple: (text, seconds from end of speech to transcript)
+
+        Raises:
+            CaptureError: If the microphone stream failed
+            Exception: Transcription errors for this utterance
+        """
+        future, ended = self._results.get()
+        if isinstance(future, CaptureError):
+            raise future
+        text = future.result()
+        return text, time.perf_counter() - ended
+
+    def stop(self):
+        self._stop.set()
+        self._executor.shutdown(wait=False)
+
 
 if __name__ == "__main__":
-    print(get_transcribed_text())
\ No newline at end of file
+    print(get_transcribed_text())
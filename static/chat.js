@@ -28,6 +28,71 @@ function addMessage(text, sender) {
     msg.appendChild(bubble);
     chatBox.appendChild(msg);
     chatBox.scrollTop = chatBox.scrollHeight;
+    return body;
+}
+
+// Stream replies token by token from /chat_stream (set false to use blocking /chat)
+const useStreaming = true;
+
+function handleChatError(error) {
+    if (/api key/i.test(error)) {
+        addMessage('⚠️ Please provide your HuggingFace API key in the left sidebar. Get one at https://huggingface.co/settings/tokens', 'bot');
+        const inp = document.getElementById('api-key-input');
+        if (inp) inp.focus();
+    } else {
+        addMessage('Error: ' + error, 'bot');
+    }
+}
+
+async function streamReply(payload) {
+    const started = performance.now();
+    const resp = await fetch('/chat_stream', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify(payload)
+    });
+    if (!resp.ok || !resp.body) {
+        const data = await resp.json();
+        handleChatError(data.error || 'Request failed');
+        return;
+    }
+    const reader = resp.body.getReader();
+    const decoder = new TextDecoder();
+    let body = null;
+    let text = '';
+    let buffer = '';
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        // Server-sent events are separated by a blank line
+        let sep;
+        while ((sep = buffer.indexOf('\n\n')) !== -1) {
+            const raw = buffer.slice(0, sep);
+            buffer = buffer.slice(sep + 2);
+            let event = 'message';
+            let data = '';
+            raw.split('\n').forEach(line => {
+                if (line.startsWith('event: ')) event = line.slice(7);
+                else if (line.startsWith('data: ')) data += line.slice(6);
+            });
+            const parsed = JSON.parse(data);
+            if (event === 'error') {
+                handleChatError(parsed.error);
+            } else if (event === 'done') {
+                console.log(`Reply streamed: first token ${Math.round(parsed.ttft_ms)} ms (server), ` +
+                    `complete ${Math.round(performance.now() - started)} ms (client)`);
+            } else if (parsed.token) {
+                if (!body) {
+                    body = addMessage('', 'bot');
+                    console.log(`First token rendered after ${Math.round(performance.now() - started)} ms`);
+                }
+                text += parsed.token;
+                body.textContent = text;
+                chatBox.scrollTop = chatBox.scrollHeight;
+            }
+        }
+    }
 }
 
 async function sendMessage(text) {
@@ -36,21 +101,24 @@ async function sendMessage(text) {
     addMessage(message, 'user');
     chatInput.value = '';
     const useResume = document.querySelector('input[name="interview-mode"]:checked').value === 'with-resume';
+    const payload = { message: message, session_id: 'default', use_resume: useResume };
     try {
+        if (useStreaming) {
+            await streamReply(payload);
+            return;
+        }
+        const started = performance.now();
         const resp = await fetch('/chat', {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({ message: message, session_id: 'default', use_resume: useResume })
+            body: JSON.stringify(payload)
         });
         const data = await resp.json();
-        if (data.error && /api key/i.test(data.error)) {
-            addMessage('⚠️ Please provide your HuggingFace API key in the left sidebar. Get one at https://huggingface.co/settings/tokens', 'bot');
-            const inp = document.getElementById('api-key-input');
-            if (inp) inp.focus();
+        if (data.error) {
+            handleChatError(data.error);
         } else if (data.response) {
             addMessage(data.response, 'bot');
-        } else if (data.error) {
-            addMessage('Error: ' + data.error, 'bot');
+            console.log(`Reply rendered after ${Math.round(performance.now() - started)} ms`);
         }
     } catch (err) {
         addMessage('Network error: ' + err.message, 'bot');
@@ -78,6 +146,8 @@ let scriptProcessor;
 let recordedChunks = [];
 let recordingLength = 0;
 let wavSampleRate = 16000; // desired; actual may differ
+let speechSocket = null; // live transcription channel; null when using the /speech upload
+let speechFinal = null;   // resolves with the final transcript from the socket
 const micBtn = document.getElementById('mic-btn');
 const micIcon = document.getElementById('mic-icon');
 const micAnimation = document.getElementById('mic-animation');
@@ -95,11 +165,64 @@ async function startWavRecording() {
         const input = e.inputBuffer.getChannelData(0);
         recordedChunks.push(new Float32Array(input));
         recordingLength += input.length;
+        // Stream PCM while the candidate speaks
+        if (speechSocket && speechSocket.readyState === WebSocket.OPEN) {
+            speechSocket.send(floatTo16BitPCM(input).buffer);
+        }
     };
     source.connect(scriptProcessor);
     scriptProcessor.connect(audioContext.destination);
 }
 
+function showTranscript(text) {
+    chatInput.value = text;
+    chatInput.style.height = 'auto';
+    chatInput.style.height = chatInput.scrollHeight + 'px';
+}
+
+// Open the streaming channel; partial transcripts fill the input as utterances finish.
+// Resolves false if the server has no WebSocket support (the WAV upload is used instead).
+function openSpeechSocket(sampleRate) {
+    return new Promise((resolve) => {
+        let ws;
+        try {
+            const scheme = location.protocol === 'https:' ? 'wss' : 'ws';
+            ws = new WebSocket(`${scheme}://${location.host}/speech_stream`);
+        } catch {
+            resolve(false);
+            return;
+        }
+        ws.binaryType = 'arraybuffer';
+        let settle;
+        speechFinal = new Promise((res, rej) => { settle = { res, rej }; });
+        speechFinal.catch(() => {});
+        ws.onopen = () => {
+            if (!isRecording) { // stopped during the handshake; the WAV upload has it
+                ws.close();
+                resolve(false);
+                return;
+            }
+            ws.send(JSON.stringify({ type: 'start', sample_rate: sampleRate }));
+            // Audio captured during the handshake goes first, so the transcript keeps the first words
+            recordedChunks.forEach(chunk => ws.send(floatTo16BitPCM(chunk).buffer));
+            speechSocket = ws;
+            resolve(true);
+        };
+        ws.onmessage = (e) => {
+            const data = JSON.parse(e.data);
+            if (data.type === 'partial') {
+                showTranscript(data.text);
+            } else if (data.type === 'final') {
+                settle.res(data.text);
+            } else if (data.type === 'error') {
+                settle.rej(new Error(data.error));
+            }
+        };
+        ws.onerror = () => { resolve(false); settle.rej(new Error('Streaming connection failed')); };
+        ws.onclose = () => { resolve(false); settle.rej(new Error('Streaming connection closed')); };
+    });
+}
+
 function mergeBuffers(chunks, length) {
     const result = new Float32Array(length);
     let offset = 0;
@@ -159,6 +282,22 @@ function writeString(view, offset, string) {
     }
 }
 
+async function transcribeRecording() {
+    const samples = mergeBuffers(recordedChunks, recordingLength);
+    const wavBlob = encodeWAV(samples, wavSampleRate);
+
+    const formData = new FormData();
+    formData.append('audio', wavBlob, 'recording.wav');
+    formData.append('session_id', 'default');
+    formData.append('use_resume', document.querySelector('input[name="interview-mode"]:checked').value === 'with-resume');
+
+    const resp = await fetch('/speech', { method: 'POST', body: formData });
+    const data = await resp.json();
+    if (data.error) throw new Error(data.error);
+    // Backend returns {result} for transcription-only
+    return data.result || data.text || '';
+}
+
 micBtn.addEventListener('click', async () => {
     if (!isRecording) {
         try {
@@ -166,6 +305,7 @@ micBtn.addEventListener('click', async () => {
             isRecording = true;
             micIcon.textContent = '⏹️';
             micAnimation.style.display = 'flex';
+            await openSpeechSocket(wavSampleRate);
         } catch (err) {
             addMessage('Microphone error: ' + err.message, 'bot');
         }
@@ -175,39 +315,37 @@ micBtn.addEventListener('click', async () => {
             if (audioContext) await audioContext.close();
             if (micStream) micStream.getTracks().forEach(t => t.stop());
         } catch {}
-
-        const samples = mergeBuffers(recordedChunks, recordingLength);
-        const wavBlob = encodeWAV(samples, wavSampleRate);
         micAnimation.style.display = 'none';
 
-        const formData = new FormData();
-        formData.append('audio', wavBlob, 'recording.wav');
-        formData.append('session_id', 'default');
-        formData.append('use_resume', document.querySelector('input[name="interview-mode"]:checked').value === 'with-resume');
-
         try {
-            const resp = await fetch('/speech', { method: 'POST', body: formData });
-            const data = await resp.json();
-            if (data.error && /api key/i.test(data.error)) {
+            let transcribedText = null;
+            if (speechSocket) {
+                const ws = speechSocket;
+                speechSocket = null;
+                try {
+                    ws.send(JSON.stringify({ type: 'stop' }));
+                    transcribedText = await speechFinal;
+                } catch {
+                    transcribedText = null; // stream broke; re-send the whole recording
+                }
+                ws.close();
+            }
+            if (transcribedText === null) {
+                transcribedText = await transcribeRecording();
+            }
+            if (transcribedText) {
+                // Insert transcribed text into input field for user to review/edit
+                showTranscript(transcribedText);
+                chatInput.focus();
+            }
+        } catch (err) {
+            if (/api key/i.test(err.message)) {
                 addMessage('⚠️ Please provide your HuggingFace API key in the left sidebar first!', 'bot');
                 const inp = document.getElementById('api-key-input');
                 if (inp) inp.focus();
-            } else if (data.error) {
-                addMessage('Error: ' + data.error, 'bot');
             } else {
-                // Get transcribed text (backend returns {result} for transcription-only)
-                const transcribedText = data.result || data.text || '';
-                if (transcribedText) {
-                    // Insert transcribed text into input field for user to review/edit
-                    chatInput.value = transcribedText;
-                    chatInput.focus();
-                    // Auto-expand textarea if text is long
-                    chatInput.style.height = 'auto';
-                    chatInput.style.height = chatInput.scrollHeight + 'px';
-                }
+                addMessage('Speech processing error: ' + err.message, 'bot');
             }
-        } catch (err) {
-            addMessage('Speech processing error: ' + err.message, 'bot');
         }
 
         isRecording = false;
@@ -258,6 +396,32 @@ uploadResumeBtn.addEventListener('click', () => {
     resumeUploadInput.click();
 });
 
+const uploadStageLabels = {
+    load_model: 'Loading model',
+    cache_lookup: 'Checking cache',
+    ingest: 'Reading & indexing PDF',
+    index: 'Indexing'
+};
+
+// Resume processing runs as a background job; poll until it finishes
+async function pollUploadJob(jobId) {
+    while (true) {
+        await new Promise(r => setTimeout(r, 1000));
+        const resp = await fetch('/upload_status/' + jobId);
+        const job = await resp.json();
+        if (job.status === 'succeeded') {
+            uploadStatus.textContent = ' Resume uploaded & processed';
+            return;
+        }
+        if (job.status === 'failed' || job.error) {
+            uploadStatus.textContent = ' ' + (job.error || 'Upload failed');
+            return;
+        }
+        const stage = uploadStageLabels[job.stage] || 'Queued';
+        uploadStatus.textContent = ' ' + stage + '...';
+    }
+}
+
 resumeUploadInput.addEventListener('change', async (e) => {
     const file = e.target.files[0];
     if (!file) return;
@@ -272,7 +436,9 @@ resumeUploadInput.addEventListener('change', async (e) => {
     try {
         const resp = await fetch('/upload_resume', { method: 'POST', body: formData });
         const data = await resp.json();
-        if (data.status === 'success' || data.success) {
+        if (data.status === 'queued' && data.job_id) {
+            await pollUploadJob(data.job_id);
+        } else if (data.status === 'success' || data.success) {
             uploadStatus.textContent = ' Resume uploaded & processed';
         } else {
             uploadStatus.textContent = ' ' + (data.error || data.message || 'Upload failed');
@@ -1,32 +1,362 @@
+"""
+Speech-to-text
+Pluggable recognizer backends behind transcribe_audio(). STT_BACKEND selects
+the engine: "google" (remote web API, the original behaviour), "whisper"
+(faster-whisper on CPU) or "vosk". Local models are loaded once per process
+and reused for every request.
+
+Uploaded WAVs are preprocessed with NumPy before recognition: downmixed to
+mono, resampled to 16 kHz and trimmed of leading/trailing silence, and
+clips with no sound at all are rejected before any recognizer runs.
+"""
+import io
+import json
+import os
+import struct
+import threading
+import time
+
+import numpy as np
 import speech_recognition as sr
 
-def transcribe_audio(audio_buffer):
+import metrics
+
+STT_BACKEND = os.getenv("STT_BACKEND", "google")
+STT_LANGUAGE = os.getenv("STT_LANGUAGE", "en")
+STT_SAMPLE_RATE = 16000  # what the local models expect
+WHISPER_MODEL = os.getenv("WHISPER_MODEL", "base.en")
+WHISPER_COMPUTE_TYPE = os.getenv("WHISPER_COMPUTE_TYPE", "int8")
+WHISPER_CPU_THREADS = int(os.getenv("WHISPER_CPU_THREADS", "0"))  # 0 = library default
+VOSK_MODEL_PATH = os.getenv("VOSK_MODEL_PATH", "models/vosk-model-small-en-us-0.15")
+STT_PREPROCESS = os.getenv("STT_PREPROCESS", "1") == "1"
+TRIM_THRESHOLD_DBFS = float(os.getenv("STT_TRIM_THRESHOLD_DBFS", "-45"))  # quieter frames count as silence
+TRIM_PADDING_MS = int(os.getenv("STT_TRIM_PADDING_MS", "150"))  # silence kept around the speech
+
+
+class EmptyAudioError(ValueError):
+    """Raised when a clip contains no audible sound."""
+
+
+class STTBackend:
     """
-    Transcribe PCM WAV audio from an in-memory buffer.
-    The buffer must be a valid WAV file (PCM 16-bit mono preferred).
+    Base class for speech-to-text engines.
+
+    Subclasses implement load() (called once per process) and
+    transcribe(audio) taking a speech_recognition AudioData.
     """
-    recognizer = sr.Recognizer()
-    audio_buffer.seek(0)
-    try:
-        with sr.AudioFile(audio_buffer) as source:
-            audio = recognizer.record(source)
-            text = recognizer.recognize_google(audio)
-            return text
-    except Exception as e:
-        raise Exception(f"Could not process audio: {e}")
+
+    name = "base"
+
+    def load(self):
+        """Load models or clients; called once before the first transcription."""
+
+    def transcribe(self, audio: sr.AudioData) -> str:
+        raise NotImplementedError
+
+    @staticmethod
+    def pcm16(audio: sr.AudioData) -> bytes:
+        """Mono 16-bit PCM at STT_SAMPLE_RATE, as local models expect."""
+        return audio.get_raw_data(convert_rate=STT_SAMPLE_RATE, convert_width=2)
+
+
+class GoogleBackend(STTBackend):
+    """Google Web Speech API via speech_recognition (needs network access)."""
+
+    name = "google"
+
+    def load(self):
+        self.recognizer = sr.Recognizer()
+
+    def transcribe(self, audio):
+        return self.recognizer.recognize_google(audio, language=STT_LANGUAGE)
+
+
+class WhisperBackend(STTBackend):
+    """Local Whisper model via faster-whisper (CTranslate2, int8 on CPU)."""
+
+    name = "whisper"
+
+    def load(self):
+        from faster_whisper import WhisperModel
+
+        print(f"[INFO] Loading Whisper model: {WHISPER_MODEL} ({WHISPER_COMPUTE_TYPE})")
+        self.model = WhisperModel(WHISPER_MODEL, device="cpu", compute_type=WHISPER_COMPUTE_TYPE,
+                                  cpu_threads=WHISPER_CPU_THREADS)
+
+    def transcribe(self, audio):
+        samples = np.frombuffer(self.pcm16(audio), dtype=np.int16).astype(np.float32) / 32768.0
+        segments, _ = self.model.transcribe(samples, language=STT_LANGUAGE, beam_size=1)
+        return "".join(segment.text for segment in segments).strip()
+
+
+class VoskBackend(STTBackend):
+    """Local Kaldi model via Vosk; the model is shared, recognizers are per call."""
+
+    name = "vosk"
+
+    def load(self):
+        from vosk import Model, SetLogLevel
+
+        SetLogLevel(-1)
+        print(f"[INFO] Loading Vosk model: {VOSK_MODEL_PATH}")
+        self.model = Model(VOSK_MODEL_PATH)
+
+    def transcribe(self, audio):
+        from vosk import KaldiRecognizer
+
+        recognizer = KaldiRecognizer(self.model, STT_SAMPLE_RATE)
+        recognizer.AcceptWaveform(self.pcm16(audio))
+        return json.loads(recognizer.FinalResult()).get("text", "")
+
+
+BACKENDS = {cls.name: cls for cls in (GoogleBackend, WhisperBackend, VoskBackend)}
+
+_backends = {}
+_lock = threading.Lock()
 
 
+def register_backend(name: str, backend: STTBackend):
+    """Install a ready-made backend instance under `name` (e.g. a fake for benchmarks)."""
+    with _lock:
+        _backends[name] = backend
 
 
+def get_backend(name: str = None) -> STTBackend:
+    """
+    Get the loaded backend, loading it on first use in this process.
+
+    Args:
+        name: Backend name (defaults to STT_BACKEND)
+
+    Returns:
+        STTBackend: Shared backend instance
+    """
+    name = name or STT_BACKEND
+    backend = _backends.get(name)
+    if backend is not None:
+        return backend
+    with _lock:
+        if name not in _backends:
+            if name not in BACKENDS:
+                raise ValueError(f"Unknown STT backend '{name}' (choose from {', '.join(BACKENDS)})")
+            start = time.perf_counter()
+            backend = BACKENDS[name]()
+            backend.load()
+            _backends[name] = backend
+            print(f"[INFO] STT backend '{name}' ready in {time.perf_counter() - start:.2f}s")
+        return _backends[name]
+
+
+# ---------------------------------------------------------------------------
+# Audio preprocessing
+# ---------------------------------------------------------------------------
+
+_stats_lock = threading.Lock()
+_stats = {
+    "requests": 0,
+    "empty_rejected": 0,
+    "bytes_in": 0,
+    "bytes_out": 0,
+    "audio_seconds_in": 0.0,
+    "audio_seconds_out": 0.0,
+    "preprocess_seconds": 0.0,
+}
+
+
+def _parse_wav(view: memoryview):
+    """
+    Locate the PCM data of a WAV file without copying it.
+
+    Returns:
+        tuple: (channels, sample_rate, sample_width, data memoryview), or None
+               for anything other than 16-bit integer PCM
+    """
+    if len(view) < 12 or view[0:4] != b"RIFF" or view[8:12] != b"WAVE":
+        return None
+    fmt, offset = None, 12
+    while offset + 8 <= len(view):
+        chunk_id = bytes(view[offset:offset + 4])
+        (size,) = struct.unpack_from("<I", view, offset + 4)
+        body = offset + 8
+        if chunk_id == b"fmt ":
+            fmt = struct.unpack_from("<HHIIHH", view, body)
+        elif chunk_id == b"data" and fmt is not None:
+            audio_format, channels, rate, _, _, bits = fmt
+            # 1 = PCM, 0xFFFE = WAVE_FORMAT_EXTENSIBLE (browsers/pyaudio write integer PCM)
+            if audio_format not in (1, 0xFFFE) or bits != 16:
+                return None
+            end = min(len(view), body + size)  # streamed WAVs may carry a bogus size
+            end -= (end - body) % (2 * channels)
+            return channels, rate, 2, view[body:end]
+        offset = body + size + (size & 1)
+    return None
+
+
+def resample(samples: np.ndarray, src_rate: int, dst_rate: int = STT_SAMPLE_RATE) -> np.ndarray:
+    """
+    Resample float32 mono audio. Downsampling low-pass filters first
+    (windowed sinc) so high frequencies don't alias into the speech band.
+    """
+    if src_rate == dst_rate or len(samples) == 0:
+        return samples
+    if dst_rate < src_rate:
+        cutoff = 0.45 * dst_rate / src_rate  # cycles per input sample, just below the new Nyquist
+        taps = np.arange(-32, 33, dtype=np.float32)
+        kernel = 2 * cutoff * np.sinc(2 * cutoff * taps) * np.hamming(len(taps)).astype(np.float32)
+        samples = np.convolve(samples, kernel / kernel.sum(), mode="same").astype(np.float32)
+    count = int(round(len(samples) * dst_rate / src_rate))
+    positions = np.arange(count, dtype=np.float64) * (src_rate / dst_rate)
+    return np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+
+
+def trim_silence(samples: np.ndarray, sample_rate: int) -> np.ndarray:
+    """
+    Slice off leading/trailing frames below TRIM_THRESHOLD_DBFS (a view, no copy).
 
+    Raises:
+        EmptyAudioError: If no frame is above the threshold
+    """
+    frame = max(1, sample_rate // 100)  # 10 ms
+    count = len(samples) // frame
+    if count == 0:
+        raise EmptyAudioError("No speech detected in the recording")
+    frames = samples[:count * frame].reshape(count, frame)
+    rms = np.sqrt(np.mean(frames * frames, axis=1))
+    loud = np.flatnonzero(rms > 10 ** (TRIM_THRESHOLD_DBFS / 20))
+    if len(loud) == 0:
+        raise EmptyAudioError("No speech detected in the recording")
+    pad = TRIM_PADDING_MS * sample_rate // 1000
+    start = max(0, loud[0] * frame - pad)
+    end = min(len(samples), (loud[-1] + 1) * frame + pad)
+    return samples[start:end]
+
+
+def preprocess_wav(data):
+    """
+    Convert a WAV upload to trimmed 16 kHz mono 16-bit PCM.
+
+    The incoming buffer is read through a memoryview/np.frombuffer, so the
+    only new array is the resampled output.
 
+    Args:
+        data: WAV file as bytes, bytearray, memoryview or BytesIO
 
+    Returns:
+        tuple: (speech_recognition AudioData, stats dict), or (None, None) if
+               the file isn't 16-bit PCM WAV (left to speech_recognition)
 
+    Raises:
+        EmptyAudioError: If the clip is silent
+    """
+    start = time.perf_counter()
+    view = data.getbuffer() if hasattr(data, "getbuffer") else memoryview(data)
+    parsed = _parse_wav(view)
+    if parsed is None:
+        return None, None
+    channels, rate, width, pcm = parsed
+    samples = np.frombuffer(pcm, dtype="<i2")
+    seconds_in = len(samples) / channels / rate
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1, dtype=np.float32)
+    else:
+        samples = samples.astype(np.float32)
+    samples *= 1 / 32768.0
+    try:
+        samples = trim_silence(samples, rate)
+    except EmptyAudioError:
+        with _stats_lock:
+            _stats["requests"] += 1
+            _stats["empty_rejected"] += 1
+            _stats["bytes_in"] += len(view)
+            _stats["audio_seconds_in"] += seconds_in
+        raise
+    samples = resample(samples, rate)
+    out = (np.clip(samples, -1.0, 32767 / 32768) * 32768).astype("<i2").tobytes()
+    elapsed = time.perf_counter() - start
 
+    stats = {
+        "bytes_in": len(view),
+        "bytes_out": len(out),
+        "bytes_saved": len(view) - len(out),
+        "sample_rate_in": rate,
+        "channels_in": channels,
+        "audio_seconds_in": round(seconds_in, 3),
+        "audio_seconds_out": round(len(out) / 2 / STT_SAMPLE_RATE, 3),
+        "preprocess_ms": round(1000 * elapsed, 2),
+    }
+    with _stats_lock:
+        _stats["requests"] += 1
+        _stats["bytes_in"] += stats["bytes_in"]
+        _stats["bytes_out"] += stats["bytes_out"]
+        _stats["audio_seconds_in"] += seconds_in
+        _stats["audio_seconds_out"] += stats["audio_seconds_out"]
+        _stats["preprocess_seconds"] += elapsed
+    return sr.AudioData(out, STT_SAMPLE_RATE, 2), stats
 
 
+def get_stats():
+    """Preprocessing totals for this process (bytes and audio seconds removed)."""
+    with _stats_lock:
+        stats = dict(_stats)
+    stats["bytes_saved"] = stats["bytes_in"] - stats["bytes_out"]
+    stats["audio_seconds_saved"] = round(stats["audio_seconds_in"] - stats["audio_seconds_out"], 3)
+    stats["backend"] = STT_BACKEND
+    return stats
 
 
+def transcribe_pcm(pcm: bytes, sample_rate: int, backend: str = None) -> str:
+    """
+    Transcribe raw mono 16-bit PCM (e.g. one utterance from a live stream).
+    Audio is resampled to 16 kHz first; the caller has already trimmed it.
 
+    Returns:
+        str: Recognized text, or "" when nothing intelligible was said
+    """
+    if sample_rate != STT_SAMPLE_RATE:
+        samples = np.frombuffer(pcm, dtype="<i2").astype(np.float32) / 32768.0
+        samples = resample(samples, sample_rate)
+        pcm = (np.clip(samples, -1.0, 32767 / 32768) * 32768).astype("<i2").tobytes()
+        sample_rate = STT_SAMPLE_RATE
+    try:
+        engine = get_backend(backend)
+        with metrics.span("stt", backend=backend or STT_BACKEND):
+            return engine.transcribe(sr.AudioData(pcm, sample_rate, 2))
+    except sr.UnknownValueError:
+        return ""
 
 
+def transcribe_audio(audio_buffer, backend: str = None, preprocess: bool = STT_PREPROCESS):
+    """
+    Transcribe PCM WAV audio from an in-memory buffer.
+    The buffer must be a valid WAV file (PCM 16-bit mono preferred).
+
+    Args:
+        audio_buffer: WAV data as bytes/memoryview or a BytesIO
+        backend: Optional backend name overriding STT_BACKEND
+        preprocess: Resample/trim 16-bit PCM WAVs before recognition
+
+    Raises:
+        EmptyAudioError: If the clip is silent
+    """
+    try:
+        engine = get_backend(backend)
+        audio = None
+        if preprocess:
+            with metrics.span("stt_preprocess"):
+                audio, stats = preprocess_wav(audio_buffer)
+            if stats:
+                metrics.log(f"Audio preprocessed: {stats['bytes_in']} -> {stats['bytes_out']} bytes, "
+                            f"{stats['audio_seconds_in']}s -> {stats['audio_seconds_out']}s "
+                            f"in {stats['preprocess_ms']} ms")
+        if audio is None:
+            if not hasattr(audio_buffer, "seek"):
+                audio_buffer = io.BytesIO(audio_buffer)
+            audio_buffer.seek(0)
+            with sr.AudioFile(audio_buffer) as source:
+                audio = sr.Recognizer().record(source)
+        with metrics.span("stt", backend=backend or STT_BACKEND):
+            return engine.transcribe(audio)
+    except EmptyAudioError:
+        raise
+    except Exception as e:
+        raise Exception(f"Could not process audio: {e}")
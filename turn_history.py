@@ -0,0 +1,131 @@
+"""
+Compact chat history
+Resume-backed turns used to be stored as LangChain messages with the
+retrieved resume chunks inlined into the user message, so every turn kept
+kilobytes of duplicated chunk text that the context window then stripped
+again on every prompt. History is now a list of compact turn records
+(__slots__ objects holding the user text, the reply and the ids of the resume
+chunks that grounded the turn); resume context only exists in the prompt of
+the turn being answered. Each session reports how much inline context it
+avoided storing.
+"""
+import hashlib
+import sys
+
+from context_window import RESUME_CONTEXT_MARKER, strip_resume_context
+
+
+def chunk_id(text: str) -> str:
+    """Stable short id for a resume chunk (content hash, same across workers)."""
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=8).hexdigest()
+
+
+class Turn:
+    """One exchange: the candidate's message, the interviewer's reply and the resume chunks used."""
+
+    __slots__ = ("user", "reply", "chunk_ids")
+
+    def __init__(self, user: str, reply: str, chunk_ids=()):
+        self.user = user
+        self.reply = reply
+        self.chunk_ids = tuple(chunk_ids)
+
+
+class TurnHistory:
+    """
+    Per-session chat history of compact Turn records.
+
+    Attributes:
+        system: System prompt, stored once for the session
+        turns: Completed turns, oldest first
+        context_chars: Resume context characters kept out of history
+    """
+
+    __slots__ = ("system", "turns", "context_chars")
+
+    def __init__(self):
+        self.system = ""
+        self.turns = []
+        self.context_chars = 0
+
+    def __len__(self):
+        return len(self.turns)
+
+    @property
+    def messages(self):
+        """History as LangChain messages (built per prompt, never stored)."""
+        from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+        messages = [SystemMessage(content=self.system)] if self.system else []
+        for turn in self.turns:
+            messages.append(HumanMessage(content=turn.user))
+            messages.append(AIMessage(content=turn.reply))
+        return messages
+
+    def add_turn(self, user: str, reply: str, chunk_ids=(), context_chars: int = 0, system: str = None):
+        """
+        Record a completed turn.
+
+        Args:
+            user: User message without resume context
+            reply: AI reply
+            chunk_ids: Ids of the resume chunks that were in the prompt
+            context_chars: Length of the resume context that was in the prompt
+            system: System prompt, set on a session's first turn
+        """
+        if system:
+            self.system = system
+        self.turns.append(Turn(user, reply, chunk_ids))
+        self.context_chars += context_chars
+
+    def nbytes(self) -> int:
+        """Approximate memory footprint of the history in bytes."""
+        size = sys.getsizeof(self) + sys.getsizeof(self.turns) + sys.getsizeof(self.system)
+        for turn in self.turns:
+            size += sys.getsizeof(turn) + sys.getsizeof(turn.user) + sys.getsizeof(turn.reply)
+            size += sys.getsizeof(turn.chunk_ids) + sum(sys.getsizeof(i) for i in turn.chunk_ids)
+        return size
+
+    def report(self) -> dict:
+        """Memory use vs. what the same history cost with resume context inlined."""
+        compact = self.nbytes()
+        inline = compact + self.context_chars
+        return {
+            "turns": len(self.turns),
+            "resume_turns": sum(1 for turn in self.turns if turn.chunk_ids),
+            "bytes": compact,
+            "inline_context_bytes_avoided": self.context_chars,
+            "reduction": round(1 - compact / inline, 3) if inline else 0.0,
+        }
+
+    def to_records(self) -> dict:
+        """Serializable form: {"system": ..., "turns": [[user, reply, [chunk ids]], ...], "context_chars": N}."""
+        return {
+            "system": self.system,
+            "turns": [[turn.user, turn.reply, list(turn.chunk_ids)] for turn in self.turns],
+            "context_chars": self.context_chars,
+        }
+
+    @classmethod
+    def from_records(cls, data):
+        """
+        Rebuild a history from to_records() output, or from the older
+        [[role, content], ...] message list (resume context is stripped).
+        """
+        history = cls()
+        if isinstance(data, dict):
+            history.system = data["system"]
+            history.turns = [Turn(user, reply, ids) for user, reply, ids in data["turns"]]
+            history.context_chars = data["context_chars"]
+            return history
+        user = None
+        for role, content in data:
+            if role == "s":
+                history.system = content
+            elif role == "h":
+                user = strip_resume_context(content)
+                if RESUME_CONTEXT_MARKER in content:
+                    history.context_chars += len(content) - len(user)
+            elif user is not None:
+                history.turns.append(Turn(user, content))
+                user = None
+        return history
@@ -0,0 +1,144 @@
+"""
+Local in-process vector index
+A NumPy matrix of normalized embeddings searched with a dot product, exposed
+as a LangChain VectorStore so `as_retriever()` works exactly like the
+Cassandra store. A resume is only a handful of chunks, so an in-process index
+avoids Astra DB table drop/create and a network round-trip per query.
+"""
+import json
+import os
+import threading
+import uuid
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.vectorstores import VectorStore
+
+
+class LocalVectorStore(VectorStore):
+    """
+    In-memory vector store with optional memory-mapped persistence.
+
+    Args:
+        embedding: LangChain Embeddings used for documents and queries
+        vectors: Optional preloaded (n, dim) float32 matrix of normalized embeddings
+        texts, metadatas, ids: Optional parallel lists matching `vectors`
+    """
+
+    def __init__(self, embedding, vectors=None, texts=None, metadatas=None, ids=None):
+        self._embedding = embedding
+        self._vectors = vectors
+        self._texts = list(texts or [])
+        self._metadatas = list(metadatas or [{} for _ in self._texts])
+        self._ids = list(ids or [str(uuid.uuid4()) for _ in self._texts])
+        self._lock = threading.Lock()  # batches may be written concurrently
+
+    @property
+    def embeddings(self):
+        return self._embedding
+
+    def __len__(self):
+        return len(self._texts)
+
+    @staticmethod
+    def _normalize(matrix):
+        matrix = np.asarray(matrix, dtype=np.float32)
+        if matrix.ndim == 1:
+            matrix = matrix[None, :]
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+    def add_vectors(self, vectors, texts, metadatas=None, ids=None):
+        """Add precomputed embeddings (skips the embedding model)."""
+        texts = list(texts)
+        metadatas = list(metadatas) if metadatas is not None else [{} for _ in texts]
+        ids = list(ids) if ids is not None else [str(uuid.uuid4()) for _ in texts]
+        if not texts:
+            return []
+        block = self._normalize(vectors)
+        with self._lock:
+            self._vectors = block if self._vectors is None else np.vstack([self._vectors, block])
+            self._texts.extend(texts)
+            self._metadatas.extend(metadatas)
+            self._ids.extend(ids)
+        return ids
+
+    def add_texts(self, texts, metadatas=None, ids=None, **kwargs):
+        texts = list(texts)
+        if not texts:
+            return []
+        return self.add_vectors(self._embedding.embed_documents(texts), texts, metadatas, ids)
+
+    def delete(self, ids=None, **kwargs):
+        if ids is None:
+            self._vectors, self._texts, self._metadatas, self._ids = None, [], [], []
+            return True
+        drop = set(ids)
+        keep = [i for i, doc_id in enumerate(self._ids) if doc_id not in drop]
+        self._vectors = self._vectors[keep] if self._vectors is not None and keep else None
+        self._texts = [self._texts[i] for i in keep]
+        self._metadatas = [self._metadatas[i] for i in keep]
+        self._ids = [self._ids[i] for i in keep]
+        return True
+
+    def similarity_search_with_score_by_vector(self, embedding, k: int = 4):
+        """Top-k documents by cosine similarity (dot product of normalized vectors)."""
+        if self._vectors is None or not self._texts:
+            return []
+        scores = self._vectors @ self._normalize(embedding)[0]
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [
+            (Document(id=self._ids[i], page_content=self._texts[i], metadata=self._metadatas[i]), float(scores[i]))
+            for i in top
+        ]
+
+    def similarity_search_by_vector(self, embedding, k: int = 4, **kwargs):
+        return [doc for doc, _ in self.similarity_search_with_score_by_vector(embedding, k)]
+
+    def similarity_search_with_score(self, query: str, k: int = 4, **kwargs):
+        return self.similarity_search_with_score_by_vector(self._embedding.embed_query(query), k)
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs):
+        return [doc for doc, _ in self.similarity_search_with_score(query, k)]
+
+    def _select_relevance_score_fn(self):
+        # Cosine similarity in [-1, 1] -> relevance in [0, 1]
+        return lambda score: (score + 1.0) / 2.0
+
+    @classmethod
+    def from_texts(cls, texts, embedding, metadatas=None, ids=None, **kwargs):
+        store = cls(embedding)
+        store.add_texts(texts, metadatas, ids)
+        return store
+
+    def save(self, path: str):
+        """
+        Persist to `<path>.npy` (float32 matrix) and `<path>.json` (texts/metadata).
+        Files are written to a temp name and renamed, so readers never see a partial index.
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        vectors = self._vectors if self._vectors is not None else np.zeros((0, 0), dtype=np.float32)
+        with open(path + ".npy.tmp", "wb") as f:
+            np.save(f, vectors)
+        with open(path + ".json.tmp", "w", encoding="utf-8") as f:
+            json.dump({"texts": self._texts, "metadatas": self._metadatas, "ids": self._ids}, f)
+        os.replace(path + ".npy.tmp", path + ".npy")
+        os.replace(path + ".json.tmp", path + ".json")
+
+    @classmethod
+    def load(cls, path: str, embedding, mmap: bool = True):
+        """
+        Load an index written by save(). With mmap=True the embedding matrix is
+        memory-mapped read-only, so workers share the pages via the OS page cache.
+        """
+        vectors = np.load(path + ".npy", mmap_mode="r" if mmap else None)
+        with open(path + ".json", encoding="utf-8") as f:
+            data = json.load(f)
+        if vectors.size == 0:
+            vectors = None
+        return cls(embedding, vectors, data["texts"], data["metadatas"], data["ids"])
@@ -0,0 +1,226 @@
+"""
+Streaming voice transcription
+The browser sends 16-bit PCM frames over a WebSocket while the candidate
+speaks. An energy-based voice activity detector splits the stream into
+utterances at pauses; each utterance is transcribed in the background while
+audio keeps arriving, and the transcript so far is pushed back after every
+utterance. When recording stops only the last utterance is left to
+transcribe, so the final text arrives shortly after the candidate stops.
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+import metrics
+import transcribe
+
+VAD_FRAME_MS = 30
+VAD_INITIAL_NOISE_DBFS = -60.0  # noise floor assumed until the first quiet frames arrive
+VAD_THRESHOLD_DB = float(os.getenv("VAD_THRESHOLD_DB", "12"))  # speech = this far above the noise floor
+VAD_MIN_LEVEL_DBFS = float(os.getenv("VAD_MIN_LEVEL_DBFS", "-50"))  # never treat quieter frames as speech
+VAD_SILENCE_MS = int(os.getenv("VAD_SILENCE_MS", "600"))  # pause that ends an utterance
+VAD_MIN_SPEECH_MS = int(os.getenv("VAD_MIN_SPEECH_MS", "200"))  # shorter blips are dropped
+VAD_PADDING_MS = int(os.getenv("VAD_PADDING_MS", "200"))  # audio kept around each utterance
+VAD_MAX_UTTERANCE_SECONDS = float(os.getenv("VAD_MAX_UTTERANCE_SECONDS", "15"))
+STREAM_MAX_SECONDS = float(os.getenv("STREAM_MAX_SECONDS", "300"))
+STREAM_MIN_SAMPLE_RATE = 8000
+STREAM_MAX_SAMPLE_RATE = 96000  # browsers report their AudioContext rate (usually 44.1/48 kHz)
+
+
+def parse_sample_rate(value) -> int:
+    """
+    Validate the sample_rate of a start message.
+
+    Returns:
+        int: Sample rate in Hz
+
+    Raises:
+        ValueError: Not a whole number between STREAM_MIN_SAMPLE_RATE and STREAM_MAX_SAMPLE_RATE
+    """
+    try:
+        rate = float(value)
+    except (TypeError, ValueError):
+        rate = None
+    if isinstance(value, bool) or rate is None or not rate.is_integer() \
+            or not STREAM_MIN_SAMPLE_RATE <= rate <= STREAM_MAX_SAMPLE_RATE:
+        raise ValueError(f"Unsupported sample_rate {value!r}: expected {STREAM_MIN_SAMPLE_RATE}-"
+                         f"{STREAM_MAX_SAMPLE_RATE} Hz")
+    return int(rate)
+
+
+class EnergyVAD:
+    """
+    Frame-level voice activity detector with an adaptive noise floor.
+
+    Args:
+        sample_rate: Sample rate of the incoming PCM
+    """
+
+    def __init__(self, sample_rate: int):
+        self.frame_samples = sample_rate * VAD_FRAME_MS // 1000
+        self.noise_db = VAD_INITIAL_NOISE_DBFS
+
+    def levels(self, samples: np.ndarray) -> np.ndarray:
+        """dBFS level of each complete frame in `samples` (int16)."""
+        frames = samples[: len(samples) // self.frame_samples * self.frame_samples]
+        frames = frames.reshape(-1, self.frame_samples).astype(np.float32) / 32768.0
+        rms = np.sqrt(np.mean(frames * frames, axis=1)) + 1e-9
+        return 20 * np.log10(rms)
+
+    def is_speech(self, level: float) -> bool:
+        speech = level > max(self.noise_db + VAD_THRESHOLD_DB, VAD_MIN_LEVEL_DBFS)
+        # Track the background level: quickly downwards, slowly upwards, and very
+        # slowly during "speech" so a loud constant background is eventually absorbed
+        if level < self.noise_db:
+            rate = 0.5
+        else:
+            rate = 0.02 if speech else 0.05
+        self.noise_db += rate * (level - self.noise_db)
+        return speech
+
+
+class VoiceStream:
+    """
+    One live recording: segments utterances and transcribes them in order.
+
+    Args:
+        send: Callable receiving event dicts ({"type": "partial"|"final", ...})
+        sample_rate: Sample rate of the PCM frames fed in
+        backend: Optional STT backend name (defaults to STT_BACKEND)
+    """
+
+    def __init__(self, send, sample_rate: int, backend: str = None):
+        self.send = send
+        self.sample_rate = sample_rate
+        self.backend = backend
+        self.vad = EnergyVAD(sample_rate)
+        self._pending = np.zeros(0, dtype=np.int16)  # samples not yet forming a full frame
+        self._frames = []  # frames of the current utterance (incl. padding)
+        self._preroll = []  # recent silent frames kept as leading padding
+        self._speech_frames = 0
+        self._silent_run = 0
+        self._received_samples = 0
+        self._segments = []
+        self._futures = []
+        self._lock = threading.Lock()
+        # Single worker keeps utterances transcribed in order
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="voice-stream")
+        self.stats = {"utterances": 0, "failed": 0, "audio_seconds": 0.0, "transcribe_seconds": 0.0}
+
+    def _frames_for(self, ms: int) -> int:
+        return max(1, ms // VAD_FRAME_MS)
+
+    def feed(self, pcm: bytes):
+        """Add a chunk of little-endian 16-bit mono PCM."""
+        if self._received_samples > STREAM_MAX_SECONDS * self.sample_rate:
+            raise ValueError(f"Recording exceeds {STREAM_MAX_SECONDS:.0f} seconds")
+        samples = np.frombuffer(pcm[: len(pcm) // 2 * 2], dtype="<i2")
+        self._received_samples += len(samples)
+        samples = np.concatenate([self._pending, samples]) if len(self._pending) else samples
+        frame = self.vad.frame_samples
+        usable = len(samples) // frame * frame
+        self._pending = samples[usable:].copy()
+        if not usable:
+            return
+        frames = samples[:usable].reshape(-1, frame)
+        for samples_frame, level in zip(frames, self.vad.levels(samples[:usable])):
+            self._on_frame(samples_frame, self.vad.is_speech(level))
+
+    def _on_frame(self, frame: np.ndarray, speech: bool):
+        padding = self._frames_for(VAD_PADDING_MS)
+        if not self._frames:
+            if not speech:
+                self._preroll.append(frame)
+                del self._preroll[:-padding]
+                return
+            self._frames = self._preroll
+            self._preroll = []
+        self._frames.append(frame)
+        if speech:
+            self._speech_frames += 1
+            self._silent_run = 0
+        else:
+            self._silent_run += 1
+        max_frames = int(VAD_MAX_UTTERANCE_SECONDS * 1000 / VAD_FRAME_MS)
+        if self._silent_run >= self._frames_for(VAD_SILENCE_MS) or len(self._frames) >= max_frames:
+            self._close_utterance()
+
+    def _close_utterance(self):
+        frames, speech, silent = self._frames, self._speech_frames, self._silent_run
+        self._frames, self._speech_frames, self._silent_run = [], 0, 0
+        if speech < self._frames_for(VAD_MIN_SPEECH_MS):
+            return
+        # Keep only VAD_PADDING_MS of the trailing silence
+        keep = len(frames) - max(0, silent - self._frames_for(VAD_PADDING_MS))
+        pcm = np.concatenate(frames[:keep]).astype("<i2").tobytes()
+        index = len(self._futures)
+        self._futures.append(self._executor.submit(self._transcribe, index, pcm))
+
+    def _transcribe(self, index: int, pcm: bytes):
+        start = time.perf_counter()
+        text = transcribe.transcribe_pcm(pcm, self.sample_rate, self.backend).strip()
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.stats["utterances"] += 1
+            self.stats["audio_seconds"] += len(pcm) / 2 / self.sample_rate
+            self.stats["transcribe_seconds"] += elapsed
+            if text:
+                self._segments.append((index, text))
+                self._segments.sort()
+            transcript = self.text()
+        self.send({"type": "partial", "text": transcript, "segment": index})
+
+    def text(self) -> str:
+        """Transcript of the utterances finished so far."""
+        return " ".join(text for _, text in self._segments)
+
+    def finish(self) -> str:
+        """
+        Flush the current utterance, wait for outstanding transcriptions and
+        send the final transcript. An utterance that fails to transcribe is
+        logged and left out; the others still make up the transcript.
+
+        Returns:
+            str: Final transcript
+
+        Raises:
+            Exception: The first transcription error, if no utterance was transcribed
+        """
+        start = time.perf_counter()
+        if self._frames:
+            if len(self._pending):
+                self._frames.append(self._pending)
+            self._close_utterance()
+        errors = []
+        try:
+            for index, future in enumerate(self._futures):
+                try:
+                    future.result()
+                except Exception as e:
+                    metrics.log(f"Streamed utterance {index} failed to transcribe: {e}", "WARN")
+                    errors.append(e)
+        finally:
+            self._executor.shutdown(wait=False)
+        with self._lock:
+            self.stats["failed"] = len(errors)
+            final = self.text()
+        if errors and not self._segments:
+            raise errors[0]
+        self.send({
+            "type": "final",
+            "text": final,
+            "finalize_ms": round(1000 * (time.perf_counter() - start), 1),
+            "audio_seconds": round(self._received_samples / self.sample_rate, 2),
+            "utterances": self.stats["utterances"],
+            "failed_utterances": len(errors),
+        })
+        return final
+
+    def close(self):
+        """Abandon the stream (client went away)."""
+        for future in self._futures:
+            future.cancel()
+        self._executor.shutdown(wait=False)